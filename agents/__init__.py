@@ -1,9 +1,32 @@
 """
 Bots package containing AI agent implementations.
+
+Agents are imported lazily so that provider SDKs (langchain_google_genai, mcp_use)
+are only loaded when the agent that needs them is first used.
 """
 
-from .ai_agent import AiAgent
-from .gemini_agent import GeminiAgent
-from .claude_mcp_agent import ClaudeMcpAgent
+import importlib
+
+# Public name -> submodule that defines it
+_LAZY_EXPORTS = {
+    'AiAgent': '.ai_agent',
+    'message_text': '.ai_agent',
+    'GeminiAgent': '.gemini_agent',
+    'ClaudeMcpAgent': '.claude_mcp_agent',
+    'ResponseCache': '.response_cache',
+}
+
+__all__ = ['AiAgent', 'message_text', 'GeminiAgent', 'ClaudeMcpAgent', 'ResponseCache']
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 
-__all__ = ['AiAgent', 'GeminiAgent', 'ClaudeMcpAgent']
\ No newline at end of file
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -1,8 +1,105 @@
 from abc import ABC, abstractmethod
-from typing import List, Any
+from typing import List, Any, Awaitable, Callable, Dict, Optional, Tuple, AsyncIterator
+import asyncio
+import concurrent.futures
+import threading
 import time
 from langchain_core.tools import BaseTool
-from langchain_core.messages import BaseMessage, ToolMessage
+from langchain_core.messages import BaseMessage, AIMessage, ToolMessage
+from metrics import METRICS, SIZE_BUCKETS
+from prompt_budget import estimate_tokens
+from output_sink import emit
+from .response_cache import ResponseCache
+from .cassette import ReplayModel, encode_message, encode_response, get_cassette, recorded_response
+from .resilience import ProviderGuard, get_provider_guard
+from .client_registry import ProviderClient, acquire_client, release_client
+
+# Default cap on tool-calling rounds before a final answer is forced
+DEFAULT_MAX_TOOL_ROUNDS = 3
+
+# Default time limit for a single tool call
+DEFAULT_TOOL_TIMEOUT_SECONDS = 30.0
+
+# Process-wide thread pool for sync tools, shared by all agents
+TOOL_EXECUTOR_WORKERS = 8
+_tool_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_tool_executor_lock = threading.Lock()
+
+
+def _get_tool_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """Get the shared tool thread pool, creating it on first use."""
+    global _tool_executor
+    if _tool_executor is None:
+        with _tool_executor_lock:
+            if _tool_executor is None:
+                _tool_executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=TOOL_EXECUTOR_WORKERS,
+                    thread_name_prefix="agent-tool"
+                )
+    return _tool_executor
+
+
+def _tool_result_message(tool_call: Dict[str, Any], result: Any) -> ToolMessage:
+    """Build the ToolMessage for a successful tool call."""
+    METRICS.increment("tool_calls_total", tool=tool_call["name"], status="success")
+    return ToolMessage(content=str(result), tool_call_id=tool_call["id"], name=tool_call["name"])
+
+
+def _tool_error_message(tool_call: Dict[str, Any], error: str) -> ToolMessage:
+    """Build the ToolMessage reporting a failed, timed out or unknown tool call."""
+    METRICS.increment("tool_calls_total", tool=tool_call["name"], status="error")
+    return ToolMessage(content=error, tool_call_id=tool_call["id"], name=tool_call["name"], status="error")
+
+
+def _tool_request(tool_call: Dict[str, Any]) -> Dict[str, Any]:
+    """Cassette request of a tool call; results depend on the tool and its arguments only."""
+    return {"tool": tool_call["name"], "args": tool_call["args"]}
+
+
+def _encode_tool_message(message: ToolMessage) -> Dict[str, Any]:
+    """Cassette value of a tool call: the outcome reported to the model, including errors and timeouts."""
+    return {"content": message.content, "status": message.status}
+
+
+def _recorded_tool_message(tool_call: Dict[str, Any], value: Dict[str, Any]) -> ToolMessage:
+    """Rebuild the ToolMessage of a recorded tool call for the current tool call id."""
+    return ToolMessage(content=value["content"], tool_call_id=tool_call["id"], name=tool_call["name"],
+                       status=value["status"])
+
+
+def _request_tokens(guard: ProviderGuard, messages: List[BaseMessage]) -> int:
+    """Estimated prompt tokens of an LLM request, reserved against the provider's token quota (0 without one)."""
+    if not guard.meters_tokens:
+        return 0
+    return sum(estimate_tokens(message_text(message)) for message in messages)
+
+
+def _usage_tokens(response: BaseMessage) -> Optional[int]:
+    """Prompt and response tokens reported by the provider, if any."""
+    usage = getattr(response, "usage_metadata", None)
+    return usage.get("total_tokens") if usage else None
+
+
+def message_text(message: BaseMessage) -> str:
+    """
+    Extract plain text from a message or chunk whose content may be a list of content blocks.
+
+    Args:
+        message: LangChain message or message chunk
+
+    Returns:
+        Concatenated text content
+    """
+    content = message.content
+    if isinstance(content, str):
+        return content
+    parts = []
+    for block in content:
+        if isinstance(block, str):
+            parts.append(block)
+        elif isinstance(block, dict) and block.get("type") == "text":
+            parts.append(block.get("text", ""))
+    return "".join(parts)
 
 
 class AiAgent(ABC):
@@ -11,15 +108,46 @@ class AiAgent(ABC):
     Completely decoupled from State - works only with LangChain messages.
     """
 
-    def __init__(self, tools: List[BaseTool] = None):
+    # Optional response cache shared across agents, attached with set_response_cache()
+    response_cache: Optional[ResponseCache] = None
+
+    # Provider whose shared rate limits, retries and circuit breaker apply to LLM calls, None for none
+    provider: Optional[str] = None
+
+    # Shared provider client backing `self.llm`, None when the agent builds its own
+    provider_client: Optional[ProviderClient] = None
+
+    # Tool settings for subclasses that skip AiAgent.__init__
+    tools_by_name: Dict[str, BaseTool] = {}
+    max_tool_rounds: int = DEFAULT_MAX_TOOL_ROUNDS
+    tool_timeout_seconds: Optional[float] = DEFAULT_TOOL_TIMEOUT_SECONDS
+
+    def __init__(self, tools: List[BaseTool] = None, max_tool_rounds: int = DEFAULT_MAX_TOOL_ROUNDS,
+                 tool_timeout_seconds: Optional[float] = DEFAULT_TOOL_TIMEOUT_SECONDS):
         """
         Initialize the AI agent with tools.
 
         Args:
             tools: List of LangChain tools available to the bot
+            max_tool_rounds: Maximum number of tool-calling rounds before a final answer is forced
+            tool_timeout_seconds: Time limit for each tool call, None for no limit
         """
         self.tools = tools or []
-        self.llm = self._initialize_llm()
+        # Index tools by name once instead of scanning the list for every call
+        self.tools_by_name = {tool.name: tool for tool in self.tools}
+        self.max_tool_rounds = max_tool_rounds
+        self.tool_timeout_seconds = tool_timeout_seconds
+        cassette = get_cassette()
+        client_settings = self._get_client_settings()
+        if cassette and cassette.replaying:
+            # A replayed agent answers from the cassette, so no provider client is built
+            self.llm = ReplayModel()
+        elif client_settings is not None and self.provider:
+            # Agents with identical settings share one client and its connection pool
+            self.provider_client = acquire_client(self.provider, client_settings, self._initialize_llm)
+            self.llm = self.provider_client.client
+        else:
+            self.llm = self._initialize_llm()
 
         # Bind tools to the LLM if tools are provided
         if self.tools:
@@ -30,6 +158,8 @@ class AiAgent(ABC):
     def _process_message_internal(self, message: BaseMessage) -> BaseMessage:
         """
         Default internal message processing logic for LLM-based agents.
+        Runs up to `max_tool_rounds` tool-calling rounds, executing the tool calls
+        of each round concurrently, then forces a final answer without tools.
         Can be overridden by subclasses for custom processing.
 
         Args:
@@ -42,29 +172,330 @@ class AiAgent(ABC):
         messages = [message]
 
         # Get AI response (may contain tool calls)
-        ai_msg = self.llm_with_tools.invoke(messages)
-
-        # If there are tool calls, execute them and get final response
-        if hasattr(ai_msg, 'tool_calls') and ai_msg.tool_calls:
-            # Execute each tool call
-            for tool_call in ai_msg.tool_calls:
-                # Find the tool by name
-                tool = next((t for t in self.tools if t.name == tool_call["name"]), None)
-                if tool:
-                    # Execute the tool
-                    tool_result = tool.invoke(tool_call["args"])
-                    # Create tool message
-                    tool_message = ToolMessage(
-                        content=str(tool_result),
-                        tool_call_id=tool_call["id"]
-                    )
-                    messages.append(tool_message)
-
-            # Get final response after tool execution
-            ai_msg = self.llm_with_tools.invoke(messages)
+        ai_msg = self._invoke_llm(self.llm_with_tools, messages)
+
+        # Execute tool calls and ask again until the model answers or the round cap is hit
+        rounds = 0
+        while getattr(ai_msg, 'tool_calls', None) and rounds < self.max_tool_rounds:
+            messages.append(ai_msg)
+            messages.extend(self._execute_tool_calls(ai_msg.tool_calls))
+            rounds += 1
+            ai_msg = self._invoke_llm(self.llm_with_tools, messages)
+
+        if getattr(ai_msg, 'tool_calls', None):
+            # Round cap reached - get a final answer from the LLM without tools
+            ai_msg = self._invoke_llm(self.llm, messages)
 
         return ai_msg
 
+    async def _aprocess_message_internal(self, message: BaseMessage) -> BaseMessage:
+        """
+        Async counterpart of `_process_message_internal` for LLM-based agents.
+        Uses the LLM's async invoke so the event loop is never blocked.
+        Can be overridden by subclasses for custom processing.
+
+        Args:
+            message: Single LangChain BaseMessage
+
+        Returns:
+            Single BaseMessage response from the agent
+        """
+        # Create message list for LLM processing
+        messages = [message]
+
+        # Get AI response (may contain tool calls)
+        ai_msg = await self._ainvoke_llm(self.llm_with_tools, messages)
+
+        # Execute tool calls and ask again until the model answers or the round cap is hit
+        rounds = 0
+        while getattr(ai_msg, 'tool_calls', None) and rounds < self.max_tool_rounds:
+            messages.append(ai_msg)
+            messages.extend(await self._aexecute_tool_calls(ai_msg.tool_calls))
+            rounds += 1
+            ai_msg = await self._ainvoke_llm(self.llm_with_tools, messages)
+
+        if getattr(ai_msg, 'tool_calls', None):
+            # Round cap reached - get a final answer from the LLM without tools
+            ai_msg = await self._ainvoke_llm(self.llm, messages)
+
+        return ai_msg
+
+    async def _astream_message_internal(self, message: BaseMessage) -> AsyncIterator[str]:
+        """
+        Default streaming logic for LLM-based agents using the LLM's stream API.
+        Tool calls are executed once a stream completes, then the next answer is streamed,
+        for up to `max_tool_rounds` rounds.
+        Can be overridden by subclasses for custom processing.
+
+        Args:
+            message: Single LangChain BaseMessage
+
+        Yields:
+            Text chunks of the response as they arrive
+        """
+        # Create message list for LLM processing
+        messages = [message]
+        rounds = 0
+        final_round = False
+
+        while True:
+            # Stream AI response, accumulating chunks to detect tool calls
+            llm = self.llm if final_round else self.llm_with_tools
+            ai_msg = None
+            async for chunk in self._astream_llm(llm, messages):
+                ai_msg = chunk if ai_msg is None else ai_msg + chunk
+                text = message_text(chunk)
+                if text:
+                    yield text
+            self._record_usage(ai_msg)
+
+            if final_round or ai_msg is None or not getattr(ai_msg, 'tool_calls', None):
+                return
+
+            if rounds >= self.max_tool_rounds:
+                # Round cap reached - stream a final answer from the LLM without tools
+                final_round = True
+                continue
+
+            messages.append(ai_msg)
+            messages.extend(await self._aexecute_tool_calls(ai_msg.tool_calls))
+            rounds += 1
+
+    def _provider_guard(self) -> Optional[ProviderGuard]:
+        """Shared guard of the agent's provider, looked up per call so reconfiguration applies at once."""
+        return get_provider_guard(self.provider) if self.provider else None
+
+    def _cassette_scope(self) -> Dict[str, Any]:
+        """Agent identity in cassette requests, so agents with different model settings keep separate recordings."""
+        return {"agent": self.__class__.__name__, "settings": self._get_model_settings()}
+
+    def _llm_request(self, llm: Any, messages: List[BaseMessage]) -> Dict[str, Any]:
+        """Cassette request of an LLM call: the agent, whether tools are bound and the full conversation."""
+        return {
+            "scope": self._cassette_scope(),
+            "tools": llm is not self.llm,
+            "messages": [encode_message(message) for message in messages]
+        }
+
+    def _timed_call(self, call: Callable[[], Any]) -> Callable[[], Any]:
+        """Wrap one provider call so its latency is recorded on the shared client."""
+        provider_client = self.provider_client
+        if provider_client is None:
+            return call
+
+        def timed():
+            start_time = time.perf_counter()
+            result = call()
+            provider_client.record_call(time.perf_counter() - start_time)
+            return result
+        return timed
+
+    def _atimed_call(self, call: Callable[[], Awaitable[Any]]) -> Callable[[], Awaitable[Any]]:
+        """Async counterpart of `_timed_call`."""
+        provider_client = self.provider_client
+        if provider_client is None:
+            return call
+
+        async def timed():
+            start_time = time.perf_counter()
+            result = await call()
+            provider_client.record_call(time.perf_counter() - start_time)
+            return result
+        return timed
+
+    def _timed_stream(self, open_stream: Callable[[], AsyncIterator[Any]]) -> Callable[[], AsyncIterator[Any]]:
+        """Wrap a stream factory so the time to each stream's first chunk is recorded on the shared client."""
+        provider_client = self.provider_client
+        if provider_client is None:
+            return open_stream
+
+        async def timed():
+            start_time = time.perf_counter()
+            first = True
+            async for chunk in open_stream():
+                if first:
+                    provider_client.record_call(time.perf_counter() - start_time)
+                    first = False
+                yield chunk
+        return timed
+
+    def _invoke_llm(self, llm: Any, messages: List[BaseMessage]) -> BaseMessage:
+        """Invoke an LLM through the provider guard, or the installed cassette, and count its token usage."""
+        guard = self._provider_guard()
+        invoke = self._timed_call(lambda: llm.invoke(messages))
+        if guard is None:
+            call = invoke
+        else:
+            call = lambda: guard.call(invoke, _request_tokens(guard, messages), _usage_tokens)
+        cassette = get_cassette()
+        if cassette is None:
+            ai_msg = call()
+        else:
+            ai_msg = cassette.call("llm", self._llm_request(llm, messages), call, encode_response, recorded_response)
+        self._record_usage(ai_msg)
+        return ai_msg
+
+    async def _ainvoke_llm(self, llm: Any, messages: List[BaseMessage]) -> BaseMessage:
+        """Async counterpart of `_invoke_llm`."""
+        guard = self._provider_guard()
+        ainvoke = self._atimed_call(lambda: llm.ainvoke(messages))
+        if guard is None:
+            call = ainvoke
+        else:
+            call = lambda: guard.acall(ainvoke, _request_tokens(guard, messages), _usage_tokens)
+        cassette = get_cassette()
+        if cassette is None:
+            ai_msg = await call()
+        else:
+            ai_msg = await cassette.acall("llm", self._llm_request(llm, messages), call, encode_response,
+                                          recorded_response)
+        self._record_usage(ai_msg)
+        return ai_msg
+
+    def _astream_llm(self, llm: Any, messages: List[BaseMessage]) -> AsyncIterator[BaseMessage]:
+        """Stream an LLM response through the provider guard, or the installed cassette."""
+        guard = self._provider_guard()
+        astream = self._timed_stream(lambda: llm.astream(messages))
+        if guard is None:
+            open_stream = astream
+        else:
+            open_stream = lambda: guard.astream(astream, _request_tokens(guard, messages))
+        cassette = get_cassette()
+        if cassette is None:
+            return open_stream()
+        return cassette.astream(self._llm_request(llm, messages), open_stream)
+
+    def _execute_tool_calls(self, tool_calls: List[Dict[str, Any]]) -> List[ToolMessage]:
+        """
+        Execute the tool calls of one AI message concurrently on the shared tool thread pool.
+        With a cassette installed, their outcomes are recorded, or replayed without running the tools.
+
+        Args:
+            tool_calls: Tool calls from an AI message
+
+        Returns:
+            One ToolMessage per tool call, in the original order
+        """
+        cassette = get_cassette()
+        if cassette is None:
+            return self._run_tool_calls(tool_calls)
+
+        requests = [_tool_request(tool_call) for tool_call in tool_calls]
+        if cassette.replaying:
+            replies = [cassette.replay("tool", request) for request in requests]
+            # The recorded calls ran concurrently, so the replay waits for the slowest one
+            delay = max((delay for _, delay in replies), default=0.0)
+            if delay:
+                time.sleep(delay)
+            return [_recorded_tool_message(tool_call, value) for tool_call, (value, _) in zip(tool_calls, replies)]
+
+        start_time = time.perf_counter()
+        tool_messages = self._run_tool_calls(tool_calls)
+        seconds = time.perf_counter() - start_time
+        for request, tool_message in zip(requests, tool_messages):
+            cassette.record("tool", request, _encode_tool_message(tool_message), seconds)
+        return tool_messages
+
+    def _run_tool_calls(self, tool_calls: List[Dict[str, Any]]) -> List[ToolMessage]:
+        """Run the tool calls of one AI message concurrently, sharing one deadline."""
+        executor = _get_tool_executor()
+        futures = []
+        for tool_call in tool_calls:
+            tool = self.tools_by_name.get(tool_call["name"])
+            futures.append(executor.submit(tool.invoke, tool_call["args"]) if tool else None)
+
+        # Calls run concurrently, so they share one deadline
+        deadline = time.monotonic() + self.tool_timeout_seconds if self.tool_timeout_seconds else None
+        tool_messages = []
+        for tool_call, future in zip(tool_calls, futures):
+            if future is None:
+                tool_messages.append(_tool_error_message(tool_call, f"Unknown tool '{tool_call['name']}'"))
+                continue
+            try:
+                timeout = max(deadline - time.monotonic(), 0.0) if deadline else None
+                tool_messages.append(_tool_result_message(tool_call, future.result(timeout=timeout)))
+            except concurrent.futures.TimeoutError:
+                future.cancel()
+                tool_messages.append(_tool_error_message(
+                    tool_call, f"Tool '{tool_call['name']}' timed out after {self.tool_timeout_seconds}s"
+                ))
+            except Exception as e:
+                tool_messages.append(_tool_error_message(tool_call, f"Tool '{tool_call['name']}' failed: {e}"))
+        return tool_messages
+
+    async def _aexecute_tool_calls(self, tool_calls: List[Dict[str, Any]]) -> List[ToolMessage]:
+        """
+        Execute the tool calls of one AI message concurrently.
+        Async tools are awaited directly, sync tools run on the shared tool thread pool.
+
+        Args:
+            tool_calls: Tool calls from an AI message
+
+        Returns:
+            One ToolMessage per tool call, in the original order
+        """
+        return list(await asyncio.gather(*(self._aexecute_tool_call(tool_call) for tool_call in tool_calls)))
+
+    async def _aexecute_tool_call(self, tool_call: Dict[str, Any]) -> ToolMessage:
+        """Execute a single tool call, recording or replaying its outcome when a cassette is installed."""
+        cassette = get_cassette()
+        if cassette is None:
+            return await self._arun_tool_call(tool_call)
+        return await cassette.acall("tool", _tool_request(tool_call), lambda: self._arun_tool_call(tool_call),
+                                    _encode_tool_message, lambda value: _recorded_tool_message(tool_call, value))
+
+    async def _arun_tool_call(self, tool_call: Dict[str, Any]) -> ToolMessage:
+        """Run a single tool call with the per-tool timeout."""
+        tool = self.tools_by_name.get(tool_call["name"])
+        if tool is None:
+            return _tool_error_message(tool_call, f"Unknown tool '{tool_call['name']}'")
+
+        if getattr(tool, "coroutine", None) is not None:
+            call = tool.ainvoke(tool_call["args"])
+        else:
+            call = asyncio.get_running_loop().run_in_executor(_get_tool_executor(), tool.invoke, tool_call["args"])
+        try:
+            return _tool_result_message(tool_call, await asyncio.wait_for(call, self.tool_timeout_seconds))
+        except asyncio.TimeoutError:
+            return _tool_error_message(
+                tool_call, f"Tool '{tool_call['name']}' timed out after {self.tool_timeout_seconds}s"
+            )
+        except Exception as e:
+            return _tool_error_message(tool_call, f"Tool '{tool_call['name']}' failed: {e}")
+
+    def cleanup(self):
+        """
+        Release resources held by the agent: its use of a shared provider client, if any.
+        """
+        if self.provider_client is not None:
+            release_client(self.provider_client)
+            self.provider_client = None
+
+    async def awarm_up(self, connections: int = 1) -> bool:
+        """
+        Open the shared provider client's connections before the first real call.
+        Must be awaited on the event loop the agent will be called from.
+
+        Args:
+            connections: Pooled connections to open, e.g. the number of calls expected in flight
+
+        Returns:
+            True if this call warmed the client up, False if there is no shared client or it is already warm
+        """
+        if self.provider_client is None:
+            return False
+        return await self.provider_client.awarm_up(self._awarm_up_client, connections)
+
+    async def _awarm_up_client(self, client: Any):
+        """
+        Send a cheap request with the provider client, e.g. fetching model metadata, so a
+        connection is open. No-op unless overridden by subclasses with a shared client.
+
+        Args:
+            client: The provider client returned by `_initialize_llm`
+        """
+        pass
+
     @abstractmethod
     def _initialize_llm(self) -> Any:
         """
@@ -75,6 +506,120 @@ class AiAgent(ABC):
         """
         pass
 
+    def _get_client_settings(self) -> Optional[Dict[str, Any]]:
+        """
+        Get every setting `_initialize_llm` builds the client with. Agents of a provider returning
+        equal settings share one client through the process-wide registry.
+        Can be overridden by subclasses; the default None gives every agent its own client.
+
+        Returns:
+            Dictionary of client settings, or None
+        """
+        return None
+
+    def set_response_cache(self, response_cache: Optional[ResponseCache]):
+        """
+        Attach a response cache to this agent, or detach it with None.
+
+        Args:
+            response_cache: Cache consulted before calling the model
+        """
+        self.response_cache = response_cache
+
+    def _get_model_settings(self) -> Dict[str, Any]:
+        """
+        Get the settings that influence the agent's responses, used in cache keys.
+        Can be overridden by subclasses that are not backed by `self.llm`.
+
+        Returns:
+            Dictionary of model settings
+        """
+        return {
+            "model": getattr(self.llm, "model", None) or getattr(self.llm, "model_name", None),
+            "temperature": getattr(self.llm, "temperature", None),
+            "tools": sorted(tool.name for tool in self.tools)
+        }
+
+    def _is_cacheable(self, response: BaseMessage) -> bool:
+        """
+        Decide whether a response may be stored in the response cache.
+        Can be overridden by subclasses that report failures as messages.
+
+        Args:
+            response: Response returned by the agent
+
+        Returns:
+            True if the response can be cached
+        """
+        return True
+
+    def _get_cached_response(self, message: BaseMessage) -> Tuple[Optional[str], Optional[BaseMessage]]:
+        """
+        Look up a message in the response cache.
+
+        Args:
+            message: Message about to be processed
+
+        Returns:
+            Tuple of (cache key, cached response); both None when caching is disabled
+        """
+        if not self.response_cache:
+            return None, None
+        cache_key = ResponseCache.build_key(self.__class__.__name__, self._get_model_settings(), message)
+        cached = self.response_cache.get(cache_key)
+        METRICS.increment("agent_cache_lookups_total", agent=self.__class__.__name__,
+                          result="miss" if cached is None else "hit")
+        return cache_key, cached
+
+    def _store_cached_response(self, cache_key: Optional[str], response: BaseMessage):
+        """Store a fresh response in the response cache when caching is enabled."""
+        if cache_key and self.response_cache and self._is_cacheable(response):
+            self.response_cache.put(cache_key, response)
+
+    async def _aget_cached_response(self, message: BaseMessage) -> Tuple[Optional[str], Optional[BaseMessage]]:
+        """`_get_cached_response` for the async path; the SQLite lookup runs in a worker thread."""
+        if not self.response_cache:
+            return None, None
+        return await asyncio.to_thread(self._get_cached_response, message)
+
+    async def _astore_cached_response(self, cache_key: Optional[str], response: BaseMessage):
+        """`_store_cached_response` for the async path; the SQLite write and commit run in a worker thread."""
+        if cache_key and self.response_cache:
+            await asyncio.to_thread(self._store_cached_response, cache_key, response)
+
+    def _record_usage(self, response: Optional[BaseMessage]):
+        """Count the tokens of one LLM call when the provider reports usage metadata."""
+        usage = getattr(response, "usage_metadata", None)
+        if not usage:
+            return
+        agent_name = self.__class__.__name__
+        METRICS.increment("agent_tokens_total", usage.get("input_tokens", 0), agent=agent_name, kind="input")
+        METRICS.increment("agent_tokens_total", usage.get("output_tokens", 0), agent=agent_name, kind="output")
+
+    def _report_processing(self, message: BaseMessage, response_text: str, seconds: float, cached: bool,
+                           first_token_seconds: Optional[float] = None, streamed: bool = False):
+        """
+        Record latency and size metrics for one processed message and report the processing time.
+
+        Args:
+            message: Message sent to the agent
+            response_text: Text of the agent's response
+            seconds: Total processing time
+            cached: Whether the response came from the response cache
+            first_token_seconds: Time to first streamed token, if streaming
+            streamed: Whether the response was streamed
+        """
+        agent_name = self.__class__.__name__
+        cache_label = "hit" if cached else "miss"
+        METRICS.observe("agent_latency_seconds", seconds, agent=agent_name, cache=cache_label)
+        METRICS.observe("agent_prompt_chars", len(message_text(message)), SIZE_BUCKETS, agent=agent_name)
+        METRICS.observe("agent_response_chars", len(response_text), SIZE_BUCKETS, agent=agent_name)
+        if first_token_seconds is not None:
+            METRICS.observe("agent_first_token_seconds", first_token_seconds, agent=agent_name)
+
+        emit("agent_timing", agent=agent_name, seconds=round(seconds, 3), cached=cached, streamed=streamed,
+             first_token_seconds=first_token_seconds)
+
     def process_message(self, message: BaseMessage) -> BaseMessage:
         """
         Process a single message and return the agent's response with timing measurement.
@@ -86,8 +631,61 @@ class AiAgent(ABC):
             Single BaseMessage response from the agent
         """
         start_time = time.perf_counter()
-        result = self._process_message_internal(message)
-        end_time = time.perf_counter()
-        print(f"⏱️  {self.__class__.__name__} processing time: {end_time - start_time:.2f}s")
+        cache_key, result = self._get_cached_response(message)
+        cached = result is not None
+        if not cached:
+            result = self._process_message_internal(message)
+            self._store_cached_response(cache_key, result)
+        self._report_processing(message, message_text(result), time.perf_counter() - start_time, cached)
+        return result
+
+    async def aprocess_message(self, message: BaseMessage) -> BaseMessage:
+        """
+        Async version of `process_message` with the same timing measurement.
+
+        Args:
+            message: Single LangChain BaseMessage
+
+        Returns:
+            Single BaseMessage response from the agent
+        """
+        start_time = time.perf_counter()
+        cache_key, result = await self._aget_cached_response(message)
+        cached = result is not None
+        if not cached:
+            result = await self._aprocess_message_internal(message)
+            await self._astore_cached_response(cache_key, result)
+        self._report_processing(message, message_text(result), time.perf_counter() - start_time, cached)
         return result
 
+    async def astream_message(self, message: BaseMessage) -> AsyncIterator[str]:
+        """
+        Process a single message and yield the response text as it is generated.
+        Reports time to first token next to the total processing time.
+
+        Args:
+            message: Single LangChain BaseMessage
+
+        Yields:
+            Text chunks of the response
+        """
+        start_time = time.perf_counter()
+        cache_key, cached = await self._aget_cached_response(message)
+        if cached is not None:
+            cached_text = message_text(cached)
+            yield cached_text
+            self._report_processing(message, cached_text, time.perf_counter() - start_time, True, streamed=True)
+            return
+
+        first_token_time = None
+        chunks = []
+        async for text in self._astream_message_internal(message):
+            if first_token_time is None:
+                first_token_time = time.perf_counter() - start_time
+            chunks.append(text)
+            yield text
+
+        response_text = "".join(chunks)
+        await self._astore_cached_response(cache_key, AIMessage(content=response_text))
+        self._report_processing(message, response_text, time.perf_counter() - start_time, False,
+                                first_token_seconds=first_token_time, streamed=True)
@@ -0,0 +1,413 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from langchain_core.messages import AIMessage, BaseMessage, message_chunk_to_message, message_to_dict, messages_from_dict
+from output_sink import CURRENT_RUN_ID
+
+# Format version written in the header line of every cassette file
+CASSETTE_VERSION = 1
+
+# Replay latency: sleep as long as the recorded call took, or answer at once
+LATENCY_MODES = ("original", "zero")
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode for a call the cassette holds no recording of."""
+
+
+class ReplayModel:
+    """
+    Stand-in for an agent's LLM client while a cassette is replayed, so no provider client
+    (API key, connection pool) is needed. Calls never reach it.
+    """
+
+    def __init__(self, tools: Tuple[str, ...] = ()):
+        self.tools = tools
+
+    def bind_tools(self, tools: List[Any]) -> "ReplayModel":
+        return ReplayModel(tuple(tool.name for tool in tools))
+
+
+def encode_message(message: BaseMessage) -> Dict[str, Any]:
+    """Serialize a message or chunk for a cassette entry."""
+    return message_to_dict(message)
+
+
+def decode_message(data: Dict[str, Any]) -> BaseMessage:
+    """Deserialize a message or chunk written by `encode_message`."""
+    return messages_from_dict([data])[0]
+
+
+def encode_response(message: BaseMessage) -> Dict[str, Any]:
+    """Serialize a complete LLM response for a cassette entry."""
+    return {"message": encode_message(message)}
+
+
+def recorded_response(value: Dict[str, Any]) -> BaseMessage:
+    """
+    Rebuild the complete LLM response of an entry recorded from `invoke` or from a stream.
+
+    Args:
+        value: Recorded value, `{"message": ...}` or `{"chunks": [{"t": ..., "message": ...}]}`
+
+    Returns:
+        The response message; the chunks of a recorded stream are merged
+    """
+    if "message" in value:
+        return decode_message(value["message"])
+    merged = None
+    for chunk in value["chunks"]:
+        message = decode_message(chunk["message"])
+        merged = message if merged is None else merged + message
+    return message_chunk_to_message(merged) if merged is not None else AIMessage(content="")
+
+
+class Cassette:
+    """
+    Append-only recording of agent calls for offline replay.
+
+    Every finished call is appended as one compact JSON line to the data file, keyed by a
+    hash of its request and tagged with the run it belonged to, and its offset is appended
+    to an index file next to it (`.idx`). Replay loads only the index and reads an entry
+    when its call comes up. A request recorded several times with different responses
+    (a tool result with a timestamp, a resampled critique) is answered with the next unused
+    recording of the same run id, so replaying the same asks under the same run ids
+    reproduces each run regardless of scheduling; otherwise recordings are used in order,
+    and once they run out the last one keeps answering. An index that lags behind the data
+    file, e.g. after a crash, is completed by scanning the rest of the data file.
+    """
+
+    def __init__(self, path: str, mode: str = "record", latency: str = "original"):
+        """
+        Open a cassette file.
+
+        Args:
+            path: Data file; the index is written to `path + ".idx"`
+            mode: "record" to append calls, "replay" to answer calls from the recordings
+            latency: Replay latency, "original" or "zero"
+
+        Raises:
+            ValueError: If the mode or latency is unknown, or the file is not a cassette of this version
+            FileNotFoundError: If a cassette to replay does not exist
+        """
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode '{mode}'")
+        if latency not in LATENCY_MODES:
+            raise ValueError(f"Unknown replay latency '{latency}', expected one of {', '.join(LATENCY_MODES)}")
+        self.path = path
+        self.index_path = path + ".idx"
+        self.mode = mode
+        self.latency = latency
+        self._lock = threading.Lock()
+        # Request key -> (offset, length, run tag) of every recording, in recording order
+        self._index: Dict[str, List[Tuple[int, int, str]]] = {}
+        self._used: Dict[str, Set[int]] = {}
+        self._index_file = None
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+
+        if self.recording:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._data = open(path, "a+b")
+            if self._data.seek(0, os.SEEK_END) == 0:
+                self._data.write(json.dumps({"cassette": CASSETTE_VERSION}).encode("utf-8") + b"\n")
+                self._data.flush()
+                # A stale index of a removed data file would point into the new one
+                open(self.index_path, "wb").close()
+            else:
+                self._check_header()
+                self._data.seek(-1, os.SEEK_END)
+                if self._data.read(1) != b"\n":
+                    # Terminate a line cut short by a crash so it is skipped, not joined to the next entry
+                    self._data.write(b"\n")
+                    self._data.flush()
+                if self._load_index():
+                    self._write_index()
+            self._index_file = open(self.index_path, "ab")
+        else:
+            self._data = open(path, "rb")
+            self._check_header()
+            self._load_index()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    @staticmethod
+    def _run_tag(run_id: Optional[str]) -> str:
+        """Short index tag of a run id, '-' for calls made outside a run."""
+        if run_id is None:
+            return "-"
+        return hashlib.sha256(str(run_id).encode("utf-8")).hexdigest()[:12]
+
+    def _check_header(self):
+        """Verify the header line of an existing data file."""
+        self._data.seek(0)
+        try:
+            header = json.loads(self._data.readline())
+        except json.JSONDecodeError:
+            header = None
+        if not isinstance(header, dict) or header.get("cassette") != CASSETTE_VERSION:
+            raise ValueError(f"{self.path} is not a version {CASSETTE_VERSION} cassette")
+
+    def _load_index(self) -> int:
+        """
+        Load the index file, then index the data lines it does not cover yet.
+
+        Returns:
+            Number of entries that were missing from the index file
+        """
+        covered = 0
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "rb") as index_file:
+                for line in index_file:
+                    parts = line.decode("ascii", "replace").split()
+                    if len(parts) != 4 or not line.endswith(b"\n"):
+                        # A line cut short by a crash; the data scan below covers its entry
+                        break
+                    key, offset, length, tag = parts[0], int(parts[1]), int(parts[2]), parts[3]
+                    self._index.setdefault(key, []).append((offset, length, tag))
+                    covered = max(covered, offset + length)
+
+        self._data.seek(0)
+        self._data.readline()
+        offset = max(covered, self._data.tell())
+        self._data.seek(offset)
+        missing = 0
+        for line in self._data:
+            if line.endswith(b"\n"):
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    entry = None
+                if isinstance(entry, dict) and entry.get("k"):
+                    self._index.setdefault(entry["k"], []).append((offset, len(line), self._run_tag(entry.get("r"))))
+                    missing += 1
+            offset += len(line)
+        return missing
+
+    def _write_index(self):
+        """Rewrite the index file from the loaded index, in data file order."""
+        entries = sorted((offset, length, tag, key)
+                         for key, positions in self._index.items() for offset, length, tag in positions)
+        with open(self.index_path, "wb") as index_file:
+            index_file.write(b"".join(f"{key} {offset} {length} {tag}\n".encode("ascii")
+                                      for offset, length, tag, key in entries))
+
+    @staticmethod
+    def request_key(kind: str, request: Dict[str, Any]) -> str:
+        """
+        Build the key of a request.
+
+        Args:
+            kind: Call kind, e.g. "llm", "tool" or "mcp_task"
+            request: JSON-serializable description of everything the response depends on
+
+        Returns:
+            Hex digest identifying the request
+        """
+        payload = json.dumps({"kind": kind, "request": request}, sort_keys=True, default=str, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+    def record(self, kind: str, request: Dict[str, Any], value: Any, seconds: float, run_id: Optional[str] = None):
+        """
+        Append a finished call.
+
+        Args:
+            kind: Call kind
+            request: Request the call answered
+            value: JSON-serializable response
+            seconds: Time the call took
+            run_id: Run the call belonged to, None for an untagged recording
+        """
+        key = self.request_key(kind, request)
+        entry = {"k": key, "kind": kind, "s": round(seconds, 4), "v": value}
+        if run_id is not None:
+            entry["r"] = run_id
+        line = json.dumps(entry, ensure_ascii=False, default=str, separators=(",", ":")).encode("utf-8") + b"\n"
+        tag = self._run_tag(run_id)
+        with self._lock:
+            if self._data is None:
+                return
+            offset = self._data.seek(0, os.SEEK_END)
+            self._data.write(line)
+            self._data.flush()
+            self._index_file.write(f"{key} {offset} {len(line)} {tag}\n".encode("ascii"))
+            self._index_file.flush()
+            self._index.setdefault(key, []).append((offset, len(line), tag))
+            self.recorded += 1
+
+    def replay(self, kind: str, request: Dict[str, Any], run_id: Optional[str] = None) -> Tuple[Any, float]:
+        """
+        Look up the recording that answers a request.
+
+        Args:
+            kind: Call kind
+            request: Request to answer
+            run_id: Run making the call; its own recordings are preferred
+
+        Returns:
+            Tuple of (recorded response, seconds to wait before answering)
+
+        Raises:
+            CassetteMissError: If the request was never recorded
+        """
+        key = self.request_key(kind, request)
+        tag = self._run_tag(run_id)
+        with self._lock:
+            positions = self._index.get(key)
+            if not positions:
+                self.misses += 1
+                raise CassetteMissError(f"No recorded {kind} call for this request in {self.path}")
+            used = self._used.setdefault(key, set())
+            unused = [position for position in range(len(positions)) if position not in used]
+            position = next((position for position in unused if positions[position][2] == tag),
+                            unused[0] if unused else len(positions) - 1)
+            used.add(position)
+            offset, length, _ = positions[position]
+            self._data.seek(offset)
+            entry = json.loads(self._data.read(length))
+            self.replayed += 1
+        return entry["v"], entry["s"] if self.latency == "original" else 0.0
+
+    def call(self, kind: str, request: Dict[str, Any], call: Callable[[], Any],
+             encode: Callable[[Any], Any] = lambda value: value,
+             decode: Callable[[Any], Any] = lambda value: value) -> Any:
+        """
+        Make a call and record it, or answer it from the recordings when replaying.
+        The call is tagged with the run id of the current context.
+
+        Args:
+            kind: Call kind
+            request: Request the call answers, used as the key
+            call: Makes the real call; never invoked when replaying
+            encode: Converts the result into a JSON-serializable value
+            decode: Converts a recorded value back into a result
+
+        Returns:
+            The call result
+        """
+        run_id = CURRENT_RUN_ID.get()
+        if self.replaying:
+            value, delay = self.replay(kind, request, run_id)
+            if delay:
+                time.sleep(delay)
+            return decode(value)
+        start_time = time.perf_counter()
+        result = call()
+        self.record(kind, request, encode(result), time.perf_counter() - start_time, run_id)
+        return result
+
+    async def acall(self, kind: str, request: Dict[str, Any], call: Callable[[], Awaitable[Any]],
+                    encode: Callable[[Any], Any] = lambda value: value,
+                    decode: Callable[[Any], Any] = lambda value: value) -> Any:
+        """Async counterpart of `call`, awaiting the call and the replay latency."""
+        run_id = CURRENT_RUN_ID.get()
+        if self.replaying:
+            value, delay = self.replay(kind, request, run_id)
+            if delay:
+                await asyncio.sleep(delay)
+            return decode(value)
+        start_time = time.perf_counter()
+        result = await call()
+        self.record(kind, request, encode(result), time.perf_counter() - start_time, run_id)
+        return result
+
+    async def astream(self, request: Dict[str, Any],
+                      open_stream: Callable[[], AsyncIterator[BaseMessage]]) -> AsyncIterator[BaseMessage]:
+        """
+        Stream an LLM response and record its chunks with their timing, or replay them.
+        A recorded `invoke` response is replayed as a single chunk.
+
+        Args:
+            request: Request the stream answers, used as the key
+            open_stream: Opens the real stream; never invoked when replaying
+
+        Yields:
+            Response chunks
+        """
+        run_id = CURRENT_RUN_ID.get()
+        if self.replaying:
+            value, delay = self.replay("llm", request, run_id)
+            if "message" in value:
+                if delay:
+                    await asyncio.sleep(delay)
+                yield decode_message(value["message"])
+                return
+            elapsed = 0.0
+            for chunk in value["chunks"]:
+                if delay and chunk["t"] > elapsed:
+                    await asyncio.sleep(chunk["t"] - elapsed)
+                    elapsed = chunk["t"]
+                yield decode_message(chunk["message"])
+            return
+
+        start_time = time.perf_counter()
+        chunks = []
+        async for chunk in open_stream():
+            chunks.append({"t": round(time.perf_counter() - start_time, 4), "message": encode_message(chunk)})
+            yield chunk
+        self.record("llm", request, {"chunks": chunks}, time.perf_counter() - start_time, run_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cassette counters.
+
+        Returns:
+            Dictionary with the mode, path, recorded and replayed calls, replay misses and distinct requests
+        """
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "path": self.path,
+                "recorded": self.recorded,
+                "replayed": self.replayed,
+                "misses": self.misses,
+                "requests": len(self._index)
+            }
+
+    def close(self):
+        """Close the data and index files."""
+        with self._lock:
+            if self._data is not None:
+                self._data.close()
+                self._data = None
+            if self._index_file is not None:
+                self._index_file.close()
+                self._index_file = None
+
+
+_cassette: Optional[Cassette] = None
+
+
+def set_cassette(cassette: Optional[Cassette]) -> Optional[Cassette]:
+    """
+    Install the process-wide cassette used by every agent, closing the previous one.
+
+    Args:
+        cassette: Cassette to record to or replay from, None to call providers directly
+
+    Returns:
+        The installed cassette
+    """
+    global _cassette
+    previous, _cassette = _cassette, cassette
+    if previous is not None and previous is not cassette:
+        previous.close()
+    return cassette
+
+
+def get_cassette() -> Optional[Cassette]:
+    """Get the process-wide cassette, None when agents call providers directly."""
+    return _cassette
@@ -1,10 +1,31 @@
 import asyncio
 import json
-from typing import List, Any
+import threading
+import time
+from typing import List, Any, Dict, Optional, AsyncIterator
 from langchain_core.tools import BaseTool
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
-from mcp_use.client import MCPClient
+from metrics import METRICS
+from output_sink import CURRENT_RUN_ID, notice
+from prompt_budget import estimate_tokens
 from .ai_agent import AiAgent
+from .cassette import get_cassette
+from .mcp_batcher import McpCallBatcher, build_batch_prompt, split_batch_response
+from .mcp_session_pool import McpSessionPool, McpPoolBusyError
+from .resilience import ProviderError
+
+# Default STDIO command used to reach the Claude Code MCP server
+DEFAULT_MCP_SERVER = {
+    "command": "claude",
+    "args": ["mcp", "serve"]
+}
+
+# Subagent used by the Task tool for every query
+TASK_SUBAGENT_TYPE = "general-purpose"
+
+
+class McpCallError(ProviderError):
+    """Failed Claude MCP call, raised instead of being returned as the critique text."""
 
 
 class ClaudeMcpAgent(AiAgent):
@@ -13,22 +34,45 @@ class ClaudeMcpAgent(AiAgent):
     This enables account-based authentication without requiring API keys.
     """
 
-    def __init__(self, tools: List[BaseTool] = None):
+    provider = "claude"
+
+    def __init__(self, tools: List[BaseTool] = None, server_config: Optional[Dict[str, Any]] = None,
+                 pool_size: int = 1, max_waiters: Optional[int] = None, acquire_timeout: Optional[float] = None,
+                 batch_size: int = 1, batch_window_seconds: float = 0.05):
         """
         Initialize the Claude MCP agent.
 
         Args:
             tools: List of LangChain tools available to the agent (ignored)
+            server_config: STDIO server definition (command/args), defaults to `claude mcp serve`
+            pool_size: Number of MCP sessions (server subprocesses) used for parallel critiques
+            max_waiters: Maximum number of critiques queued for a busy pool, None for unbounded
+            acquire_timeout: Seconds a critique may wait for a free session, None to wait indefinitely
+            batch_size: Concurrent critiques sent in one Task call, 1 to send every critique on its own
+            batch_window_seconds: Time a critique waits for others to join its batch
         """
-        self.mcp_client = None
-        self.session = None
+        self.session_pool = None
         self.cached_tools = None
         self.task_tool = None
+        self.server_config = server_config or DEFAULT_MCP_SERVER
+        self.pool_size = pool_size
+        self.max_waiters = max_waiters
+        self.acquire_timeout = acquire_timeout
+        cassette = get_cassette()
+        # Replayed critiques come from the cassette, one per query, without an MCP server
+        self.replaying = bool(cassette and cassette.replaying)
+        self.batcher = None
+        if batch_size > 1 and not self.replaying:
+            self.batcher = McpCallBatcher(self._send_one, self._send_batch, batch_window_seconds, batch_size)
+        self._loop = None
+        self._loop_thread = None
         # Skip the parent __init__ to avoid LLM initialization
         # Ignore tools parameter - we don't use them for MCP communication
-        self._initialize_mcp_client()
-        # Create session and cache tools during initialization
-        asyncio.run(self._initialize_session_and_tools())
+        self._start_event_loop()
+        if not self.replaying:
+            self._initialize_mcp_client()
+            # Create session and cache tools during initialization
+            self._run_coroutine(self._initialize_session_and_tools())
 
     def _initialize_llm(self) -> Any:
         """
@@ -36,92 +80,291 @@ class ClaudeMcpAgent(AiAgent):
         """
         return None
 
-    def _initialize_mcp_client(self):
-        """Initialize MCP client to connect to Claude Code server."""
-        try:
-            # Configure MCP client to connect to Claude Code server via STDIO
-            config = {
-                "mcpServers": {
-                    "claude_code": {
-                        "command": "claude",
-                        "args": ["mcp", "serve"]
-                    }
-                }
-            }
+    def _start_event_loop(self):
+        """
+        Start the event loop owned by this agent for its whole lifetime.
+        The MCP session is bound to the loop it was created on, so every
+        MCP call is submitted to this loop instead of a fresh asyncio.run().
+        """
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(
+            target=self._loop.run_forever,
+            name=f"{self.__class__.__name__}-loop",
+            daemon=True
+        )
+        self._loop_thread.start()
+
+    def _run_coroutine(self, coroutine) -> Any:
+        """
+        Run a coroutine on the agent's event loop and block until it completes.
+
+        Args:
+            coroutine: Coroutine to execute
 
-            self.mcp_client = MCPClient.from_dict(config)
+        Returns:
+            The coroutine result
+        """
+        if not self._loop or self._loop.is_closed():
+            coroutine.close()
+            raise RuntimeError("MCP event loop is not running")
+        future = asyncio.run_coroutine_threadsafe(self._in_caller_run(coroutine), self._loop)
+        return future.result()
+
+    async def _await_coroutine(self, coroutine) -> Any:
+        """
+        Await a coroutine on the agent's event loop from any other event loop.
+        The caller's loop stays free while the MCP call runs, and cancelling
+        the caller also cancels the MCP call.
+
+        Args:
+            coroutine: Coroutine to execute
 
+        Returns:
+            The coroutine result
+        """
+        if not self._loop or self._loop.is_closed():
+            coroutine.close()
+            raise RuntimeError("MCP event loop is not running")
+        if asyncio.get_running_loop() is self._loop:
+            return await coroutine
+        future = asyncio.run_coroutine_threadsafe(self._in_caller_run(coroutine), self._loop)
+        return await asyncio.wrap_future(future)
+
+    @staticmethod
+    def _in_caller_run(coroutine):
+        """
+        Wrap a coroutine so it runs on the agent's loop under the caller's run id,
+        which tags its cassette entries. Must be called on the caller's side.
+        """
+        run_id = CURRENT_RUN_ID.get()
+
+        async def run():
+            CURRENT_RUN_ID.set(run_id)
+            return await coroutine
+
+        return run()
+
+    def _stop_event_loop(self):
+        """Stop the agent's event loop and wait for its thread to exit."""
+        if not self._loop or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._loop_thread and self._loop_thread is not threading.current_thread():
+            self._loop_thread.join(timeout=5)
+        if not self._loop.is_running():
+            self._loop.close()
+        self._loop = None
+        self._loop_thread = None
+
+    def _get_model_settings(self) -> Dict[str, Any]:
+        """
+        Settings that influence Claude's responses, used in cache keys.
+        """
+        return {
+            "server": self.server_config,
+            "subagent_type": TASK_SUBAGENT_TYPE
+        }
+
+    def _initialize_mcp_client(self):
+        """Initialize the pool of MCP clients connecting to Claude Code server via STDIO."""
+        try:
+            self.session_pool = McpSessionPool(
+                self.server_config,
+                size=self.pool_size,
+                max_waiters=self.max_waiters,
+                acquire_timeout=self.acquire_timeout
+            )
         except Exception as e:
-            print(f"Warning: Could not initialize MCP client: {e}")
+            notice(f"Warning: Could not initialize MCP client: {e}")
 
     async def _initialize_session_and_tools(self):
-        """Initialize session and cache tools during construction."""
+        """Start the pooled sessions and cache tools during construction."""
         try:
-            if self.mcp_client:
-                # Create session once
-                await self.mcp_client.create_all_sessions()
-                sessions = self.mcp_client.sessions
-                if sessions:
-                    session_name = list(sessions.keys())[0]
-                    self.session = self.mcp_client.get_session(session_name)
-
-                    # Cache tools once
-                    self.cached_tools = await self.session.list_tools()
-                    self.task_tool = next((tool for tool in self.cached_tools if tool.name == 'Task'), None)
-
-                    print(f"MCP session initialized with {len(self.cached_tools)} tools")
-                else:
-                    print("Warning: No MCP sessions available")
+            if self.session_pool:
+                # Create sessions once
+                await self.session_pool.start()
+
+                # Cache tools once
+                self.cached_tools = self.session_pool.tools
+                self.task_tool = next((tool for tool in self.cached_tools if tool.name == 'Task'), None)
+
+                notice(f"MCP session pool initialized with {self.pool_size} sessions "
+                       f"and {len(self.cached_tools)} tools")
         except Exception as e:
-            print(f"Warning: Could not initialize MCP session and tools: {e}")
+            notice(f"Warning: Could not initialize MCP session and tools: {e}")
 
     def _process_message_internal(self, message: BaseMessage) -> BaseMessage:
         """
         Process a single message using Claude via MCP.
-        Overrides the parent method to use MCP instead of LLM.
+        Overrides the parent method to use MCP instead of LLM. The call goes through
+        the shared Claude provider guard (rate limits, retries, circuit breaker).
 
         Args:
             message: Single LangChain BaseMessage
 
         Returns:
             Single BaseMessage response from Claude
+
+        Raises:
+            McpCallError: If the MCP call still fails after retries
         """
-        try:
-            # Extract content from the message
-            query = message.content if hasattr(message, 'content') else str(message)
+        # Extract content from the message
+        query = message.content if hasattr(message, 'content') else str(message)
+        if self.replaying:
+            # Replayed critiques spend no quota and are never retried
+            return AIMessage(content=self._run_coroutine(self._call_claude_mcp(query)))
+        if not self.session_pool:
+            raise McpCallError("Could not initialize MCP client", retryable=False)
+
+        if self.batcher:
+            # Batches are sent from the agent's loop, each under the provider guard
+            return AIMessage(content=self._run_coroutine(self.batcher.submit(query)))
+        response_content = self._provider_guard().call(
+            lambda: self._run_coroutine(self._call_claude_mcp(query)),
+            estimate_tokens(query),
+            lambda response: estimate_tokens(query) + estimate_tokens(response)
+        )
+        return AIMessage(content=response_content)
+
+    async def _aprocess_message_internal(self, message: BaseMessage) -> BaseMessage:
+        """
+        Async version of `_process_message_internal` that awaits the MCP call directly.
+
+        Args:
+            message: Single LangChain BaseMessage
 
-            # Try to call Claude via MCP
-            if self.mcp_client:
-                try:
-                    response_content = asyncio.run(self._call_claude_mcp(query))
-                except Exception as e:
-                    response_content = f"Claude (via MCP): MCP call failed: {str(e)}"
-            else:
-                response_content = f"Claude (via MCP): Could not initialize MCP client."
+        Returns:
+            Single BaseMessage response from Claude
 
-            return AIMessage(content=response_content)
+        Raises:
+            McpCallError: If the MCP call still fails after retries
+        """
+        # Extract content from the message
+        query = message.content if hasattr(message, 'content') else str(message)
+        if self.replaying:
+            return AIMessage(content=await self._await_coroutine(self._call_claude_mcp(query)))
+        if not self.session_pool:
+            raise McpCallError("Could not initialize MCP client", retryable=False)
+
+        if self.batcher:
+            return AIMessage(content=await self._await_coroutine(self.batcher.submit(query)))
+        response_content = await self._provider_guard().acall(
+            lambda: self._await_coroutine(self._call_claude_mcp(query)),
+            estimate_tokens(query),
+            lambda response: estimate_tokens(query) + estimate_tokens(response)
+        )
+        return AIMessage(content=response_content)
+
+    async def _astream_message_internal(self, message: BaseMessage) -> AsyncIterator[str]:
+        """
+        The MCP Task tool does not stream, so the whole critique is yielded as one chunk.
+        """
+        response = await self._aprocess_message_internal(message)
+        yield response.content
+
+    async def _send_one(self, query: str) -> str:
+        """Send a single critique of a batcher under the provider guard; runs on the agent's loop."""
+        return await self._provider_guard().acall(
+            lambda: self._call_claude_mcp(query),
+            estimate_tokens(query),
+            lambda response: estimate_tokens(query) + estimate_tokens(response)
+        )
+
+    async def _send_batch(self, queries: List[str]) -> List[Optional[str]]:
+        """
+        Send several critiques in one Task call under the provider guard; runs on the agent's loop.
+        The batch counts as one request against the rate limits and reserves the tokens of its prompt.
 
-        except Exception as e:
-            return AIMessage(content=f"Claude MCP Error: {str(e)}")
+        Args:
+            queries: Critique instructions of the waiting callers
+
+        Returns:
+            Response of every query in order, None where the batched answer could not be parsed
+        """
+        ids, prompt = build_batch_prompt(queries)
+        return await self._provider_guard().acall(
+            lambda: self._call_claude_mcp_batch(queries, ids, prompt),
+            estimate_tokens(prompt),
+            lambda answers: estimate_tokens(prompt) + sum(estimate_tokens(answer or "") for answer in answers)
+        )
 
     async def _call_claude_mcp(self, query: str) -> str:
         """
         Call Claude through MCP protocol.
         Sends a query to Claude via the MCP client and returns the response.
+
+        Raises:
+            McpCallError: If the session is not initialized or the Task tool call failed
         """
-        if not self.session:
-            raise RuntimeError("MCP session not initialized")
+        readable_content = await self._call_task(query)
+        return f"Claude (via MCP): {readable_content}"
+
+    async def _call_claude_mcp_batch(self, queries: List[str], ids: List[str], prompt: str) -> List[Optional[str]]:
+        """
+        Call Claude once with a batched prompt and split the response per request id.
+        With a cassette recording, every answer is recorded as the Task result of its own query,
+        so a replay serves it whichever batches the critiques form.
+
+        Args:
+            queries: Queries of the batch
+            ids: Request ids in query order
+            prompt: Prompt built by `build_batch_prompt`
+
+        Returns:
+            Response of every request in order, None where no answer block was found
+
+        Raises:
+            McpCallError: If the session is not initialized or the Task tool call failed
+        """
+        start_time = time.perf_counter()
+        readable_content = await self._run_task(prompt)
+        answers = split_batch_response(readable_content, ids)
+        cassette = get_cassette()
+        if cassette is not None and cassette.recording:
+            seconds = time.perf_counter() - start_time
+            for query, answer in zip(queries, answers):
+                if answer is not None:
+                    cassette.record("mcp_task", self._task_request(query), answer, seconds)
+        return [f"Claude (via MCP): {answer}" if answer is not None else None for answer in answers]
+
+    def _task_request(self, prompt: str) -> Dict[str, Any]:
+        """Cassette request of a Task call: the agent and server settings and the prompt."""
+        return {"scope": self._cassette_scope(), "prompt": prompt}
+
+    async def _call_task(self, prompt: str) -> str:
+        """
+        Run one Task tool call, recording or replaying its result when a cassette is installed.
+
+        Raises:
+            McpCallError: If the session is not initialized or the Task tool call failed
+            CassetteMissError: If a replayed cassette holds no result for the prompt
+        """
+        cassette = get_cassette()
+        if cassette is None:
+            return await self._run_task(prompt)
+        return await cassette.acall("mcp_task", self._task_request(prompt), lambda: self._run_task(prompt))
+
+    async def _run_task(self, prompt: str) -> str:
+        """
+        Run one Task tool call and extract the readable response text.
+
+        Raises:
+            McpCallError: If the session is not initialized or the Task tool call failed
+        """
+        if not self.cached_tools:
+            raise McpCallError("MCP session not initialized", retryable=False)
 
         try:
             # Execute the Task tool using cached session and tools
-            response_text = await self._execute_task_tool(query)
-
-            # Extract readable content from JSON response
-            readable_content = self._extract_readable_content(response_text)
-            return f"Claude (via MCP): {readable_content}"
+            response_text = await self._execute_task_tool(prompt)
+        except Exception:
+            METRICS.increment("mcp_task_calls_total", status="error")
+            raise
 
-        except Exception as e:
-            return f"Claude (via MCP): Error - {str(e)}"
+        # Extract readable content from JSON response
+        readable_content = self._extract_readable_content(response_text)
+        METRICS.increment("mcp_task_calls_total", status="success")
+        return readable_content
 
 
     async def _execute_task_tool(self, query: str) -> str:
@@ -133,28 +376,40 @@ class ClaudeMcpAgent(AiAgent):
 
         Returns:
             Response text from the Task tool execution
-        """
-        if self.task_tool:
-            # Use the cached Task tool with general-purpose agent to handle our query
-            result = await self.session.call_tool(
-                name="Task",
-                arguments={
-                    "description": "Answer user question",
-                    "prompt": query,
-                    "subagent_type": "general-purpose"
-                }
-            )
 
-            if result and hasattr(result, 'content') and result.content:
-                content = result.content[0] if isinstance(result.content, list) else result.content
-                response_text = content.text if hasattr(content, 'text') else str(content)
-                return response_text
-            else:
-                return "Task tool executed but returned no content"
-        else:
+        Raises:
+            McpCallError: If the Task tool is missing, failed or returned nothing
+        """
+        if not self.task_tool:
             # Show available tools for debugging if Task tool not found
             tool_names = [tool.name for tool in self.cached_tools] if self.cached_tools else []
-            return f"Task tool not available. Available tools: {', '.join(tool_names)}"
+            raise McpCallError(f"Task tool not available. Available tools: {', '.join(tool_names)}",
+                               retryable=False)
+
+        # Use the cached Task tool with general-purpose agent on a leased session
+        try:
+            async with self.session_pool.lease() as session:
+                result = await session.call_tool(
+                    name="Task",
+                    arguments={
+                        "description": "Answer user question",
+                        "prompt": query,
+                        "subagent_type": TASK_SUBAGENT_TYPE
+                    }
+                )
+        except McpPoolBusyError as e:
+            raise McpCallError(f"MCP call failed: {e}", retry_after=1.0) from e
+        except Exception as e:
+            # Dead sessions are respawned on the next lease, so a retry can succeed
+            raise McpCallError(f"MCP call failed: {e}") from e
+
+        if not (result and hasattr(result, 'content') and result.content):
+            raise McpCallError("Task tool executed but returned no content")
+        content = result.content[0] if isinstance(result.content, list) else result.content
+        response_text = content.text if hasattr(content, 'text') else str(content)
+        if getattr(result, 'isError', False):
+            raise McpCallError(f"Task tool failed: {response_text}")
+        return response_text
 
     def _extract_readable_content(self, response_text: str) -> str:
         """
@@ -186,16 +441,18 @@ class ClaudeMcpAgent(AiAgent):
             return response_text
 
     def cleanup(self):
-        """Clean up MCP resources."""
-        if self.mcp_client:
+        """Clean up MCP resources and stop the agent's event loop."""
+        if self.session_pool and self.cached_tools:
             try:
-                # Close the session properly
-                asyncio.run(self.mcp_client.close_all_sessions())
-                self.session = None
+                if self.batcher:
+                    self._run_coroutine(self.batcher.close())
+                # Close the sessions properly on the loop that created them
+                self._run_coroutine(self.session_pool.close())
                 self.cached_tools = None
                 self.task_tool = None
             except Exception as e:
-                print(f"Warning: Error during MCP cleanup: {e}")
+                notice(f"Warning: Error during MCP cleanup: {e}")
+        self._stop_event_loop()
 
     def __del__(self):
         """Destructor to ensure cleanup when object is destroyed."""
@@ -0,0 +1,183 @@
+"""
+Process-wide registry of provider clients.
+
+Agents of a provider built with identical model settings share one client, and with it the
+client's HTTP connection pool, so scaling out agents does not repeat client setup and TLS
+handshakes. Every client tracks the latency of its first call separately from the steady
+state, which is where connection setup shows up.
+"""
+
+import asyncio
+import collections
+import json
+import threading
+import time
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+from metrics import METRICS
+
+# Steady-state latencies kept per client for the exit report
+STEADY_SAMPLES = 1000
+
+
+def _percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of a list of values, None when empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class ProviderClient:
+    """
+    A provider client with its call latencies: the first call, normally paying for connection
+    setup, is reported apart from the calls after it. Shared by every agent built with the
+    same settings.
+    """
+
+    def __init__(self, provider: str, settings: Dict[str, Any], client: Any):
+        """
+        Wrap a provider client.
+
+        Args:
+            provider: Provider name, used as a metric label
+            settings: Model settings the client was built with
+            client: The provider SDK client, e.g. a LangChain chat model
+        """
+        self.provider = provider
+        self.settings = settings
+        self.client = client
+        self.users = 0
+        self.calls = 0
+        self.first_call_seconds: Optional[float] = None
+        self.warm_up_seconds: Optional[float] = None
+        self._steady_seconds: Deque[float] = collections.deque(maxlen=STEADY_SAMPLES)
+        self._warm_up_lock: Optional[asyncio.Lock] = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self) -> Optional[str]:
+        """Model name used as a metric label."""
+        return self.settings.get("model") or getattr(self.client, "model", None)
+
+    def record_call(self, seconds: float):
+        """
+        Record the latency of one provider call.
+
+        Args:
+            seconds: Time from sending the request to receiving the response, or its first chunk
+        """
+        with self._lock:
+            first = self.calls == 0
+            self.calls += 1
+            if first:
+                self.first_call_seconds = seconds
+            else:
+                self._steady_seconds.append(seconds)
+        METRICS.observe("provider_call_seconds", seconds, provider=self.provider, model=self.model,
+                        call="first" if first else "steady")
+
+    async def awarm_up(self, warm_up: Callable[[Any], Awaitable[Any]], connections: int = 1) -> bool:
+        """
+        Open the client's connections with cheap requests, once per client.
+        Must be awaited on the event loop that will make the calls, since async connection
+        pools belong to their loop.
+
+        Args:
+            warm_up: Coroutine function sending one warm-up request with the client
+            connections: Concurrent warm-up requests, each opening a pooled connection
+
+        Returns:
+            True if this call warmed the client up, False if it already was
+        """
+        if self._warm_up_lock is None:
+            self._warm_up_lock = asyncio.Lock()
+        async with self._warm_up_lock:
+            if self.warm_up_seconds is not None:
+                return False
+            start_time = time.perf_counter()
+            await asyncio.gather(*(warm_up(self.client) for _ in range(max(1, connections))))
+            self.warm_up_seconds = time.perf_counter() - start_time
+        METRICS.observe("provider_warm_up_seconds", self.warm_up_seconds, provider=self.provider, model=self.model)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the client's call statistics.
+
+        Returns:
+            Dictionary with provider, model, sharing agents, calls, first-call and warm-up seconds,
+            and steady-state p50/p95 seconds (None until there are steady calls)
+        """
+        with self._lock:
+            steady = list(self._steady_seconds)
+            calls = self.calls
+        return {
+            "provider": self.provider,
+            "model": self.model,
+            "users": self.users,
+            "calls": calls,
+            "first_call_s": self.first_call_seconds,
+            "warm_up_s": self.warm_up_seconds,
+            "steady_p50_s": _percentile(steady, 0.5),
+            "steady_p95_s": _percentile(steady, 0.95)
+        }
+
+
+_clients: Dict[Tuple[str, str], ProviderClient] = {}
+_clients_lock = threading.Lock()
+
+
+def _client_key(provider: str, settings: Dict[str, Any]) -> Tuple[str, str]:
+    """Registry key of a provider and its model settings."""
+    return provider, json.dumps(settings, sort_keys=True, default=str)
+
+
+def acquire_client(provider: str, settings: Dict[str, Any], create: Callable[[], Any]) -> ProviderClient:
+    """
+    Get the shared client of a provider and model settings, creating it on first use.
+    Safe to call from several threads; the client is created once.
+
+    Args:
+        provider: Provider name, e.g. "gemini"
+        settings: Every setting the client is built with; agents with equal settings share the client
+        create: Builds a new provider client
+
+    Returns:
+        The shared client, with one more user
+    """
+    key = _client_key(provider, settings)
+    with _clients_lock:
+        shared = _clients.get(key)
+        if shared is None:
+            # Built under the lock so concurrent agent creation does not build the client twice
+            shared = _clients[key] = ProviderClient(provider, settings, create())
+            METRICS.increment("provider_clients_created_total", provider=provider)
+        shared.users += 1
+    return shared
+
+
+def release_client(shared: ProviderClient):
+    """
+    Drop one user of a shared client; the last user removes it from the registry, and the
+    provider SDK closes its connections once the client is garbage collected.
+
+    Args:
+        shared: Client returned by `acquire_client`
+    """
+    key = _client_key(shared.provider, shared.settings)
+    with _clients_lock:
+        shared.users -= 1
+        if shared.users <= 0 and _clients.get(key) is shared:
+            del _clients[key]
+
+
+def client_stats() -> List[Dict[str, Any]]:
+    """
+    Get the statistics of every registered client.
+
+    Returns:
+        One `ProviderClient.stats()` dictionary per client
+    """
+    with _clients_lock:
+        clients = list(_clients.values())
+    return [shared.stats() for shared in clients]
@@ -1,35 +1,110 @@
 import os
-from typing import List, Any, Optional
-from langchain_google_genai import ChatGoogleGenerativeAI
+from typing import List, Any, Dict, Optional, TYPE_CHECKING
 from langchain_core.tools import BaseTool
-from .ai_agent import AiAgent
+from .ai_agent import AiAgent, DEFAULT_MAX_TOOL_ROUNDS, DEFAULT_TOOL_TIMEOUT_SECONDS
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+DEFAULT_TEMPERATURE = 0.1
+
+# google-genai types whose pydantic schemas are only completed on the first generateContent call
+WARM_UP_TYPES = (
+    "Content", "Part", "Tool", "FunctionDeclaration", "Schema", "GenerationConfig", "GenerateContentConfig",
+    "_GenerateContentParameters", "GenerateContentResponse", "Candidate", "GenerateContentResponseUsageMetadata",
+    "HttpResponse"
+)
+
+if TYPE_CHECKING:
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+
+def _complete_request_types():
+    """Complete the schemas of the generateContent request and response types ahead of the first call."""
+    from google.genai import types
+
+    for name in WARM_UP_TYPES:
+        model = getattr(types, name, None)
+        if model is not None and not model.__pydantic_complete__:
+            model.model_rebuild()
 
 
 class GeminiAgent(AiAgent):
     """
     A Gemini-powered bot that accepts tools list and memory for LangGraph integration.
     """
+
+    provider = "gemini"
     
-    def __init__(self, tools: List[BaseTool] = None):
+    def __init__(self, tools: List[BaseTool] = None, max_tool_rounds: int = DEFAULT_MAX_TOOL_ROUNDS,
+                 tool_timeout_seconds: Optional[float] = DEFAULT_TOOL_TIMEOUT_SECONDS, model: str = DEFAULT_MODEL,
+                 temperature: float = DEFAULT_TEMPERATURE, connection_pool_size: Optional[int] = None):
         """
         Initialize the Gemini bot with tools.
         
         Args:
             tools: List of LangChain tools available to the bot
+            max_tool_rounds: Maximum number of tool-calling rounds before a final answer is forced
+            tool_timeout_seconds: Time limit for each tool call, None for no limit
+            model: Gemini model name
+            temperature: Sampling temperature
+            connection_pool_size: HTTP connections of the shared client, None for the SDK default
         """
-        super().__init__(tools)
+        self.model = model
+        self.temperature = temperature
+        self.connection_pool_size = connection_pool_size
+        super().__init__(tools, max_tool_rounds=max_tool_rounds, tool_timeout_seconds=tool_timeout_seconds)
     
-    def _initialize_llm(self) -> ChatGoogleGenerativeAI:
+    def _initialize_llm(self) -> "ChatGoogleGenerativeAI":
         """
         Initialize the Gemini LLM with specific configuration.
+        The provider SDK is imported here so it is only loaded when a Gemini agent is built.
+        Called once per distinct `_get_client_settings()`; agents with the same settings share the client.
         
         Returns:
             The initialized ChatGoogleGenerativeAI instance
         """
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        client_args = None
+        if self.connection_pool_size:
+            import httpx
+
+            # Applies to the SDK's httpx clients; with aiohttp installed the async path keeps its own pool
+            client_args = {"limits": httpx.Limits(max_connections=self.connection_pool_size,
+                                                  max_keepalive_connections=self.connection_pool_size)}
         return ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",
+            model=self.model,
             google_api_key=os.getenv("GEMINI_API_KEY"),
-            temperature=0.1
+            base_url=os.getenv("GEMINI_BASE_URL"),
+            temperature=self.temperature,
+            client_args=client_args,
+            # A single attempt: retries go through the shared provider guard so they respect the quota
+            max_retries=1
         )
-    
 
+    def _get_client_settings(self) -> Dict[str, Any]:
+        """Settings `_initialize_llm` builds the client with; tools are bound per agent and not part of them."""
+        return {
+            "model": self.model,
+            "temperature": self.temperature,
+            "connection_pool_size": self.connection_pool_size,
+            "base_url": os.getenv("GEMINI_BASE_URL")
+        }
+
+    async def _awarm_up_client(self, client: "ChatGoogleGenerativeAI"):
+        """
+        Fetch the model's metadata, which opens a connection without generating any tokens.
+        The SDK's lazily built request types are completed first, another one-time cost of the first call.
+        """
+        _complete_request_types()
+        await client.async_client.models.get(model=self.model)
+
+    def _get_model_settings(self) -> Dict[str, Any]:
+        """
+        Settings that influence Gemini's responses, used in cache and cassette keys.
+        Read from the agent rather than the client, which is not built when a cassette is replayed.
+        """
+        return {
+            "model": self.model,
+            "temperature": self.temperature,
+            "tools": sorted(tool.name for tool in self.tools)
+        }
@@ -0,0 +1,183 @@
+import asyncio
+import re
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from metrics import METRICS, COUNT_BUCKETS
+
+# Instruction placed before the id-tagged requests of a batched Task call
+BATCH_PROMPT_HEADER = (
+    "The {count} requests below are independent. Answer each one separately and completely, exactly as if "
+    "it were the only request. Start every answer with a line <<<ANSWER id>>> and end it with a line "
+    "<<<END id>>>, using the id of its request, and write nothing outside these blocks.\n\n"
+)
+
+_REQUEST_BLOCK = "<<<REQUEST {id}>>>\n{query}\n<<<END {id}>>>"
+_ANSWER_BLOCK = re.compile(r"<<<ANSWER\s+(\w+)>>>\s*(.*?)\s*<<<END\s+\1>>>", re.DOTALL)
+
+
+def build_batch_prompt(queries: List[str]) -> Tuple[List[str], str]:
+    """
+    Frame several queries as one prompt with delimited, id-tagged requests.
+
+    Args:
+        queries: Queries to send in one call
+
+    Returns:
+        Tuple of (id of every query, in order, batched prompt)
+    """
+    ids = [f"r{number}" for number in range(1, len(queries) + 1)]
+    blocks = [_REQUEST_BLOCK.format(id=request_id, query=query) for request_id, query in zip(ids, queries)]
+    return ids, BATCH_PROMPT_HEADER.format(count=len(queries)) + "\n\n".join(blocks)
+
+
+def split_batch_response(response: str, ids: List[str]) -> List[Optional[str]]:
+    """
+    Demultiplex a batched response into one answer per request id.
+
+    Args:
+        response: Text returned for a prompt built by `build_batch_prompt`
+        ids: Request ids in query order
+
+    Returns:
+        Answer of every request in query order, None where no non-empty answer block was found
+    """
+    answers: Dict[str, str] = {}
+    for match in _ANSWER_BLOCK.finditer(response or ""):
+        # A repeated block is ignored: the first answer for an id wins
+        if match.group(2) and match.group(1) not in answers:
+            answers[match.group(1)] = match.group(2)
+    return [answers.get(request_id) for request_id in ids]
+
+
+class McpCallBatcher:
+    """
+    Micro-batcher of concurrent MCP calls.
+
+    Queries submitted within `window_seconds` of the first pending one are sent together
+    once the window closes, or as soon as `max_batch_size` are pending. A batch of one is
+    sent as a plain call. Answers a batched call did not return in a parseable block are
+    retried as single calls, so callers always get the answer to their own query.
+    Must be used from a single event loop.
+    """
+
+    def __init__(self, send_one: Callable[[str], Awaitable[str]],
+                 send_batch: Callable[[List[str]], Awaitable[List[Optional[str]]]],
+                 window_seconds: float = 0.05, max_batch_size: int = 8):
+        """
+        Initialize the batcher.
+
+        Args:
+            send_one: Sends a single query and returns its answer
+            send_batch: Sends several queries in one call and returns their answers, None for missing ones
+            window_seconds: Time the first pending query waits for others to join its batch
+            max_batch_size: Queries per batch; a full batch is sent without waiting for the window
+        """
+        self.send_one = send_one
+        self.send_batch = send_batch
+        self.window_seconds = max(0.0, window_seconds)
+        self.max_batch_size = max(1, max_batch_size)
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._dispatches: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.batched_queries = 0
+        self.fallbacks = 0
+
+    async def submit(self, query: str) -> str:
+        """
+        Queue a query for the next batch and wait for its answer.
+
+        Args:
+            query: Query to send
+
+        Returns:
+            Answer to this query
+
+        Raises:
+            Exception: The error of the call that carried the query
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((query, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+        return await future
+
+    def _flush(self):
+        """Send the pending queries whose callers are still waiting."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch = [(query, future) for query, future in self._pending if not future.done()]
+        self._pending = []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch: List[Tuple[str, asyncio.Future]]):
+        """Send one batch and resolve every caller's future."""
+        METRICS.observe("mcp_batch_size", len(batch), COUNT_BUCKETS)
+        if len(batch) == 1:
+            await self._resolve(batch[0][1], self.send_one(batch[0][0]))
+            return
+
+        self.batches += 1
+        self.batched_queries += len(batch)
+        try:
+            answers = await self.send_batch([query for query, _ in batch])
+        except Exception as e:
+            # The call itself failed after retries; splitting it up would only multiply the load
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        fallbacks = []
+        for (query, future), answer in zip(batch, answers):
+            if answer is None:
+                fallbacks.append(self._resolve(future, self.send_one(query)))
+            elif not future.done():
+                future.set_result(answer)
+        if fallbacks:
+            self.fallbacks += len(fallbacks)
+            METRICS.increment("mcp_batch_fallbacks_total", len(fallbacks))
+            await asyncio.gather(*fallbacks)
+
+    @staticmethod
+    async def _resolve(future: asyncio.Future, call: Awaitable[str]):
+        """Await a call and hand its answer or error to a caller still waiting for it."""
+        if future.done():
+            # The caller gave up while the query was queued
+            call.close()
+            return
+        try:
+            result = await call
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(result)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get batching counters.
+
+        Returns:
+            Dictionary with batched calls, the queries they carried and single-call fallbacks
+        """
+        return {"batches": self.batches, "batched_queries": self.batched_queries, "fallbacks": self.fallbacks}
+
+    async def close(self):
+        """Fail the queued queries and wait for the batches in flight."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for _, future in self._pending:
+            if not future.done():
+                future.set_exception(RuntimeError("MCP batcher closed"))
+        self._pending = []
+        if self._dispatches:
+            await asyncio.gather(*self._dispatches, return_exceptions=True)
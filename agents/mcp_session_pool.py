@@ -0,0 +1,186 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+from metrics import METRICS
+from output_sink import notice
+
+# Name of the single server entry in every pooled client's configuration
+SERVER_NAME = "claude_code"
+
+
+class McpPoolBusyError(RuntimeError):
+    """Raised when every pooled session is busy and the wait queue is full."""
+
+
+class PooledSession:
+    """One MCP server subprocess with its client and session."""
+
+    def __init__(self, slot_id: int):
+        self.slot_id = slot_id
+        self.client = None
+        self.session = None
+        self.healthy = False
+        self.last_checked = 0.0
+        self.calls = 0
+        self.respawns = 0
+
+    @property
+    def is_connected(self) -> bool:
+        """Whether the underlying session reports a live connection."""
+        return bool(self.session) and bool(getattr(self.session, "is_connected", True))
+
+
+class McpSessionPool:
+    """
+    Pool of MCP sessions, each backed by its own server subprocess.
+
+    Sessions are started at warm-up and leased per call. A leased session is
+    health-checked first and its server is respawned if it died. When every
+    session is busy, callers wait in a bounded queue; once `max_waiters` are
+    already waiting, new callers are rejected instead of piling up.
+    """
+
+    def __init__(self, server_config: Dict[str, Any], size: int = 1, max_waiters: Optional[int] = None,
+                 acquire_timeout: Optional[float] = None, health_check_interval: float = 30.0):
+        """
+        Initialize the session pool. Must be started with `start()` on the loop that will use it.
+
+        Args:
+            server_config: STDIO server definition (command/args)
+            size: Number of sessions (server subprocesses) to keep
+            max_waiters: Maximum number of callers waiting for a session, None for unbounded
+            acquire_timeout: Seconds a caller may wait for a session, None to wait indefinitely
+            health_check_interval: Idle seconds after which a session is pinged before reuse
+        """
+        self.server_config = server_config
+        self.size = max(1, size)
+        self.max_waiters = max_waiters
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval
+        self.tools: List[Any] = []
+        self._slots: List[PooledSession] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._waiting = 0
+        self.rejected = 0
+
+    async def start(self):
+        """Spawn all sessions concurrently and cache the server's tool list."""
+        self._idle = asyncio.Queue()
+        self._slots = [PooledSession(slot_id) for slot_id in range(self.size)]
+        results = await asyncio.gather(*(self._spawn(slot) for slot in self._slots), return_exceptions=True)
+        for slot, result in zip(self._slots, results):
+            # Failed slots are queued too; they are respawned when leased
+            if isinstance(result, Exception):
+                notice(f"Warning: Could not start MCP session {slot.slot_id}: {result}")
+            self._idle.put_nowait(slot)
+        if not any(slot.healthy for slot in self._slots):
+            raise RuntimeError("No MCP sessions available")
+
+    async def _spawn(self, slot: PooledSession):
+        """Start (or restart) the server subprocess and session behind a slot."""
+        # Imported here so mcp_use is only loaded once a session is actually started
+        from mcp_use.client import MCPClient
+
+        await self._close_slot(slot)
+        client = MCPClient.from_dict({"mcpServers": {SERVER_NAME: dict(self.server_config)}})
+        await client.create_all_sessions()
+        slot.client = client
+        slot.session = client.get_session(SERVER_NAME)
+        if not self.tools:
+            self.tools = await slot.session.list_tools()
+        slot.healthy = True
+        slot.last_checked = time.monotonic()
+
+    async def _close_slot(self, slot: PooledSession):
+        """Close a slot's session and server, ignoring errors from dead servers."""
+        if slot.client:
+            try:
+                await slot.client.close_all_sessions()
+            except Exception:
+                pass
+        slot.client = None
+        slot.session = None
+        slot.healthy = False
+
+    async def _ensure_healthy(self, slot: PooledSession):
+        """Ping long-idle sessions and respawn dead ones before handing them out."""
+        if slot.healthy and slot.is_connected:
+            if time.monotonic() - slot.last_checked < self.health_check_interval:
+                return
+            try:
+                await slot.session.list_tools()
+                slot.last_checked = time.monotonic()
+                return
+            except Exception:
+                slot.healthy = False
+
+        slot.respawns += 1
+        METRICS.increment("mcp_session_respawns_total")
+        await self._spawn(slot)
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[Any]:
+        """
+        Lease a healthy session for the duration of the context.
+
+        Yields:
+            MCP session ready for tool calls
+
+        Raises:
+            McpPoolBusyError: If the wait queue is full
+            asyncio.TimeoutError: If no session became free within `acquire_timeout`
+        """
+        if self._idle is None:
+            raise RuntimeError("MCP session pool is not started")
+        if self._idle.empty() and self.max_waiters is not None and self._waiting >= self.max_waiters:
+            self.rejected += 1
+            METRICS.increment("mcp_pool_rejections_total")
+            raise McpPoolBusyError(f"All {self.size} MCP sessions busy and {self._waiting} callers waiting")
+
+        self._waiting += 1
+        try:
+            slot = await asyncio.wait_for(self._idle.get(), self.acquire_timeout)
+        finally:
+            self._waiting -= 1
+
+        try:
+            await self._ensure_healthy(slot)
+            slot.calls += 1
+            yield slot.session
+            slot.last_checked = time.monotonic()
+        except asyncio.CancelledError:
+            # The server keeps working on a cancelled call; respawn it before the next lease
+            slot.healthy = False
+            METRICS.increment("mcp_cancelled_calls_total")
+            raise
+        except Exception:
+            # A failed call on a dropped connection means the server died
+            if not slot.is_connected:
+                slot.healthy = False
+            raise
+        finally:
+            self._idle.put_nowait(slot)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool usage counters.
+
+        Returns:
+            Dictionary with pool size, idle and waiting counts, calls and respawns per slot
+        """
+        return {
+            "size": self.size,
+            "idle": self._idle.qsize() if self._idle else 0,
+            "waiting": self._waiting,
+            "rejected": self.rejected,
+            "calls": [slot.calls for slot in self._slots],
+            "respawns": [slot.respawns for slot in self._slots]
+        }
+
+    async def close(self):
+        """Close every session and server subprocess."""
+        for slot in self._slots:
+            await self._close_slot(slot)
+        self._slots = []
+        self.tools = []
@@ -0,0 +1,491 @@
+"""
+Process-wide rate limiting, retries and circuit breaking for provider calls.
+
+Every agent calling the same provider shares one ProviderGuard, so concurrent workflows
+queue for the provider's quota instead of collapsing into storms of rejected retries.
+"""
+
+import asyncio
+import random
+import re
+import threading
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+from metrics import METRICS
+from output_sink import notice
+
+# HTTP statuses worth retrying; 429 is also treated as a rate limit
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+# Transport errors from httpx, anyio and the MCP client that a retry can get past
+RETRYABLE_ERROR_NAMES = frozenset({
+    "ConnectError", "ConnectTimeout", "ReadTimeout", "ReadError", "WriteError", "RemoteProtocolError",
+    "ClosedResourceError", "BrokenResourceError", "EndOfStream", "McpPoolBusyError"
+})
+
+# Seconds of quota a limiter may hand out at once after being idle
+BURST_SECONDS = 5.0
+
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RETRY_BASE_DELAY_SECONDS = 1.0
+DEFAULT_RETRY_MAX_DELAY_SECONDS = 30.0
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_CIRCUIT_RESET_SECONDS = 30.0
+
+_RETRY_HINT = re.compile(
+    r"retry(?:[ _-]?after|[ _-]?delay|[ _-]?in)\W{0,20}?(?:seconds\W{0,5})?(\d+(?:\.\d+)?)\s*(ms|s)?",
+    re.IGNORECASE
+)
+
+# Status names meaning the provider is rate limiting, e.g. the `status` of google-genai's APIError
+RATE_LIMIT_STATUSES = frozenset({"RESOURCE_EXHAUSTED"})
+
+
+class ProviderError(RuntimeError):
+    """Failed provider call, with a hint of whether and when it may be retried."""
+
+    def __init__(self, message: str, retryable: bool = True, retry_after: Optional[float] = None,
+                 rate_limited: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+        self.rate_limited = rate_limited
+
+
+class CircuitOpenError(ProviderError):
+    """Raised without calling the provider while its circuit is open."""
+
+    def __init__(self, provider: str, retry_after: float):
+        super().__init__(f"{provider} circuit is open after repeated failures, retry in {retry_after:.1f}s",
+                         retryable=False, retry_after=retry_after)
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    """HTTP status carried by a provider or HTTP client exception, if any."""
+    for attribute in ("status_code", "code", "status"):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int) and 100 <= value < 600:
+            return value
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Retry-after hint from an exception attribute or a response header."""
+    retry_after = getattr(error, "retry_after", None)
+    if isinstance(retry_after, (int, float)):
+        return float(retry_after)
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if headers is not None:
+        try:
+            return float(headers.get("retry-after"))
+        except (TypeError, ValueError):
+            pass
+    return None
+
+
+def _message_retry_after(error: BaseException) -> Optional[float]:
+    """Retry-after hint in the error message, e.g. Gemini's "Please retry in 30s"."""
+    match = _RETRY_HINT.search(str(error))
+    if match:
+        seconds = float(match.group(1))
+        return seconds / 1000 if (match.group(2) or "").lower() == "ms" else seconds
+    return None
+
+
+def classify_error(error: BaseException) -> Tuple[bool, bool, Optional[float]]:
+    """
+    Decide how to react to a failed provider call.
+    The exception and its causes are inspected, so SDK errors wrapped by LangChain are recognized.
+    Only exception types, status codes and attributes tell whether the call was rate limited or can
+    be retried, never the message, which may quote critique or model text.
+
+    Args:
+        error: Exception raised by the call
+
+    Returns:
+        Tuple of (retryable, rate limited, retry-after seconds or None)
+    """
+    retryable = rate_limited = False
+    retry_after = None
+    chain = []
+    current: Optional[BaseException] = error
+    while current is not None:
+        chain.append(current)
+        if isinstance(current, ProviderError):
+            retryable = retryable or current.retryable
+            rate_limited = rate_limited or current.rate_limited
+        names = {cls.__name__ for cls in type(current).__mro__}
+        status = _status_code(current)
+        status_name = getattr(current, "status", None)
+        if status == 429 or (isinstance(status_name, str) and status_name.upper() in RATE_LIMIT_STATUSES) \
+                or any("RateLimit" in name or name == "ResourceExhausted" for name in names):
+            retryable = rate_limited = True
+        elif getattr(current, "is_retryable", False) or status in RETRYABLE_STATUS_CODES \
+                or names & RETRYABLE_ERROR_NAMES:
+            retryable = True
+        if retry_after is None:
+            retry_after = _retry_after(current)
+        current = current.__cause__
+    if retry_after is None and rate_limited:
+        # A delay quoted in a message is only trusted once the error is known to be a rate limit
+        retry_after = next((hint for hint in map(_message_retry_after, chain) if hint is not None), None)
+    return retryable, rate_limited, retry_after
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at a per-minute rate.
+    Callers reserve tokens up front and wait out any deficit, so waiting callers are
+    served in arrival order and never poll.
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float = BURST_SECONDS):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take `amount` tokens, possibly going into deficit, and return the seconds to wait before using them."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= amount
+            return max(0.0, -self.tokens / self.rate)
+
+    def adjust(self, amount: float):
+        """Take (or give back, if negative) tokens once the real cost of a call is known."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+    def pause(self, seconds: float):
+        """Make the next reservation wait at least `seconds`, e.g. after the provider asked to back off."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute buckets of one provider; either may be unlimited."""
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    def reserve(self, tokens: int) -> float:
+        """Reserve one request and `tokens` tokens, returning the seconds to wait before sending."""
+        wait = self.requests.reserve(1) if self.requests else 0.0
+        if self.tokens:
+            wait = max(wait, self.tokens.reserve(tokens))
+        return wait
+
+    def adjust_tokens(self, amount: int):
+        if self.tokens and amount:
+            self.tokens.adjust(amount)
+
+    def pause(self, seconds: float):
+        for bucket in (self.requests, self.tokens):
+            if bucket:
+                bucket.pause(seconds)
+
+
+class CircuitBreaker:
+    """
+    Stops calling a provider after `failure_threshold` consecutive failures.
+    After `reset_seconds` one trial call is let through; its outcome closes or reopens the circuit.
+    """
+
+    def __init__(self, provider: str, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_seconds: float = DEFAULT_CIRCUIT_RESET_SECONDS):
+        self.provider = provider
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_seconds else "open"
+
+    def before_call(self) -> bool:
+        """
+        Returns:
+            True if the call is the trial call of a half open circuit, which the caller must end
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half open with a trial call already running
+        """
+        if self.opened_at is None:
+            # Closed, the common case: no lock needed to let the call through
+            return False
+        with self._lock:
+            if self.opened_at is None:
+                return False
+            remaining = self.opened_at + self.reset_seconds - time.monotonic()
+            if remaining <= 0 and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+        METRICS.increment("circuit_rejections_total", provider=self.provider)
+        raise CircuitOpenError(self.provider, max(remaining, 0.0))
+
+    def record_success(self):
+        if self.opened_at is None and not self.failures:
+            return
+        with self._lock:
+            if self.opened_at is not None:
+                METRICS.increment("circuit_transitions_total", provider=self.provider, state="closed")
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def release_trial(self):
+        """End a trial call that neither succeeded nor failed (cancelled or rate limited)."""
+        with self._lock:
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            opened = self.trial_in_flight or (self.opened_at is None and self.failures >= self.failure_threshold)
+            if opened:
+                self.opened_at = time.monotonic()
+                self.trial_in_flight = False
+            failures = self.failures
+        if opened:
+            METRICS.increment("circuit_transitions_total", provider=self.provider, state="open")
+            notice(f"⚡ {self.provider} circuit opened after {failures} consecutive failures")
+
+
+class ProviderGuard:
+    """
+    Rate limiter, retry policy and circuit breaker wrapped around every call to one provider.
+    Retries use full-jitter exponential backoff and never come sooner than the provider's
+    retry-after hint; a rate-limit response also pauses the shared limiter for every caller.
+    """
+
+    def __init__(self, provider: str, limiter: Optional[RateLimiter] = None,
+                 breaker: Optional[CircuitBreaker] = None, max_retries: int = DEFAULT_MAX_RETRIES,
+                 base_delay: float = DEFAULT_RETRY_BASE_DELAY_SECONDS,
+                 max_delay: float = DEFAULT_RETRY_MAX_DELAY_SECONDS):
+        """
+        Initialize the guard.
+
+        Args:
+            provider: Provider name used in metrics and messages
+            limiter: Shared rate limiter, None for unlimited
+            breaker: Circuit breaker, None for a default one
+            max_retries: Retries after the first attempt
+            base_delay: Backoff ceiling of the first retry, doubled for each further retry
+            max_delay: Largest backoff ceiling
+        """
+        self.provider = provider
+        self.limiter = limiter or RateLimiter()
+        self.breaker = breaker or CircuitBreaker(provider)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def _reserve(self, tokens: int) -> Tuple[float, bool]:
+        """Check the circuit and reserve quota, returning the seconds to wait and whether this is the trial call."""
+        trial = self.breaker.before_call()
+        wait = self.limiter.reserve(tokens)
+        if wait > 0:
+            METRICS.observe("provider_throttle_seconds", wait, provider=self.provider)
+        return wait, trial
+
+    @property
+    def meters_tokens(self) -> bool:
+        """Whether calls count against a tokens-per-minute quota, so callers need to estimate their tokens."""
+        return self.limiter.tokens is not None
+
+    def _settle(self, estimated_tokens: int, result: Any, usage: Optional[Callable[[Any], Optional[int]]]):
+        self.breaker.record_success()
+        if usage is not None and self.meters_tokens:
+            actual_tokens = usage(result)
+            if actual_tokens is not None:
+                self.limiter.adjust_tokens(actual_tokens - estimated_tokens)
+
+    def _retry_delay(self, error: BaseException, attempt: int, trial: bool,
+                     can_retry: bool = True) -> Optional[float]:
+        """
+        Record a failed attempt and decide whether to retry it.
+
+        Args:
+            error: Exception raised by the attempt
+            attempt: Retries made so far
+            trial: Whether the attempt was the circuit's trial call
+            can_retry: False when the caller cannot retry whatever the error, e.g. a stream that has yielded items
+
+        Returns:
+            Seconds to wait before the next attempt, or None to give up
+        """
+        retryable, rate_limited, retry_after = classify_error(error)
+        kind = "rate_limited" if rate_limited else "retryable" if retryable else "fatal"
+        METRICS.increment("provider_errors_total", provider=self.provider, kind=kind)
+        if rate_limited:
+            # The quota is shared, so every caller of this provider backs off together
+            self.limiter.pause(retry_after or self.base_delay)
+            if trial:
+                self.breaker.release_trial()
+        else:
+            self.breaker.record_failure()
+        if not (retryable and can_retry) or attempt >= self.max_retries:
+            return None
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        delay = max(delay, retry_after or 0.0)
+        METRICS.increment("provider_retries_total", provider=self.provider, kind=kind)
+        return delay
+
+    async def acall(self, call: Callable[[], Awaitable[Any]], tokens: int = 0,
+                    usage: Optional[Callable[[Any], Optional[int]]] = None) -> Any:
+        """
+        Await a provider call within the rate limits, retrying failures that can succeed on retry.
+
+        Args:
+            call: Factory returning a new awaitable for each attempt
+            tokens: Estimated tokens of the request, reserved against the tokens-per-minute quota
+            usage: Extracts the real token count from a result to correct the reservation
+
+        Returns:
+            The call result
+
+        Raises:
+            CircuitOpenError: If the provider's circuit is open
+            Exception: The last error once retries are exhausted or the error is not retryable
+        """
+        attempt = 0
+        while True:
+            wait, trial = self._reserve(tokens)
+            try:
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                result = await call()
+            except asyncio.CancelledError:
+                if trial:
+                    self.breaker.release_trial()
+                raise
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, trial)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            self._settle(tokens, result, usage)
+            return result
+
+    def call(self, call: Callable[[], Any], tokens: int = 0,
+             usage: Optional[Callable[[Any], Optional[int]]] = None) -> Any:
+        """Blocking counterpart of `acall` for sync callers."""
+        attempt = 0
+        while True:
+            wait, trial = self._reserve(tokens)
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                result = call()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, trial)
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+                continue
+            self._settle(tokens, result, usage)
+            return result
+
+    async def astream(self, open_stream: Callable[[], AsyncIterator[Any]], tokens: int = 0) -> AsyncIterator[Any]:
+        """
+        Iterate a streamed provider response within the rate limits.
+        A stream that fails before its first item is retried like `acall`; once items
+        have been yielded a failure is raised, since they cannot be taken back.
+
+        Args:
+            open_stream: Factory returning a new async iterator for each attempt
+            tokens: Estimated tokens of the request
+
+        Yields:
+            Items of the stream
+        """
+        attempt = 0
+        while True:
+            wait, trial = self._reserve(tokens)
+            started = False
+            try:
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                async for item in open_stream():
+                    started = True
+                    yield item
+            except (asyncio.CancelledError, GeneratorExit):
+                # Cancelled, or closed by a consumer that stopped reading: the trial, if ours, proved nothing
+                if trial:
+                    self.breaker.release_trial()
+                raise
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, trial, can_retry=not started)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            self._settle(tokens, None, None)
+            return
+
+
+_guards: Dict[str, ProviderGuard] = {}
+_guards_lock = threading.Lock()
+
+
+def configure_provider(provider: str, requests_per_minute: Optional[float] = None,
+                       tokens_per_minute: Optional[float] = None, max_retries: int = DEFAULT_MAX_RETRIES,
+                       failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                       reset_seconds: float = DEFAULT_CIRCUIT_RESET_SECONDS,
+                       base_delay: float = DEFAULT_RETRY_BASE_DELAY_SECONDS,
+                       max_delay: float = DEFAULT_RETRY_MAX_DELAY_SECONDS) -> ProviderGuard:
+    """
+    Replace the process-wide guard of a provider; agents pick it up on their next call.
+
+    Args:
+        provider: Provider name, e.g. "gemini" or "claude"
+        requests_per_minute: Request quota, None for unlimited
+        tokens_per_minute: Token quota (prompt and response), None for unlimited
+        max_retries: Retries after the first attempt
+        failure_threshold: Consecutive failures that open the circuit
+        reset_seconds: Time the circuit stays open before a trial call
+        base_delay: Backoff ceiling of the first retry
+        max_delay: Largest backoff ceiling
+
+    Returns:
+        The new guard
+    """
+    guard = ProviderGuard(
+        provider,
+        RateLimiter(requests_per_minute, tokens_per_minute),
+        CircuitBreaker(provider, failure_threshold, reset_seconds),
+        max_retries=max_retries,
+        base_delay=base_delay,
+        max_delay=max_delay
+    )
+    with _guards_lock:
+        _guards[provider] = guard
+    return guard
+
+
+def get_provider_guard(provider: str) -> ProviderGuard:
+    """Get the shared guard of a provider, creating an unlimited one with default retries on first use."""
+    guard = _guards.get(provider)
+    if guard is None:
+        with _guards_lock:
+            guard = _guards.setdefault(provider, ProviderGuard(provider))
+    return guard
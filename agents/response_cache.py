@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+
+
+class ResponseCache:
+    """
+    Two-tier cache for agent responses.
+    An in-memory LRU tier sits in front of an on-disk SQLite tier with size-based eviction; both
+    tiers expire entries `ttl_seconds` after they were stored.
+    """
+
+    def __init__(self, path: Optional[str] = None, memory_entries: int = 256,
+                 ttl_seconds: float = 7 * 24 * 3600, max_entries: int = 10000):
+        """
+        Initialize the response cache.
+
+        Args:
+            path: SQLite file for the disk tier, or None to keep the cache in memory only
+            memory_entries: Maximum number of responses kept in the LRU tier
+            ttl_seconds: Age after which an entry is considered stale
+            max_entries: Maximum number of responses kept on disk before the least recently used are evicted
+        """
+        self.path = path
+        self.memory_entries = memory_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # Key -> (message dict, time the response was stored)
+        self._memory: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection = None
+        self._disk_entries = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path:
+            self._open_database(path)
+
+    def _open_database(self, path: str):
+        """Open (and create if needed) the SQLite disk tier."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        # Drop entries that expired while the process was not running
+        self._connection.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        self._connection.commit()
+        self._disk_entries = self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def build_key(agent_name: str, model_settings: Dict[str, Any], message: BaseMessage) -> str:
+        """
+        Build a cache key from the agent class, its model settings and the full message.
+
+        Args:
+            agent_name: Agent class name
+            model_settings: Settings that influence the response (model name, temperature, ...)
+            message: Message sent to the agent
+
+        Returns:
+            Hex digest identifying the request
+        """
+        payload = json.dumps(
+            {"agent": agent_name, "settings": model_settings, "message": message_to_dict(message)},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[BaseMessage]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Key produced by `build_key`
+
+        Returns:
+            The cached message, or None on a miss
+        """
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                entry, created_at = cached
+                if time.time() - created_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return messages_from_dict([entry])[0]
+                # Expired: the disk copy is just as old and gets deleted by the lookup below
+                del self._memory[key]
+
+            cached = self._get_from_disk(key)
+            if cached is None:
+                self.misses += 1
+                return None
+
+            self.disk_hits += 1
+            self._put_in_memory(key, *cached)
+            return messages_from_dict([cached[0]])[0]
+
+    def put(self, key: str, message: BaseMessage):
+        """
+        Store a response in both tiers.
+
+        Args:
+            key: Key produced by `build_key`
+            message: Response message to cache
+        """
+        entry = message_to_dict(message)
+        with self._lock:
+            now = time.time()
+            self._put_in_memory(key, entry, now)
+            self._put_on_disk(key, entry, now)
+
+    def _put_in_memory(self, key: str, entry: Dict[str, Any], created_at: float):
+        """Insert into the LRU tier, evicting the least recently used entry when full."""
+        self._memory[key] = (entry, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _get_from_disk(self, key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Read a non-expired entry and the time it was stored from the SQLite tier."""
+        if not self._connection:
+            return None
+        row = self._connection.execute(
+            "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        now = time.time()
+        value, created_at = row
+        if now - created_at > self.ttl_seconds:
+            self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._connection.commit()
+            self._disk_entries -= 1
+            self.evictions += 1
+            return None
+
+        self._connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        self._connection.commit()
+        return json.loads(value), created_at
+
+    def _put_on_disk(self, key: str, entry: Dict[str, Any], now: float):
+        """Write to the SQLite tier and evict least recently used rows above `max_entries`."""
+        if not self._connection:
+            return
+        exists = self._connection.execute("SELECT 1 FROM responses WHERE key = ?", (key,)).fetchone()
+        self._connection.execute(
+            "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(entry), now, now)
+        )
+        if not exists:
+            self._disk_entries += 1
+
+        excess = self._disk_entries - self.max_entries
+        if excess > 0:
+            self._connection.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY accessed_at ASC LIMIT ?)",
+                (excess,)
+            )
+            self._disk_entries -= excess
+            self.evictions += excess
+        self._connection.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss counters.
+
+        Returns:
+            Dictionary with memory hits, disk hits, misses, hit rate, evictions and tier sizes
+        """
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "disk_entries": self._disk_entries
+            }
+
+    def close(self):
+        """Close the SQLite connection."""
+        with self._lock:
+            if self._connection:
+                self._connection.close()
+                self._connection = None
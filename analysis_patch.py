@@ -0,0 +1,121 @@
+"""
+Section-addressable analyses for patch-based re-analysis: the analysis is split into numbered
+sections, critiques name the sections their issues concern, and a re-analysis returns edits to
+those sections only, which are applied to the analysis in place.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from critique_parser import SEVERITIES
+
+_SECTION_BREAK = re.compile(r"\n\s*\n")
+_SECTION_REFERENCE = re.compile(r"\[\s*S(\d+)\s*\]", re.IGNORECASE)
+_PATCH_MARKER = re.compile(r"^\s*\[\s*S(\d+)\s*\][ \t]*", re.IGNORECASE | re.MULTILINE)
+
+
+def split_sections(text: Optional[str]) -> List[str]:
+    """
+    Split an analysis into blank-line separated sections.
+    A lone heading line is kept with the section below it, so headings never form a section of their own.
+    """
+    sections: List[str] = []
+    heading = ""
+    for block in _SECTION_BREAK.split((text or "").strip()):
+        block = block.strip()
+        if not block:
+            continue
+        if block.startswith("#") and "\n" not in block:
+            heading = f"{heading}\n{block}" if heading else block
+            continue
+        sections.append(f"{heading}\n{block}" if heading else block)
+        heading = ""
+    if heading:
+        sections.append(heading)
+    return sections
+
+
+def join_sections(sections: List[str]) -> str:
+    return "\n\n".join(section for section in sections if section)
+
+
+def render_sections(sections: List[str], numbers: Optional[List[int]] = None) -> str:
+    """
+    Render sections prefixed with their `[S<n>]` ids.
+
+    Args:
+        sections: Sections of the analysis
+        numbers: 1-based section numbers to render, None for all
+    """
+    numbers = numbers if numbers is not None else list(range(1, len(sections) + 1))
+    return "\n\n".join(f"[S{number}] {sections[number - 1]}" for number in numbers if 0 < number <= len(sections))
+
+
+def patch_targets(critique: Optional[Dict[str, Any]], section_count: int) -> Optional[List[int]]:
+    """
+    Sections a re-analysis has to edit to address a critique.
+
+    Args:
+        critique: Parsed critique (see `CritiqueParser.parse`)
+        section_count: Number of sections in the analysis
+
+    Returns:
+        Sorted 1-based section numbers, or None when the analysis has to be regenerated: the
+        critique was not parsed, names no valid section, or has a blocking issue naming none
+    """
+    if not critique or not critique.get("parsed") or not section_count:
+        return None
+    targets = set()
+    for severity in SEVERITIES:
+        for issue in critique.get(severity) or []:
+            numbers = {int(number) for number in _SECTION_REFERENCE.findall(issue)}
+            numbers = {number for number in numbers if 0 < number <= section_count}
+            if not numbers and severity != "minor":
+                return None
+            targets |= numbers
+    return sorted(targets) or None
+
+
+def parse_patch(response: str) -> Dict[int, str]:
+    """
+    Read `[S<n>] new text` edits from a re-analysis response.
+
+    Returns:
+        New text per 1-based section number; an empty text deletes the section.
+        Empty when the response contains no section markers.
+    """
+    markers = list(_PATCH_MARKER.finditer(response or ""))
+    edits = {}
+    for index, marker in enumerate(markers):
+        end = markers[index + 1].start() if index + 1 < len(markers) else len(response)
+        edits[int(marker.group(1))] = response[marker.end():end].strip()
+    return edits
+
+
+def apply_patch(analysis: str, edits: Dict[int, str]) -> Tuple[str, List[int]]:
+    """
+    Apply section edits to an analysis.
+    Edits of existing sections replace them in place, edits numbered past the last section are appended.
+
+    Returns:
+        Tuple of (patched analysis, 1-based numbers of its new or changed sections)
+    """
+    sections = split_sections(analysis)
+    appended = []
+    for number, text in sorted(edits.items()):
+        if 0 < number <= len(sections):
+            sections[number - 1] = text
+        elif number > len(sections) and text:
+            appended.append(text)
+    patched = join_sections(sections + appended)
+    # Edits may contain blank lines, so changes are located in the re-split analysis
+    unchanged = set(split_sections(analysis))
+    changed = [number for number, section in enumerate(split_sections(patched), 1) if section not in unchanged]
+    return patched, changed
+
+
+def sections_text(analysis: Optional[str], numbers: Optional[List[int]]) -> str:
+    """Text of the given sections of an analysis, or the whole analysis when `numbers` is None."""
+    if numbers is None:
+        return analysis or ""
+    sections = split_sections(analysis)
+    return join_sections([sections[number - 1] for number in numbers if 0 < number <= len(sections)])
@@ -0,0 +1,193 @@
+"""
+Batch runner that streams asks from JSONL through the compiled workflow graph.
+"""
+
+import asyncio
+import json
+import random
+import statistics
+import time
+import uuid
+from dataclasses import asdict
+from typing import Any, Dict, IO, List, Optional
+from state import State, Configuration, create_initial_state
+from checkpointing import ainvoke_resumable
+from output_sink import report_stream
+
+# Ask latencies sampled for the summary percentiles, so memory stays flat on unbounded inputs
+LATENCY_SAMPLES = 10000
+
+
+class BatchRunner:
+    """
+    Runs many asks through a compiled StateGraph with bounded concurrency.
+
+    Asks are read lazily and each final state is written as soon as its run
+    finishes, so memory stays flat regardless of the input size.
+    """
+
+    def __init__(self, app: Any, configuration: Configuration, concurrency: int = 4, run_id: Optional[str] = None,
+                 semantic_cache: Optional[Any] = None):
+        """
+        Initialize the batch runner.
+
+        Args:
+            app: Compiled LangGraph application exposing `ainvoke`
+            configuration: Configuration applied to every ask
+            concurrency: Maximum number of asks in flight at once
+            run_id: Batch run id prefixed to every ask id, so a checkpointed batch can be resumed;
+                generated when checkpointing without one, so batches never share checkpoint threads
+            semantic_cache: `SemanticCache` answering asks similar to earlier ones without running the graph
+        """
+        self.app = app
+        self.configuration = configuration
+        self.concurrency = max(1, concurrency)
+        self.run_id = run_id or (uuid.uuid4().hex[:12] if configuration.checkpoint_path else None)
+        self.semantic_cache = semantic_cache
+        # Uniform sample of the completed asks' latencies, at most LATENCY_SAMPLES of them
+        self.latencies: List[float] = []
+        self.completed = 0
+        self.failed = 0
+
+    async def run(self, source: IO[str], sink: IO[str]) -> Dict[str, Any]:
+        """
+        Process every ask from `source` and write one JSON line per ask to `sink`.
+
+        Args:
+            source: Text stream of JSONL asks (`{"id": ..., "ask": ...}` or a JSON string per line)
+            sink: Text stream receiving one JSONL record per finished ask
+
+        Returns:
+            Summary with throughput and latency percentiles
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        start_time = time.perf_counter()
+
+        workers = [asyncio.create_task(self._worker(queue, sink)) for _ in range(self.concurrency)]
+        try:
+            await self._produce(source, queue)
+            await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        return self._summary(time.perf_counter() - start_time)
+
+    async def _produce(self, source: IO[str], queue: asyncio.Queue):
+        """Read asks line by line without blocking the event loop."""
+        line_number = 0
+        while True:
+            line = await asyncio.to_thread(source.readline)
+            if not line:
+                break
+            line_number += 1
+            line = line.strip()
+            if not line:
+                continue
+            await queue.put(self._parse_line(line, line_number))
+
+    @staticmethod
+    def _parse_line(line: str, line_number: int) -> Dict[str, Any]:
+        """Parse one input line into an `{"id", "ask"}` item."""
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError:
+            item = line
+        if isinstance(item, dict):
+            return {"id": item.get("id", line_number), "ask": item.get("ask")}
+        return {"id": line_number, "ask": str(item)}
+
+    async def _worker(self, queue: asyncio.Queue, sink: IO[str]):
+        """Run queued asks through the graph and stream their results."""
+        while True:
+            item = await queue.get()
+            try:
+                record = await self._run_one(item)
+                sink.write(json.dumps(record, ensure_ascii=False) + "\n")
+                sink.flush()
+            finally:
+                queue.task_done()
+
+    async def _run_one(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a single ask and build its output record."""
+        start_time = time.perf_counter()
+        try:
+            if not item["ask"]:
+                raise ValueError("Missing 'ask' field")
+            run_id = f"{self.run_id}/{item['id']}" if self.run_id else str(item["id"])
+            initial_state = create_initial_state(item["ask"], self.configuration, run_id=run_id)
+            if self.semantic_cache:
+                final_state = await self.semantic_cache.ainvoke(self.app, initial_state)
+            else:
+                final_state = await ainvoke_resumable(self.app, initial_state)
+            latency = time.perf_counter() - start_time
+            self.completed += 1
+            self._sample_latency(latency)
+            return self.state_to_record(item["id"], final_state, latency)
+        except Exception as e:
+            self.failed += 1
+            return {
+                "id": item["id"],
+                "ask": item["ask"],
+                "error": str(e),
+                "latency_s": round(time.perf_counter() - start_time, 3)
+            }
+
+    def _sample_latency(self, latency: float):
+        """Keep `latency` in the reservoir with the same chance as every other completed ask's."""
+        if len(self.latencies) < LATENCY_SAMPLES:
+            self.latencies.append(latency)
+            return
+        index = random.randrange(self.completed)
+        if index < LATENCY_SAMPLES:
+            self.latencies[index] = latency
+
+    @staticmethod
+    def state_to_record(run_id: Any, state: State, latency: float) -> Dict[str, Any]:
+        """Convert a final State into a JSON-serializable output record."""
+        config = state.get("configuration")
+        return {
+            "id": run_id,
+            "ask": state.get("ask"),
+            "analysis_output": state.get("analysis_output"),
+            "critic_output": state.get("critic_output"),
+            "current_iterations": state.get("current_iterations"),
+            "stop_reason": state.get("stop_reason"),
+            "model_tier": state.get("model_tier"),
+            "semantic_match": state.get("semantic_match"),
+            "llm_calls_saved": state.get("llm_calls_saved", 0),
+            "configuration": asdict(config) if config else None,
+            "timings": state.get("timings") or {},
+            "prompt_sizes": state.get("prompt_sizes") or [],
+            "latency_s": round(latency, 3)
+        }
+
+    def _summary(self, elapsed: float) -> Dict[str, Any]:
+        """Compute throughput and latency percentiles for the finished batch."""
+        total = self.completed + self.failed
+        p50: Optional[float] = None
+        p95: Optional[float] = None
+        if self.latencies:
+            p50 = statistics.median(self.latencies)
+            p95 = statistics.quantiles(self.latencies, n=20)[-1] if len(self.latencies) > 1 else self.latencies[0]
+        return {
+            "asks": total,
+            "completed": self.completed,
+            "failed": self.failed,
+            "elapsed_s": elapsed,
+            "asks_per_minute": total / elapsed * 60 if elapsed > 0 else 0.0,
+            "p50_s": p50,
+            "p95_s": p95
+        }
+
+
+def print_batch_summary(summary: Dict[str, Any], stream: Optional[IO[str]] = None):
+    """Print the batch throughput and latency report, by default to `report_stream()`."""
+    stream = stream or report_stream()
+    print("\n📈 BATCH SUMMARY", file=stream)
+    print(f"   Asks: {summary['asks']} ({summary['completed']} completed, {summary['failed']} failed)", file=stream)
+    print(f"   Elapsed: {summary['elapsed_s']:.2f}s", file=stream)
+    print(f"   Throughput: {summary['asks_per_minute']:.1f} asks/min", file=stream)
+    if summary["p50_s"] is not None:
+        print(f"   Latency: p50 {summary['p50_s']:.2f}s, p95 {summary['p95_s']:.2f}s", file=stream)
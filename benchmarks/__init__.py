@@ -0,0 +1,3 @@
+"""
+Benchmarks package containing offline performance measurements for the workflow.
+"""
@@ -0,0 +1,106 @@
+"""
+Record a batch of workflow runs to a cassette, then replay it with original and zero latency.
+
+The analysis agent goes through AiAgent's LLM path with one tool round per call (simulated
+model and tool latency, random tool call ids, time-stamped tool results), and the critic is
+the real ClaudeMcpAgent on the stub MCP server. Replays build neither the model client nor
+the MCP server. Every replayed record is compared with the recorded one, so the table shows
+whether replay reproduces the runs and how much of a run is orchestration: the zero-latency
+replay runs at CPU speed and is the one to profile, e.g. with `python -m cProfile`.
+
+Usage:
+    python -m benchmarks.cassette_benchmark --asks 16 --concurrency 4
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, List
+
+os.environ.setdefault("MCP_USE_ANONYMIZED_TELEMETRY", "false")
+
+import main as workflow
+from agents.cassette import get_cassette, set_cassette
+from agents.claude_mcp_agent import ClaudeMcpAgent
+from batch_runner import BatchRunner
+from output_sink import OutputSink, set_output_sink
+from state import Configuration
+from benchmarks.fake_agents import SimulatedToolAnalysisAgent
+from benchmarks.graph_benchmark import use_agents
+from benchmarks.mcp_loop_benchmark import stub_server_config
+
+# Record fields that a replay has to reproduce exactly
+COMPARED_FIELDS = ("analysis_output", "critic_output", "current_iterations", "stop_reason")
+
+
+def run_batch(args: argparse.Namespace, cassette_path: str, mode: str, latency: str = "original") -> Dict[str, Any]:
+    """Run every ask through the graph with the cassette in the given mode."""
+    configuration = Configuration(warm_up_agents=False, output_mode="quiet", max_iterations=args.max_iterations,
+                                  cassette_path=cassette_path, cassette_mode=mode, cassette_latency=latency)
+    start_time = time.perf_counter()
+    workflow.configure_agents(configuration)
+    open_s = time.perf_counter() - start_time
+    set_output_sink(OutputSink())
+    use_agents(lambda: SimulatedToolAnalysisAgent(args.latency, args.tool_latency),
+               lambda: ClaudeMcpAgent(server_config=stub_server_config(args.mcp_latency, args.pattern)))
+
+    source = io.StringIO("".join(json.dumps({"id": number, "ask": f"Question {number}: are social networks good?"})
+                                 + "\n" for number in range(args.asks)))
+    sink = io.StringIO()
+    start_time = time.perf_counter()
+    try:
+        app = workflow.build_graph()
+        summary = asyncio.run(BatchRunner(app, configuration, concurrency=args.concurrency).run(source, sink))
+        elapsed = time.perf_counter() - start_time
+        stats = get_cassette().stats()
+    finally:
+        workflow.cleanup_agents()
+        set_cassette(None)
+    records = sorted((json.loads(line) for line in sink.getvalue().splitlines()), key=lambda record: record["id"])
+    return {"elapsed_s": elapsed, "open_s": open_s, "failed": summary["failed"], "records": records, "stats": stats}
+
+
+def mismatches(recorded: List[Dict[str, Any]], replayed: List[Dict[str, Any]]) -> int:
+    """Count replayed records that differ from the recorded ones in any compared field."""
+    return sum(1 for expected, actual in zip(recorded, replayed)
+               if any(expected.get(field) != actual.get(field) for field in COMPARED_FIELDS))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cassette record/replay benchmark")
+    parser.add_argument("--asks", type=int, default=16, help="Asks per batch")
+    parser.add_argument("--concurrency", type=int, default=4, help="Asks in flight at once")
+    parser.add_argument("--max-iterations", type=int, default=3, help="Maximum iterations per ask")
+    parser.add_argument("--pattern", default="loop_once", help="Critique pattern of the stub MCP server")
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulated model latency per call")
+    parser.add_argument("--tool-latency", type=float, default=0.05, help="Simulated tool latency per call")
+    parser.add_argument("--mcp-latency", type=float, default=0.3, help="Stub Task tool latency per call")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="cassette_")
+    cassette_path = os.path.join(directory, "runs.cassette")
+    try:
+        recorded = run_batch(args, cassette_path, "record")
+        size_kb = (os.path.getsize(cassette_path) + os.path.getsize(cassette_path + ".idx")) / 1024
+        print(f"{args.asks} asks, concurrency {args.concurrency}; recorded {recorded['stats']['recorded']} calls "
+              f"({recorded['stats']['requests']} distinct requests), {size_kb:.0f} KB with the index")
+        print(f"  record           {recorded['elapsed_s']:6.2f}s  {args.asks / recorded['elapsed_s']:7.1f} asks/s  "
+              f"failed {recorded['failed']}")
+        for latency in ("original", "zero"):
+            replayed = run_batch(args, cassette_path, "replay", latency)
+            print(f"  replay {latency:<9} {replayed['elapsed_s']:6.2f}s  "
+                  f"{args.asks / replayed['elapsed_s']:7.1f} asks/s  failed {replayed['failed']}  "
+                  f"replayed {replayed['stats']['replayed']} calls, {replayed['stats']['misses']} misses, "
+                  f"{mismatches(recorded['records'], replayed['records'])} records differ, "
+                  f"cassette opened in {replayed['open_s'] * 1000:.1f}ms")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
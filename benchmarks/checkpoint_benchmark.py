@@ -0,0 +1,115 @@
+"""
+Cost of SQLite checkpointing per workflow run and per checkpoint write.
+
+Runs the main.py graph with zero-latency simulated agents (so only orchestration and
+checkpoint writes are measured) without checkpoints, with uncompressed checkpoints and with
+the default compressed checkpoints, and reports write time and database size per checkpoint.
+
+Usage:
+    python -m benchmarks.checkpoint_benchmark --runs 50 --analysis-chars 4000
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import sqlite3
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+os.environ.setdefault("MCP_USE_ANONYMIZED_TELEMETRY", "false")
+
+import main as workflow
+from checkpointing import CompressedSerializer, open_checkpointer, ainvoke_resumable
+from metrics import METRICS
+from state import Configuration
+from benchmarks.critique_patterns import scripted_analysis
+from benchmarks.fake_agents import SimulatedLatencyAgent, SimulatedCritiqueAgent
+
+
+def padded_analysis_agent(analysis_chars: int) -> SimulatedLatencyAgent:
+    """Analysis agent whose answers are repeated up to `analysis_chars`, like a long Gemini analysis."""
+    def respond(text: str) -> str:
+        analysis = scripted_analysis(text)
+        return (analysis + " ") * max(1, analysis_chars // (len(analysis) + 1))
+    return SimulatedLatencyAgent(respond)
+
+
+def measure(runs: int, path: Optional[str], serde: Any = None) -> Dict[str, Any]:
+    """
+    Run `runs` sequential workflow runs (two loop-backs each) and collect timing and size figures.
+
+    Args:
+        runs: Number of runs
+        path: Checkpoint database, None to run without checkpoints
+        serde: Checkpoint serializer passed to the checkpointer
+
+    Returns:
+        Milliseconds per run, checkpoint counts, write time and bytes per checkpoint
+    """
+    configuration = Configuration(max_iterations=3, warm_up_agents=False, checkpoint_path=path)
+    workflow.configure_agents(configuration)
+    METRICS.reset()
+
+    async def run_all() -> float:
+        async with open_checkpointer(path, serde) as checkpointer:
+            app = workflow.build_graph(checkpointer)
+            start_time = time.perf_counter()
+            for index in range(runs):
+                await ainvoke_resumable(app, workflow.create_initial_state("Benchmark ask", configuration,
+                                                                           run_id=f"bench-{index}"))
+            return time.perf_counter() - start_time
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        elapsed = asyncio.run(run_all())
+
+    result = {"ms_per_run": elapsed / runs * 1000}
+    checkpoint_writes = METRICS.get_histogram("checkpoint_write_seconds", kind="checkpoint")
+    pending_writes = METRICS.get_histogram("checkpoint_write_seconds", kind="writes")
+    if path and checkpoint_writes:
+        with sqlite3.connect(path) as connection:
+            checkpoints, checkpoint_bytes = connection.execute(
+                "SELECT COUNT(*), SUM(LENGTH(checkpoint)) FROM checkpoints").fetchone()
+            write_bytes = connection.execute("SELECT SUM(LENGTH(value)) FROM writes").fetchone()[0] or 0
+        result.update(
+            checkpoints_per_run=checkpoints / runs,
+            write_ms=checkpoint_writes.sum / checkpoint_writes.count * 1000,
+            pending_write_ms=pending_writes.sum / pending_writes.count * 1000 if pending_writes else 0.0,
+            bytes_per_checkpoint=checkpoint_bytes / checkpoints,
+            bytes_per_run=(checkpoint_bytes + write_bytes) / runs
+        )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkpoint write cost benchmark")
+    parser.add_argument("--runs", type=int, default=50, help="Sequential workflow runs per variant")
+    parser.add_argument("--analysis-chars", type=int, default=4000, help="Approximate length of each analysis")
+    args = parser.parse_args()
+
+    workflow.set_agent_factory("gemini", lambda configuration: padded_analysis_agent(args.analysis_chars))
+    workflow.set_agent_factory("claude", lambda configuration: SimulatedCritiqueAgent("loop_twice"))
+
+    with tempfile.TemporaryDirectory() as directory:
+        variants = {
+            "no checkpoints": measure(args.runs, None),
+            "uncompressed": measure(args.runs, os.path.join(directory, "raw.sqlite3"),
+                                    CompressedSerializer(min_bytes=float("inf"))),
+            "compressed": measure(args.runs, os.path.join(directory, "zlib.sqlite3"))
+        }
+    workflow.cleanup_agents()
+
+    baseline = variants["no checkpoints"]["ms_per_run"]
+    print(f"{args.runs} runs, 3 iterations each, ~{args.analysis_chars} chars per analysis")
+    for name, stats in variants.items():
+        line = f"  {name:<15} {stats['ms_per_run']:7.2f} ms/run (+{stats['ms_per_run'] - baseline:6.2f})"
+        if "write_ms" in stats:
+            line += (f"  {stats['checkpoints_per_run']:.0f} checkpoints/run  "
+                     f"write {stats['write_ms']:.3f} ms + pending writes {stats['pending_write_ms']:.3f} ms  "
+                     f"{stats['bytes_per_checkpoint']:8.0f} B/checkpoint  {stats['bytes_per_run']:9.0f} B/run")
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+First-call and steady-state latency of GeminiAgent with per-agent clients, a shared client,
+and a shared client warmed up before the first call.
+
+Real GeminiAgents (LangChain and google-genai clients included) call the local stub Gemini
+API, whose new connections each cost `--handshake-latency` on top of the `--latency` of a
+call, like TCP and TLS setup on the real endpoint. Calls go round-robin over `--agents`
+agents, `--concurrency` at a time. A call is "first" when it is the first on its client, so
+per-agent clients have one first call per agent; the table also shows how long building the
+agents took and how many connections the server saw.
+
+Usage:
+    python -m benchmarks.client_pool_benchmark --agents 8 --calls 48 --concurrency 4
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import HumanMessage
+from agents.gemini_agent import GeminiAgent
+from benchmarks.graph_benchmark import percentile
+from benchmarks.stub_gemini_server import StubGeminiServer
+
+
+class PrivateClientGeminiAgent(GeminiAgent):
+    """GeminiAgent reproducing the previous behaviour: every agent builds its own client."""
+
+    def _get_client_settings(self) -> Optional[Dict[str, Any]]:
+        return None
+
+
+async def run_calls(agents: List[GeminiAgent], calls: int, concurrency: int, warm_up: bool) -> Dict[str, Any]:
+    """Send the calls round-robin over the agents, returning first-call and steady-state latencies."""
+    if warm_up:
+        await asyncio.gather(*(agent.awarm_up(concurrency) for agent in agents))
+    semaphore = asyncio.Semaphore(concurrency)
+    used_clients = set()
+    first: List[float] = []
+    steady: List[float] = []
+
+    async def call(number: int):
+        agent = agents[number % len(agents)]
+        async with semaphore:
+            is_first = id(agent.llm) not in used_clients
+            used_clients.add(id(agent.llm))
+            start_time = time.perf_counter()
+            await agent._aprocess_message_internal(HumanMessage(content=f"Question {number}"))
+            (first if is_first else steady).append(time.perf_counter() - start_time)
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(call(number) for number in range(calls)))
+    return {"elapsed_s": time.perf_counter() - start_time, "first": first, "steady": steady}
+
+
+def measure(args: argparse.Namespace, agent_class, warm_up: bool = False) -> Dict[str, Any]:
+    """
+    Measure one client setup against a freshly started stub server.
+
+    Args:
+        args: Benchmark arguments
+        agent_class: GeminiAgent class (or subclass) to build the agents with
+        warm_up: Warm the clients up before the first call
+
+    Returns:
+        Summary statistics for the run
+    """
+    server = StubGeminiServer(latency=args.latency, handshake_latency=args.handshake_latency).start()
+    os.environ["GEMINI_BASE_URL"] = server.base_url
+    start_time = time.perf_counter()
+    agents = [agent_class(connection_pool_size=args.pool_size) for _ in range(args.agents)]
+    build_s = time.perf_counter() - start_time
+    try:
+        result = asyncio.run(run_calls(agents, args.calls, args.concurrency, warm_up))
+    finally:
+        for agent in agents:
+            agent.cleanup()
+        server.stop()
+    return {
+        "build_s": build_s,
+        "clients": len({id(agent.llm) for agent in agents}),
+        "connections": server.connections,
+        "calls_per_s": args.calls / result["elapsed_s"],
+        "first_ms": 1000 * sum(result["first"]) / len(result["first"]),
+        "steady_p50_ms": 1000 * percentile(result["steady"], 0.5),
+        "steady_p95_ms": 1000 * percentile(result["steady"], 0.95)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GeminiAgent shared client and warm-up benchmark")
+    parser.add_argument("--agents", type=int, default=8, help="GeminiAgents built with identical settings")
+    parser.add_argument("--calls", type=int, default=48, help="Calls sent round-robin over the agents")
+    parser.add_argument("--concurrency", type=int, default=4, help="Calls in flight at once")
+    parser.add_argument("--pool-size", type=int, help="HTTP connections per client (default: SDK default)")
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub latency per call")
+    parser.add_argument("--handshake-latency", type=float, default=0.15, help="Stub setup latency per connection")
+    args = parser.parse_args()
+
+    os.environ.setdefault("GEMINI_API_KEY", "stub")
+    # Build one client up front so the provider SDK imports are not charged to the first setup
+    PrivateClientGeminiAgent()
+
+    print(f"{args.agents} agents, {args.calls} calls, {args.concurrency} in flight, stub "
+          f"{args.latency * 1000:.0f}ms per call + {args.handshake_latency * 1000:.0f}ms per new connection")
+    for label, agent_class, warm_up in (("per-agent clients", PrivateClientGeminiAgent, False),
+                                        ("shared client", GeminiAgent, False),
+                                        ("shared + warm-up", GeminiAgent, True)):
+        stats = measure(args, agent_class, warm_up)
+        print(f"  {label:<18} build {stats['build_s'] * 1000:6.1f}ms  clients {stats['clients']:>2}  "
+              f"connections {stats['connections']:>2}  first call {stats['first_ms']:5.0f}ms  "
+              f"steady p50 {stats['steady_p50_ms']:5.0f}ms p95 {stats['steady_p95_ms']:5.0f}ms  "
+              f"{stats['calls_per_s']:5.1f} calls/s")
+
+
+if __name__ == "__main__":
+    main()
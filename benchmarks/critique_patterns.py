@@ -0,0 +1,71 @@
+"""
+Deterministic analysis and critique texts that drive the workflow through known loop-back patterns.
+
+Every analysis carries a `[revision N]` tag, and every critique repeats the tag of the analysis
+it reviewed. The re-analysis instruction embeds the critique, so the next analysis knows its
+revision number without any shared state, which keeps concurrent runs independent.
+Standard library only, so the stub MCP server can use it too.
+"""
+
+import json
+import re
+
+# Number of critiques with a major issue before a pattern accepts the analysis
+PATTERNS = {
+    "accept": 0,
+    "loop_once": 1,
+    "loop_twice": 2,
+    "always_blocking": 1000
+}
+
+ANALYSES = (
+    "Social networks keep people connected across distances and help communities organize quickly.",
+    "Beyond staying in touch, social networks give small businesses cheap reach and let niche groups "
+    "find each other, while moderate use limits the downsides.",
+    "The main benefits are connection, access to information and economic opportunity; they hold when "
+    "use is deliberate and platforms are transparent about ranking.",
+    "Weighing connection and opportunity against distraction, the net benefit depends on how and how "
+    "long people use social networks, so the answer is a qualified yes."
+)
+
+_REVISION_TAG = re.compile(r"\[revision (\d+)\]")
+
+
+def revision_of(text: str) -> int:
+    """Get the highest `[revision N]` tag in a text, 0 if there is none."""
+    return max((int(match) for match in _REVISION_TAG.findall(text or "")), default=0)
+
+
+def scripted_analysis(instruction: str, converge: bool = False) -> str:
+    """
+    Build the analysis for an instruction, one revision after the critique it addresses.
+
+    Args:
+        instruction: Analysis or re-analysis instruction from the workflow
+        converge: Repeat the first analysis text so consecutive revisions barely change
+
+    Returns:
+        Analysis text tagged with its revision
+    """
+    revision = revision_of(instruction) + 1
+    text = ANALYSES[0] if converge else ANALYSES[(revision - 1) % len(ANALYSES)]
+    return f"{text} [revision {revision}]"
+
+
+def scripted_critique(pattern: str, prompt: str) -> str:
+    """
+    Build the JSON critique a pattern gives for the analysis in `prompt`.
+
+    Args:
+        pattern: Key of `PATTERNS`
+        prompt: Critique instruction containing the tagged analysis
+
+    Returns:
+        JSON critique with a major issue while the pattern keeps looping, minor issues afterwards
+    """
+    revision = max(revision_of(prompt), 1)
+    if revision <= PATTERNS[pattern]:
+        critique = {"critical": [], "major": [f"[revision {revision}] Missing counter-arguments."], "minor": []}
+    else:
+        critique = {"critical": [], "major": [], "minor": [f"[revision {revision}] Could cite a source."]}
+    return json.dumps(critique)
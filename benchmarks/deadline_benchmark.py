@@ -0,0 +1,123 @@
+"""
+Tail latency of workflow runs against slow provider outliers: no hedging versus hedged
+requests, and how a run deadline bounds the slowest runs.
+
+Each simulated call takes the base latency, except a fraction of calls that take
+`--outlier-latency` instead, drawn independently per call so that a hedged duplicate
+of a slow call is usually fast.
+
+Usage:
+    python -m benchmarks.deadline_benchmark --asks 200 --outlier-rate 0.05 --hedge-percentiles 90 95
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import random
+import statistics
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+
+os.environ.setdefault("MCP_USE_ANONYMIZED_TELEMETRY", "false")
+
+import main as workflow
+from checkpointing import ainvoke_resumable
+from deadlines import LATENCIES
+from metrics import METRICS
+from state import Configuration
+from benchmarks.critique_patterns import scripted_analysis, scripted_critique
+from benchmarks.fake_agents import SimulatedLatencyAgent
+
+
+class OutlierLatencyAgent(SimulatedLatencyAgent):
+    """Simulated agent where a fraction of calls, drawn per call rather than per message, are outliers."""
+
+    def __init__(self, outlier_rate: float, outlier_seconds: float, **kwargs):
+        self.outlier_rate = outlier_rate
+        self.outlier_seconds = outlier_seconds
+        super().__init__(**kwargs)
+        self._random = random.Random(self.seed)
+
+    def _delay(self, text: str) -> float:
+        if self._random.random() < self.outlier_rate:
+            return self.outlier_seconds
+        return super()._delay(text)
+
+
+def measure(args: argparse.Namespace, hedge_percentile: Optional[float] = None,
+            deadline_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """Run every ask and summarize run latency percentiles, extra calls and stop reasons."""
+    configuration = Configuration(max_iterations=2, warm_up_agents=False, hedge_percentile=hedge_percentile,
+                                  deadline_seconds=deadline_seconds)
+
+    def agent(respond, seed):
+        return OutlierLatencyAgent(args.outlier_rate, args.outlier_latency, respond=respond,
+                                   latency_seconds=args.latency, jitter_seconds=args.latency / 4, seed=seed)
+
+    workflow.set_agent_factory("gemini", lambda configuration: agent(scripted_analysis, args.seed))
+    workflow.set_agent_factory("claude", lambda configuration: agent(
+        lambda text: scripted_critique("loop_once", text), args.seed + 1))
+    workflow.configure_agents(configuration)
+    METRICS.reset()
+    LATENCIES.reset()
+    app = workflow.build_graph()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def run_one(index: int):
+        async with semaphore:
+            start_time = time.perf_counter()
+            state = await ainvoke_resumable(app, workflow.create_initial_state(f"Benchmark ask #{index}", configuration))
+            return time.perf_counter() - start_time, state["stop_reason"]
+
+    async def run_all():
+        return await asyncio.gather(*(run_one(index) for index in range(args.asks)))
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            results = asyncio.run(run_all())
+        finally:
+            workflow.cleanup_agents()
+
+    latencies = sorted(latency for latency, _ in results)
+    # Cancelled duplicates never report, so the latency histogram counts each logical call once
+    agent_calls = METRICS.get_histogram("agent_latency_seconds", agent="OutlierLatencyAgent", cache="miss").count
+    hedges = sum(METRICS.get_counter("hedged_requests_total", call=key) for key in ("gemini_analysis", "claude_critic"))
+    return {
+        "p50_s": statistics.median(latencies),
+        "p95_s": latencies[int(len(latencies) * 0.95) - 1],
+        "max_s": latencies[-1],
+        "hedged_calls": hedges / agent_calls,
+        "stop_reasons": dict(Counter(stop_reason for _, stop_reason in results))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hedged requests and run deadline benchmark")
+    parser.add_argument("--asks", type=int, default=200, help="Asks per variant")
+    parser.add_argument("--concurrency", type=int, default=20, help="Asks running at the same time")
+    parser.add_argument("--latency", type=float, default=0.05, help="Base simulated latency per call")
+    parser.add_argument("--outlier-rate", type=float, default=0.05, help="Fraction of calls that are outliers")
+    parser.add_argument("--outlier-latency", type=float, default=1.0, help="Latency of an outlier call")
+    parser.add_argument("--hedge-percentiles", type=float, nargs="*", default=[90, 95],
+                        help="Hedging percentiles to compare against no hedging")
+    parser.add_argument("--deadline", type=float, default=0.5, help="Run deadline variant, 0 to skip")
+    parser.add_argument("--seed", type=int, default=5, help="Seed for outlier draws and jitter")
+    args = parser.parse_args()
+
+    variants = {"no hedging": measure(args)}
+    for percentile in args.hedge_percentiles:
+        variants[f"hedge at p{percentile:g}"] = measure(args, hedge_percentile=percentile)
+    if args.deadline:
+        variants[f"deadline {args.deadline:g}s"] = measure(args, deadline_seconds=args.deadline)
+
+    print(f"{args.asks} asks, {args.outlier_rate:.0%} of calls take {args.outlier_latency:g}s "
+          f"instead of ~{args.latency:g}s, 2 iterations")
+    for name, stats in variants.items():
+        print(f"  {name:<16} p50 {stats['p50_s']:.3f}s  p95 {stats['p95_s']:.3f}s  max {stats['max_s']:.3f}s  "
+              f"extra calls {stats['hedged_calls']:5.1%}  stop reasons {stats['stop_reasons']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Stub agents returning canned or scripted responses without calling any provider.
+"""
+
+import asyncio
+import random
+import time
+import uuid
+from typing import Any, AsyncIterator, Callable, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import BaseTool, StructuredTool
+from agents.ai_agent import AiAgent, message_text
+from benchmarks.critique_patterns import scripted_analysis, scripted_critique
+
+CANNED_ANALYSIS = (
+    "Social networks keep people connected across distances, give small businesses cheap reach, "
+    "and help communities organize quickly. The benefits depend on deliberate, moderate use."
+)
+
+CANNED_CRITIQUE = '{"critical": [], "major": [], "minor": ["Could cite a source."]}'
+
+
+class CannedResponseAgent(AiAgent):
+    """Agent answering every message with the same text."""
+
+    def __init__(self, response_text: str):
+        """
+        Initialize the canned agent.
+
+        Args:
+            response_text: Text returned for every message
+        """
+        self.response_text = response_text
+        super().__init__()
+
+    def _initialize_llm(self):
+        return None
+
+    def _process_message_internal(self, message: BaseMessage) -> BaseMessage:
+        return AIMessage(content=self.response_text)
+
+    async def _aprocess_message_internal(self, message: BaseMessage) -> BaseMessage:
+        return AIMessage(content=self.response_text)
+
+    async def _astream_message_internal(self, message: BaseMessage) -> AsyncIterator[str]:
+        yield self.response_text
+
+
+class FakeAnalysisAgent(CannedResponseAgent):
+    """Stand-in for GeminiAgent."""
+
+    def __init__(self, response_text: str = CANNED_ANALYSIS):
+        super().__init__(response_text)
+
+
+class FakeCritiqueAgent(CannedResponseAgent):
+    """Stand-in for ClaudeMcpAgent."""
+
+    def __init__(self, response_text: str = CANNED_CRITIQUE):
+        super().__init__(response_text)
+
+
+class SimulatedLatencyAgent(AiAgent):
+    """
+    Agent answering through a response function after a simulated model latency.
+    The jitter is drawn from a generator seeded with the message text, so a given
+    message always gets the same delay regardless of scheduling order.
+    """
+
+    def __init__(self, respond: Callable[[str], str], latency_seconds: float = 0.0,
+                 jitter_seconds: float = 0.0, seed: int = 0, stream_chunks: int = 8):
+        """
+        Initialize the simulated agent.
+
+        Args:
+            respond: Builds the response text from the message text
+            latency_seconds: Mean simulated latency per call
+            jitter_seconds: Maximum deviation from the mean latency
+            seed: Seed mixed into the per-message jitter
+            stream_chunks: Number of chunks a streamed response is split into
+        """
+        self.respond = respond
+        self.latency_seconds = latency_seconds
+        self.jitter_seconds = jitter_seconds
+        self.seed = seed
+        self.stream_chunks = max(1, stream_chunks)
+        super().__init__()
+
+    def _initialize_llm(self):
+        return None
+
+    def _get_model_settings(self):
+        return {"model": self.__class__.__name__, "latency": self.latency_seconds, "seed": self.seed}
+
+    def _delay(self, text: str) -> float:
+        """Latency for a message: the mean plus a deterministic jitter."""
+        if not self.jitter_seconds:
+            return self.latency_seconds
+        jitter = random.Random(f"{self.seed}:{text}").uniform(-self.jitter_seconds, self.jitter_seconds)
+        return max(0.0, self.latency_seconds + jitter)
+
+    def _process_message_internal(self, message: BaseMessage) -> BaseMessage:
+        text = message_text(message)
+        time.sleep(self._delay(text))
+        return AIMessage(content=self.respond(text))
+
+    async def _aprocess_message_internal(self, message: BaseMessage) -> BaseMessage:
+        text = message_text(message)
+        await asyncio.sleep(self._delay(text))
+        return AIMessage(content=self.respond(text))
+
+    async def _astream_message_internal(self, message: BaseMessage) -> AsyncIterator[str]:
+        text = message_text(message)
+        response = self.respond(text)
+        # Spread the latency over the chunks, like tokens arriving from a provider
+        chunk_delay = self._delay(text) / self.stream_chunks
+        chunk_size = max(1, -(-len(response) // self.stream_chunks))
+        for start in range(0, len(response), chunk_size):
+            await asyncio.sleep(chunk_delay)
+            yield response[start:start + chunk_size]
+
+
+class SimulatedAnalysisAgent(SimulatedLatencyAgent):
+    """Stand-in for GeminiAgent producing revision-tagged analyses."""
+
+    def __init__(self, converge: bool = False, **kwargs):
+        """
+        Args:
+            converge: Return nearly identical analyses so the convergence check ends the loop
+            kwargs: Latency settings passed to SimulatedLatencyAgent
+        """
+        super().__init__(lambda text: scripted_analysis(text, converge=converge), **kwargs)
+
+
+class SimulatedCritiqueAgent(SimulatedLatencyAgent):
+    """Stand-in for ClaudeMcpAgent following a critique pattern."""
+
+    def __init__(self, pattern: str = "accept", **kwargs):
+        """
+        Args:
+            pattern: Critique pattern from `benchmarks.critique_patterns.PATTERNS`
+            kwargs: Latency settings passed to SimulatedLatencyAgent
+        """
+        super().__init__(lambda text: scripted_critique(pattern, text), **kwargs)
+
+
+class SimulatedChatModel(BaseChatModel):
+    """
+    LangChain chat model answering with revision-tagged analyses after a simulated latency.
+    With tools bound, its first answer to a conversation calls the first tool (with a random
+    call id, like a provider would), so agents run a tool round before the analysis.
+    """
+
+    latency_seconds: float = 0.0
+    converge: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "simulated"
+
+    def bind_tools(self, tools: List[BaseTool], **kwargs: Any):
+        return self.bind(tool_names=[tool.name for tool in tools], **kwargs)
+
+    def _respond(self, messages: List[BaseMessage], tool_names: Optional[List[str]]) -> ChatResult:
+        instruction = message_text(messages[0])
+        if tool_names and not any(isinstance(message, ToolMessage) for message in messages):
+            message = AIMessage(content="", tool_calls=[{
+                "name": tool_names[0],
+                "args": {"topic": instruction[:80]},
+                "id": f"call_{uuid.uuid4().hex[:12]}"
+            }])
+        else:
+            message = AIMessage(content=scripted_analysis(instruction, converge=self.converge))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None,
+                  tool_names: Optional[List[str]] = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency_seconds)
+        return self._respond(messages, tool_names)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None,
+                         tool_names: Optional[List[str]] = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency_seconds)
+        return self._respond(messages, tool_names)
+
+
+def reference_tool(latency_seconds: float = 0.0) -> BaseTool:
+    """Sync tool standing in for a web lookup, answering after a simulated latency."""
+
+    def lookup_reference(topic: str) -> str:
+        time.sleep(latency_seconds)
+        return f"Reference notes on {topic[:40]} (retrieved {time.time():.3f})"
+
+    return StructuredTool.from_function(lookup_reference, description="Look up reference notes on a topic.")
+
+
+class SimulatedToolAnalysisAgent(AiAgent):
+    """
+    Stand-in for GeminiAgent that goes through AiAgent's LLM and tool-calling path,
+    backed by `SimulatedChatModel` and `reference_tool`.
+    """
+
+    def __init__(self, latency_seconds: float = 0.0, tool_latency_seconds: float = 0.0):
+        """
+        Args:
+            latency_seconds: Simulated latency per model call
+            tool_latency_seconds: Simulated latency per tool call
+        """
+        self.latency_seconds = latency_seconds
+        super().__init__([reference_tool(tool_latency_seconds)])
+
+    def _initialize_llm(self) -> SimulatedChatModel:
+        return SimulatedChatModel(latency_seconds=self.latency_seconds)
+
+    def _get_model_settings(self):
+        return {"model": "simulated", "latency": self.latency_seconds,
+                "tools": sorted(tool.name for tool in self.tools)}
@@ -0,0 +1,144 @@
+"""
+Time to an accepted answer: serial analysis/critique loop versus candidate fan-out.
+
+Each simulated analysis is accepted by the simulated critic with a fixed probability,
+decided deterministically from the analysis text. The serial loop needs one analysis and
+one critique per attempt; fan-out generates K candidates in parallel and critiques them
+in one batch call whose latency grows with the number of candidates.
+
+Usage:
+    python -m benchmarks.fanout_benchmark --asks 40 --accept-rate 0.4 --candidates 1 2 3 4
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import re
+import statistics
+import time
+import zlib
+from typing import Any, Dict, List
+
+os.environ.setdefault("MCP_USE_ANONYMIZED_TELEMETRY", "false")
+
+import main as workflow
+from state import Configuration
+from benchmarks.critique_patterns import revision_of, scripted_analysis
+from benchmarks.fake_agents import SimulatedLatencyAgent
+
+_CANDIDATE_SECTION = re.compile(r"^Candidate (\d+):\n", re.MULTILINE)
+
+
+def is_accepted(analysis: str, accept_rate: float, seed: int) -> bool:
+    """Deterministic acceptance draw for one analysis text."""
+    return zlib.crc32(f"{seed}:{analysis}".encode("utf-8")) % 1000 < accept_rate * 1000
+
+
+def analysis_response(instruction: str) -> str:
+    """Scripted analysis that differs per ask, revision and candidate hint."""
+    return f"{scripted_analysis(instruction)} (draft {zlib.crc32(instruction.encode('utf-8')) % 9973})"
+
+
+def critique_bucket(analysis: str, accept_rate: float, seed: int) -> Dict[str, List[str]]:
+    """Critique of one analysis: accepted ones only get a minor remark."""
+    revision = max(revision_of(analysis), 1)
+    if is_accepted(analysis, accept_rate, seed):
+        return {"critical": [], "major": [], "minor": [f"[revision {revision}] Could cite a source."]}
+    return {"critical": [], "major": [f"[revision {revision}] Missing counter-arguments."], "minor": []}
+
+
+def critique_response(accept_rate: float, seed: int):
+    """Build the critic's response function handling single and batch critiques."""
+    def respond(instruction: str) -> str:
+        sections = _CANDIDATE_SECTION.split(instruction)
+        if len(sections) == 1:
+            return json.dumps(critique_bucket(instruction, accept_rate, seed))
+        candidates = []
+        for number, analysis in zip(sections[1::2], sections[2::2]):
+            candidates.append(dict(candidate=int(number), **critique_bucket(analysis.strip(), accept_rate, seed)))
+        best = next((entry["candidate"] for entry in candidates if not entry["major"]), 1)
+        return json.dumps({"best": best, "candidates": candidates})
+    return respond
+
+
+class BatchLatencyCritiqueAgent(SimulatedLatencyAgent):
+    """Simulated critic whose latency grows with the number of candidates in the instruction."""
+
+    def __init__(self, per_candidate_seconds: float, **kwargs):
+        self.per_candidate_seconds = per_candidate_seconds
+        super().__init__(**kwargs)
+
+    def _delay(self, text: str) -> float:
+        extra_candidates = max(0, len(_CANDIDATE_SECTION.findall(text)) - 1)
+        return super()._delay(text) + extra_candidates * self.per_candidate_seconds
+
+
+def measure(args: argparse.Namespace, candidate_count: int) -> Dict[str, Any]:
+    """Run every ask concurrently with `candidate_count` candidates and summarize time to acceptance."""
+    configuration = Configuration(max_iterations=args.max_iterations, candidate_count=candidate_count,
+                                  warm_up_agents=False)
+    workflow.set_agent_factory("gemini", lambda configuration: SimulatedLatencyAgent(
+        analysis_response, latency_seconds=args.analysis_latency, jitter_seconds=args.jitter, seed=args.seed))
+    workflow.set_agent_factory("claude", lambda configuration: BatchLatencyCritiqueAgent(
+        args.per_candidate_latency, respond=critique_response(args.accept_rate, args.seed),
+        latency_seconds=args.critique_latency, jitter_seconds=args.jitter, seed=args.seed))
+    workflow.configure_agents(configuration)
+    app = workflow.build_graph()
+
+    async def run_one(index: int):
+        start_time = time.perf_counter()
+        state = await app.ainvoke(workflow.create_initial_state(f"Benchmark ask #{index}", configuration))
+        return time.perf_counter() - start_time, state
+
+    async def run_all():
+        return await asyncio.gather(*(run_one(index) for index in range(args.asks)))
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            results = asyncio.run(run_all())
+        finally:
+            workflow.cleanup_agents()
+
+    accepted = [latency for latency, state in results if state["stop_reason"] == "no_blocking_issues"]
+    iterations = [state["current_iterations"] - 1 for _, state in results]
+    calls_per_iteration = candidate_count + 1 if candidate_count > 1 else 2
+    return {
+        "candidates": candidate_count,
+        "accepted": len(accepted) / len(results),
+        "time_s": statistics.mean(latency for latency, _ in results),
+        "time_to_accept_s": statistics.mean(accepted) if accepted else None,
+        "p95_time_to_accept_s": sorted(accepted)[max(0, int(len(accepted) * 0.95) - 1)] if accepted else None,
+        "iterations": statistics.mean(iterations),
+        "llm_calls": statistics.mean(count * calls_per_iteration for count in iterations)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serial loop versus candidate fan-out benchmark")
+    parser.add_argument("--asks", type=int, default=40, help="Concurrent asks per variant")
+    parser.add_argument("--candidates", type=int, nargs="+", default=[1, 2, 3, 4], help="Candidate counts (1 = serial)")
+    parser.add_argument("--accept-rate", type=float, default=0.4, help="Probability that an analysis is accepted")
+    parser.add_argument("--max-iterations", type=int, default=3, help="Maximum iterations per ask")
+    parser.add_argument("--analysis-latency", type=float, default=0.2, help="Simulated analysis latency")
+    parser.add_argument("--critique-latency", type=float, default=0.1, help="Simulated critique latency")
+    parser.add_argument("--per-candidate-latency", type=float, default=0.02,
+                        help="Extra critique latency per additional candidate in a batch")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Simulated latency jitter")
+    parser.add_argument("--seed", type=int, default=11, help="Seed for acceptance draws and jitter")
+    args = parser.parse_args()
+
+    print(f"{args.asks} asks, accept rate {args.accept_rate:.0%}, max {args.max_iterations} iterations")
+    for candidate_count in args.candidates:
+        stats = measure(args, candidate_count)
+        label = "serial loop" if candidate_count == 1 else f"fan-out K={candidate_count}"
+        time_to_accept = f"{stats['time_to_accept_s']:.3f}s" if stats["time_to_accept_s"] is not None else "n/a"
+        p95 = f"{stats['p95_time_to_accept_s']:.3f}s" if stats["p95_time_to_accept_s"] is not None else "n/a"
+        print(f"  {label:<14} accepted {stats['accepted']:5.0%}  time to accept mean {time_to_accept} p95 {p95}  "
+              f"time per ask {stats['time_s']:.3f}s  "
+              f"iterations {stats['iterations']:.2f}  LLM calls {stats['llm_calls']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
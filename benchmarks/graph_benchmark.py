@@ -0,0 +1,290 @@
+"""
+Offline benchmark suite for the StateGraph from main.py.
+
+Runs the workflow with simulated agents (configurable latency and deterministic jitter) and,
+optionally, the real ClaudeMcpAgent against the local stub MCP server. Scenarios:
+
+    overhead     sequential runs with zero-latency agents: orchestration cost per run
+    concurrency  bursts of 1..64 concurrent runs: throughput and latency percentiles
+    patterns     critique/loop-back patterns: iterations, LLM calls and stop reasons
+    mcp          ClaudeMcpAgent on the stub MCP server for several pool sizes
+
+Results are written as JSON baselines and can be compared against a previous baseline,
+failing with exit status 1 when a metric regressed beyond the tolerance.
+
+Usage:
+    python -m benchmarks.graph_benchmark --output benchmarks/baselines/graph_benchmark.json
+    python -m benchmarks.graph_benchmark --compare benchmarks/baselines/graph_benchmark.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+os.environ.setdefault("MCP_USE_ANONYMIZED_TELEMETRY", "false")
+
+import main as workflow
+from state import Configuration, State
+from benchmarks.critique_patterns import PATTERNS
+from benchmarks.fake_agents import SimulatedAnalysisAgent, SimulatedCritiqueAgent
+
+SCENARIOS = ("overhead", "concurrency", "patterns", "mcp")
+CONCURRENCY_LEVELS = (1, 2, 4, 8, 16, 32, 64)
+BENCHMARK_ASK = "Are social networks good? Let's try to understand the benefits."
+
+# How each metric is judged when comparing against a baseline
+METRIC_DIRECTIONS = {
+    "p50_ms": "lower",
+    "p95_ms": "lower",
+    "wall_s": "lower",
+    "runs_per_s": "higher",
+    "iterations": "exact",
+    "llm_calls": "exact",
+    "stop_reason": "exact"
+}
+
+
+def use_agents(analysis_factory: Callable[[], Any], critique_factory: Callable[[], Any]):
+    """Point the main.py agent registry at the given agent factories."""
+    workflow.set_agent_factory("gemini", lambda configuration: analysis_factory())
+    workflow.set_agent_factory("claude", lambda configuration: critique_factory())
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+async def run_burst(app, configuration: Configuration, runs: int) -> Tuple[float, List[float], List[State]]:
+    """
+    Start `runs` workflow runs at once and wait for all of them.
+
+    Returns:
+        Tuple of (wall-clock seconds, per-run latencies, final states)
+    """
+    async def run_one(index: int) -> Tuple[float, State]:
+        start_time = time.perf_counter()
+        state = await app.ainvoke(workflow.create_initial_state(BENCHMARK_ASK, configuration, run_id=f"bench-{index}"))
+        return time.perf_counter() - start_time, state
+
+    start_time = time.perf_counter()
+    results = await asyncio.gather(*(run_one(index) for index in range(runs)))
+    return time.perf_counter() - start_time, [latency for latency, _ in results], [state for _, state in results]
+
+
+def summarize(wall: float, latencies: List[float], states: List[State]) -> Dict[str, Any]:
+    """Reduce a burst to the metrics stored in baselines."""
+    iterations = [state["current_iterations"] - 1 for state in states]
+    stop_reasons = sorted({state.get("stop_reason") for state in states})
+    return {
+        "runs": len(states),
+        "wall_s": round(wall, 4),
+        "runs_per_s": round(len(states) / wall, 2) if wall > 0 else 0.0,
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "iterations": round(statistics.mean(iterations), 2),
+        "llm_calls": round(statistics.mean(2 * count for count in iterations), 2),
+        "stop_reason": ",".join(str(reason) for reason in stop_reasons)
+    }
+
+
+def measure(configuration: Configuration, runs: int, bursts: int = 1) -> Dict[str, Any]:
+    """
+    Compile the graph and run `bursts` bursts of `runs` concurrent runs after one warm-up run.
+    Node output is discarded so console printing does not dominate the numbers.
+    """
+    workflow.configure_agents(configuration)
+    app = workflow.build_graph()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        async def run_all():
+            await run_burst(app, configuration, 1)
+            wall, latencies, states = 0.0, [], []
+            for _ in range(bursts):
+                burst_wall, burst_latencies, burst_states = await run_burst(app, configuration, runs)
+                wall += burst_wall
+                latencies += burst_latencies
+                states += burst_states
+            return wall, latencies, states
+
+        try:
+            result = summarize(*asyncio.run(run_all()))
+        finally:
+            workflow.cleanup_agents()
+    return result
+
+
+def scenario_overhead(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    """Orchestration cost per run with agents that answer instantly."""
+    results = {}
+    for pattern in ("accept", "loop_twice"):
+        use_agents(SimulatedAnalysisAgent, lambda: SimulatedCritiqueAgent(pattern))
+        results[f"overhead/{pattern}"] = measure(args.configuration, runs=1, bursts=args.overhead_runs)
+    return results
+
+
+def scenario_concurrency(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    """Throughput and latency for bursts of concurrent runs with one loop-back each."""
+    latency = dict(latency_seconds=args.latency, jitter_seconds=args.jitter, seed=args.seed)
+    use_agents(lambda: SimulatedAnalysisAgent(**latency), lambda: SimulatedCritiqueAgent("loop_once", **latency))
+    return {
+        f"concurrency/{level}": measure(args.configuration, runs=level)
+        for level in args.concurrency_levels
+    }
+
+
+def scenario_patterns(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    """Iterations, LLM calls and stop reasons for each critique pattern."""
+    latency = dict(latency_seconds=args.latency, jitter_seconds=args.jitter, seed=args.seed)
+    results = {}
+    for pattern in PATTERNS:
+        use_agents(lambda: SimulatedAnalysisAgent(**latency), lambda: SimulatedCritiqueAgent(pattern, **latency))
+        results[f"patterns/{pattern}"] = measure(args.configuration, runs=4)
+    # Blocking critiques on an analysis that no longer changes end through convergence
+    use_agents(lambda: SimulatedAnalysisAgent(converge=True, **latency),
+               lambda: SimulatedCritiqueAgent("always_blocking", **latency))
+    results["patterns/converging_analysis"] = measure(args.configuration, runs=4)
+    return results
+
+
+def scenario_mcp(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    """Concurrent runs with ClaudeMcpAgent talking to the stub MCP server."""
+    # Imported here so the other scenarios do not load mcp_use
+    from agents import ClaudeMcpAgent
+    from benchmarks.mcp_loop_benchmark import stub_server_config
+
+    latency = dict(latency_seconds=args.latency, jitter_seconds=args.jitter, seed=args.seed)
+    results = {}
+    for pool_size in args.pool_sizes:
+        use_agents(
+            lambda: SimulatedAnalysisAgent(**latency),
+            lambda: ClaudeMcpAgent(server_config=stub_server_config(args.latency, "loop_once"), pool_size=pool_size)
+        )
+        workflow.get_agent("claude")
+        results[f"mcp/pool_{pool_size}"] = measure(args.configuration, runs=args.mcp_runs)
+    return results
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    List metrics that regressed against a baseline.
+
+    Args:
+        baseline: Baseline document previously written by this script
+        current: Current results document
+        tolerance: Allowed relative slowdown for timing metrics (0.25 = 25%)
+
+    Returns:
+        Human-readable regression descriptions, empty when nothing regressed
+    """
+    regressions = []
+    for key, baseline_metrics in baseline.get("results", {}).items():
+        current_metrics = current["results"].get(key)
+        if current_metrics is None:
+            continue
+        for metric, direction in METRIC_DIRECTIONS.items():
+            if metric not in baseline_metrics or metric not in current_metrics:
+                continue
+            expected, actual = baseline_metrics[metric], current_metrics[metric]
+            if direction == "exact":
+                regressed = expected != actual
+            elif direction == "lower":
+                regressed = actual > expected * (1 + tolerance)
+            else:
+                regressed = actual < expected * (1 - tolerance)
+            if regressed:
+                regressions.append(f"{key} {metric}: baseline {expected}, now {actual}")
+    return regressions
+
+
+def print_results(results: Dict[str, Dict[str, Any]]):
+    """Print one line per scenario result."""
+    for key, metrics in results.items():
+        print(
+            f"  {key:<30} runs {metrics['runs']:>3}  wall {metrics['wall_s']:7.3f}s  "
+            f"{metrics['runs_per_s']:8.1f} runs/s  p50 {metrics['p50_ms']:8.2f}ms  p95 {metrics['p95_ms']:8.2f}ms  "
+            f"iterations {metrics['iterations']:.2f}  stop {metrics['stop_reason']}"
+        )
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline StateGraph benchmark suite")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS),
+                        help="Scenarios to run")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated mean latency per agent call")
+    parser.add_argument("--jitter", type=float, default=0.01, help="Simulated latency jitter per agent call")
+    parser.add_argument("--seed", type=int, default=7, help="Seed for the deterministic jitter")
+    parser.add_argument("--overhead-runs", type=int, default=200, help="Sequential runs in the overhead scenario")
+    parser.add_argument("--concurrency-levels", type=int, nargs="+", default=list(CONCURRENCY_LEVELS),
+                        help="Concurrent runs per burst in the concurrency scenario")
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[1, 4], help="MCP pool sizes to compare")
+    parser.add_argument("--mcp-runs", type=int, default=8, help="Concurrent runs in the mcp scenario")
+    parser.add_argument("--stream", action="store_true", help="Stream the analysis like the interactive run")
+    parser.add_argument("--output-mode", choices=("console", "quiet", "jsonl"), default="console",
+                        help="Run output during the benchmark (console output goes to /dev/null)")
+    parser.add_argument("--output", metavar="PATH", help="Write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="Compare against a JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    events_path = os.path.join(tempfile.mkdtemp(), "events.jsonl") if args.output_mode == "jsonl" else None
+    args.configuration = Configuration(max_iterations=3, stream_analysis=args.stream, warm_up_agents=False,
+                                       output_mode=args.output_mode, events_path=events_path)
+    scenario_functions = {
+        "overhead": scenario_overhead,
+        "concurrency": scenario_concurrency,
+        "patterns": scenario_patterns,
+        "mcp": scenario_mcp
+    }
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for scenario in args.scenarios:
+        print(f"Scenario {scenario}")
+        scenario_results = scenario_functions[scenario](args)
+        print_results(scenario_results)
+        results.update(scenario_results)
+
+    document = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "latency_s": args.latency,
+            "jitter_s": args.jitter,
+            "seed": args.seed,
+            "stream": args.stream,
+            "output_mode": args.output_mode
+        },
+        "results": results
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(document, output_file, indent=2, sort_keys=True)
+            output_file.write("\n")
+        print(f"Baseline written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as baseline_file:
+            regressions = compare(json.load(baseline_file), document, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) against {args.compare}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"No regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Critique throughput of ClaudeMcpAgent with and without micro-batching.
+
+Runs against the local stub MCP server, whose Task tool costs a fixed `--latency` per call plus
+`--item-latency` per request it answers, so batching saves the per-call overhead but not the
+per-critique work. Critiques arrive spread evenly over `--spread` seconds, as from concurrent runs.
+Every critique carries its own `[revision N]` tag and the stub echoes it, so answers handed to the
+wrong caller after demultiplexing are counted. The last row runs with a stub that ignores the batch
+format, so every batched critique falls back to a single call.
+
+Usage:
+    python -m benchmarks.mcp_batch_benchmark --critiques 32 --latency 0.5 --batch-sizes 1 4 8
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from typing import Any, Dict, List
+
+os.environ.setdefault("MCP_USE_ANONYMIZED_TELEMETRY", "false")
+
+from langchain_core.messages import HumanMessage
+from agents.claude_mcp_agent import ClaudeMcpAgent
+from benchmarks.critique_patterns import revision_of
+from benchmarks.graph_benchmark import percentile
+from benchmarks.mcp_loop_benchmark import stub_server_config
+
+
+async def run_critiques(agent: ClaudeMcpAgent, critiques: int, spread_seconds: float) -> Dict[str, Any]:
+    """Send the critiques spread over `spread_seconds`, returning wall-clock time, latencies and mismatches."""
+    latencies: List[float] = []
+    mismatched = 0
+
+    async def critique(number: int):
+        nonlocal mismatched
+        await asyncio.sleep(spread_seconds * (number - 1) / critiques)
+        message = HumanMessage(content=f"Critique this analysis: point {number} holds. [revision {number}]")
+        start_time = time.perf_counter()
+        response = await agent._aprocess_message_internal(message)
+        latencies.append(time.perf_counter() - start_time)
+        mismatched += revision_of(response.content) != number
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(critique(number) for number in range(1, critiques + 1)))
+    return {"elapsed_s": time.perf_counter() - start_time, "latencies": latencies, "mismatched": mismatched}
+
+
+def measure(args: argparse.Namespace, batch_size: int, ignore_batches: bool = False) -> Dict[str, Any]:
+    """
+    Measure one batch size against a freshly started stub server.
+
+    Args:
+        args: Benchmark arguments
+        batch_size: Critiques per Task call, 1 for no batching
+        ignore_batches: Start the stub so that it ignores the batch format
+
+    Returns:
+        Summary statistics for the run
+    """
+    server_config = stub_server_config(args.latency, "accept", args.item_latency, ignore_batches)
+    agent = ClaudeMcpAgent(server_config=server_config, pool_size=args.pool_size, batch_size=batch_size,
+                           batch_window_seconds=args.window)
+    try:
+        result = asyncio.run(run_critiques(agent, args.critiques, args.spread))
+        task_calls = sum(agent.session_pool.stats()["calls"])
+        batcher = agent.batcher.stats() if agent.batcher else {"batches": 0, "fallbacks": 0}
+    finally:
+        agent.cleanup()
+    return {
+        "critiques_per_s": args.critiques / result["elapsed_s"],
+        "elapsed_s": result["elapsed_s"],
+        "p50_s": percentile(result["latencies"], 0.5),
+        "p95_s": percentile(result["latencies"], 0.95),
+        "task_calls": task_calls,
+        "batches": batcher["batches"],
+        "fallbacks": batcher["fallbacks"],
+        "mismatched": result["mismatched"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ClaudeMcpAgent micro-batching benchmark")
+    parser.add_argument("--critiques", type=int, default=32, help="Critiques per run")
+    parser.add_argument("--spread", type=float, default=0.2, help="Seconds over which the critiques arrive")
+    parser.add_argument("--latency", type=float, default=0.5, help="Fixed stub Task tool latency per call")
+    parser.add_argument("--item-latency", type=float, default=0.02, help="Stub latency per critique in a call")
+    parser.add_argument("--pool-size", type=int, default=2, help="MCP sessions in the pool")
+    parser.add_argument("--window", type=float, default=0.05, help="Batch window in seconds")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8], help="Batch sizes to compare")
+    args = parser.parse_args()
+
+    print(f"{args.critiques} critiques over {args.spread:.2f}s, stub {args.latency * 1000:.0f}ms per call + "
+          f"{args.item_latency * 1000:.0f}ms per critique, pool of {args.pool_size}, window {args.window * 1000:.0f}ms")
+    runs = [(batch_size, False) for batch_size in args.batch_sizes] + [(max(args.batch_sizes), True)]
+    for batch_size, ignore_batches in runs:
+        stats = measure(args, batch_size, ignore_batches)
+        label = f"batch {batch_size:>2}{' (format ignored)' if ignore_batches else '                 '}"
+        print(f"  {label}  {stats['critiques_per_s']:6.1f} critiques/s  p50 {stats['p50_s']:5.2f}s  "
+              f"p95 {stats['p95_s']:5.2f}s  Task calls {stats['task_calls']:>3}  batches {stats['batches']:>2}  "
+              f"fallbacks {stats['fallbacks']:>2}  mismatched {stats['mismatched']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Per-critique overhead of ClaudeMcpAgent: asyncio.run() per call versus the persistent agent loop.
+
+Runs against the local stub MCP server, so the numbers measure orchestration overhead only.
+
+Usage:
+    python -m benchmarks.mcp_loop_benchmark --calls 20 --latency 0.0
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Optional
+from langchain_core.messages import HumanMessage
+from agents.claude_mcp_agent import ClaudeMcpAgent
+
+STUB_SERVER_PATH = os.path.join(os.path.dirname(__file__), "stub_mcp_server.py")
+
+
+class LegacyLoopClaudeMcpAgent(ClaudeMcpAgent):
+    """ClaudeMcpAgent reproducing the previous behaviour: a fresh asyncio.run() per MCP call."""
+
+    def _start_event_loop(self):
+        pass
+
+    def _stop_event_loop(self):
+        pass
+
+    def _run_coroutine(self, coroutine) -> Any:
+        return asyncio.run(coroutine)
+
+
+def stub_server_config(latency_seconds: float, pattern: Optional[str] = None, item_latency_seconds: float = 0.0,
+                       ignore_batches: bool = False) -> Dict[str, Any]:
+    """Build the STDIO server definition for the stub MCP server."""
+    args = [STUB_SERVER_PATH, "--latency", str(latency_seconds)]
+    if pattern:
+        args += ["--pattern", pattern]
+    if item_latency_seconds:
+        args += ["--item-latency", str(item_latency_seconds)]
+    if ignore_batches:
+        args.append("--ignore-batches")
+    return {"command": sys.executable, "args": args}
+
+
+def measure(agent_class, calls: int, latency_seconds: float) -> Dict[str, Any]:
+    """
+    Measure per-critique latency for one agent implementation.
+
+    Args:
+        agent_class: ClaudeMcpAgent class (or subclass) to benchmark
+        calls: Number of critiques to send
+        latency_seconds: Artificial latency of the stub Task tool
+
+    Returns:
+        Summary statistics for the run
+    """
+    agent = agent_class(server_config=stub_server_config(latency_seconds))
+    durations: List[float] = []
+    failures = 0
+    try:
+        for i in range(calls):
+            message = HumanMessage(content=f"Critique this analysis #{i}")
+            start_time = time.perf_counter()
+            try:
+                agent._process_message_internal(message)
+            except Exception:
+                failures += 1
+            durations.append(time.perf_counter() - start_time)
+    finally:
+        agent.cleanup()
+
+    overheads = [max(d - latency_seconds, 0.0) for d in durations]
+    return {
+        "agent": agent_class.__name__,
+        "calls": calls,
+        "failures": failures,
+        "mean_ms": statistics.fmean(overheads) * 1000,
+        "p50_ms": statistics.median(overheads) * 1000,
+        "p95_ms": statistics.quantiles(overheads, n=20)[-1] * 1000 if len(overheads) > 1 else overheads[0] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ClaudeMcpAgent per-critique overhead benchmark")
+    parser.add_argument("--calls", type=int, default=20, help="Critiques to send per agent")
+    parser.add_argument("--latency", type=float, default=0.0, help="Stub Task tool latency in seconds")
+    args = parser.parse_args()
+
+    print(f"Per-critique overhead over {args.calls} calls (stub latency {args.latency:.3f}s subtracted)")
+    for agent_class in (LegacyLoopClaudeMcpAgent, ClaudeMcpAgent):
+        stats = measure(agent_class, args.calls, args.latency)
+        print(
+            f"  {stats['agent']:<26} mean {stats['mean_ms']:8.2f}ms  "
+            f"p50 {stats['p50_ms']:8.2f}ms  p95 {stats['p95_ms']:8.2f}ms  "
+            f"failures {stats['failures']}/{stats['calls']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
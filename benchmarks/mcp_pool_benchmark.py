@@ -0,0 +1,74 @@
+"""
+Parallel critique throughput of ClaudeMcpAgent for different MCP session pool sizes.
+
+Runs against the local stub MCP server whose Task tool sleeps for a fixed latency.
+
+Usage:
+    python -m benchmarks.mcp_pool_benchmark --critiques 16 --latency 0.2 --pool-sizes 1 2 4 8
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any, Dict
+from langchain_core.messages import HumanMessage
+from agents.claude_mcp_agent import ClaudeMcpAgent
+from benchmarks.mcp_loop_benchmark import stub_server_config
+
+
+async def run_critiques(agent: ClaudeMcpAgent, critiques: int) -> float:
+    """Send all critiques concurrently and return the wall-clock time."""
+    messages = [HumanMessage(content=f"Critique this analysis #{i}") for i in range(critiques)]
+    start_time = time.perf_counter()
+    await asyncio.gather(*(agent._aprocess_message_internal(message) for message in messages))
+    return time.perf_counter() - start_time
+
+
+def measure(pool_size: int, critiques: int, latency_seconds: float) -> Dict[str, Any]:
+    """
+    Measure wall-clock time for a burst of concurrent critiques.
+
+    Args:
+        pool_size: Number of MCP sessions in the pool
+        critiques: Number of concurrent critiques
+        latency_seconds: Artificial latency of the stub Task tool
+
+    Returns:
+        Summary statistics for the run
+    """
+    start_time = time.perf_counter()
+    agent = ClaudeMcpAgent(server_config=stub_server_config(latency_seconds), pool_size=pool_size)
+    warmup = time.perf_counter() - start_time
+    try:
+        elapsed = asyncio.run(run_critiques(agent, critiques))
+        pool_stats = agent.session_pool.stats()
+    finally:
+        agent.cleanup()
+    return {
+        "pool_size": pool_size,
+        "warmup_s": warmup,
+        "elapsed_s": elapsed,
+        "critiques_per_s": critiques / elapsed,
+        "calls_per_session": pool_stats["calls"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ClaudeMcpAgent session pool benchmark")
+    parser.add_argument("--critiques", type=int, default=16, help="Concurrent critiques per run")
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub Task tool latency in seconds")
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[1, 2, 4, 8], help="Pool sizes to compare")
+    args = parser.parse_args()
+
+    print(f"{args.critiques} concurrent critiques, stub latency {args.latency:.3f}s")
+    for pool_size in args.pool_sizes:
+        stats = measure(pool_size, args.critiques, args.latency)
+        print(
+            f"  pool {stats['pool_size']:>2}: warm-up {stats['warmup_s']:6.2f}s  "
+            f"elapsed {stats['elapsed_s']:6.2f}s  {stats['critiques_per_s']:7.1f} critiques/s  "
+            f"calls per session {stats['calls_per_session']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
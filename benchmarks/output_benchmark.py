@@ -0,0 +1,89 @@
+"""
+Cost of run output on concurrent runs: console output to a slow terminal versus the quiet
+mode and the background JSONL event writer.
+
+Console output is written synchronously from the graph nodes, so a terminal or pipe that
+drains at `--terminal-kbps` stalls the event loop every run shares. The quiet mode drops
+events and the JSONL sink only enqueues them for its writer thread.
+
+Usage:
+    python -m benchmarks.output_benchmark --runs 64 --terminal-kbps 500
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import Any, Dict
+
+os.environ.setdefault("MCP_USE_ANONYMIZED_TELEMETRY", "false")
+
+import main as workflow
+from output_sink import ConsoleSink, set_output_sink
+from state import Configuration
+from benchmarks.fake_agents import SimulatedAnalysisAgent, SimulatedCritiqueAgent
+from benchmarks.graph_benchmark import run_burst, summarize, use_agents
+
+
+class SlowStream:
+    """Text stream that blocks its writer like a terminal draining `bytes_per_second`."""
+
+    def __init__(self, bytes_per_second: float):
+        self.bytes_per_second = bytes_per_second
+        self.written = 0
+
+    def write(self, text: str) -> int:
+        size = len(text.encode("utf-8"))
+        self.written += size
+        time.sleep(size / self.bytes_per_second)
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def measure(args: argparse.Namespace, configuration: Configuration, console_stream=None) -> Dict[str, Any]:
+    """Run one burst of concurrent runs with the output of `configuration`."""
+    latency = dict(latency_seconds=args.latency, jitter_seconds=args.latency / 5, seed=args.seed)
+    use_agents(lambda: SimulatedAnalysisAgent(**latency), lambda: SimulatedCritiqueAgent("loop_once", **latency))
+    workflow.configure_agents(configuration)
+    if console_stream is not None:
+        set_output_sink(ConsoleSink(stream=console_stream, tag_runs=True))
+    app = workflow.build_graph()
+    try:
+        result = summarize(*asyncio.run(run_burst(app, configuration, args.runs)))
+    finally:
+        workflow.cleanup_agents()
+        # Closing the JSONL sink waits for its queued events to be written
+        set_output_sink(ConsoleSink())
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run output cost benchmark")
+    parser.add_argument("--runs", type=int, default=64, help="Concurrent runs per variant")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated latency per agent call")
+    parser.add_argument("--terminal-kbps", type=float, default=500, help="Drain rate of the simulated terminal")
+    parser.add_argument("--seed", type=int, default=7, help="Seed for the deterministic jitter")
+    args = parser.parse_args()
+
+    terminal = SlowStream(args.terminal_kbps * 1000)
+    events_path = os.path.join(tempfile.mkdtemp(), "events.jsonl")
+    variants = {
+        "console": measure(args, Configuration(warm_up_agents=False), terminal),
+        "quiet": measure(args, Configuration(warm_up_agents=False, output_mode="quiet")),
+        "jsonl": measure(args, Configuration(warm_up_agents=False, output_mode="jsonl", events_path=events_path))
+    }
+    with open(events_path, "r", encoding="utf-8") as events_file:
+        events = sum(1 for _ in events_file)
+
+    print(f"{args.runs} concurrent runs, one loop-back each, terminal at {args.terminal_kbps:g} kB/s "
+          f"({terminal.written / 1000:.0f} kB of console output, {events} JSONL events)")
+    for name, stats in variants.items():
+        print(f"  {name:<8} wall {stats['wall_s']:6.3f}s  {stats['runs_per_s']:7.1f} runs/s  "
+              f"p50 {stats['p50_ms']:8.2f}ms  p95 {stats['p95_ms']:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
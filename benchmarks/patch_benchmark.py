@@ -0,0 +1,128 @@
+"""
+Output tokens and latency per iteration: full regeneration versus patch-based re-analysis.
+
+The simulated analysis has `--sections` sections and answers in time proportional to the
+text it writes, like a provider generating tokens. The simulated critic raises one major
+issue on a different section for each of the first two critiques, naming it by its [S<n>] id,
+so both modes run the same three iterations.
+
+Usage:
+    python -m benchmarks.patch_benchmark --asks 20 --sections 6
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import re
+import statistics
+from typing import Any, Dict, List
+
+os.environ.setdefault("MCP_USE_ANONYMIZED_TELEMETRY", "false")
+
+import main as workflow
+from metrics import METRICS
+from prompt_budget import estimate_tokens
+from state import Configuration
+from benchmarks.critique_patterns import revision_of
+from benchmarks.fake_agents import SimulatedLatencyAgent
+
+SECTION_TEXT = ("Section {number} weighs one aspect of the question with a claim, the evidence behind it, "
+                "an example from recent research and the limits of that evidence, in about four sentences. ") * 2
+
+_TARGET = re.compile(r"\[S(\d+)\] ")
+
+
+def analysis_response(section_count: int):
+    """Build the analyst: a full sectioned analysis, or edits of the sections in a patch instruction."""
+    def respond(instruction: str) -> str:
+        revision = revision_of(instruction) + 1
+        if "Sections to revise:" in instruction:
+            targets = sorted({int(number) for number in _TARGET.findall(instruction.split("Sections to revise:")[1])})
+            return "\n\n".join(f"[S{number}] {SECTION_TEXT.format(number=number)}[revision {revision}]"
+                               for number in targets)
+        return "\n\n".join(f"{SECTION_TEXT.format(number=number)}[revision {revision}]"
+                           for number in range(1, section_count + 1))
+    return respond
+
+
+def critique_response(instruction: str) -> str:
+    """Raise a major issue on section N for the analysis of revision N, up to revision 2."""
+    revision = max(revision_of(instruction), 1)
+    if revision <= 2:
+        return json.dumps({"critical": [], "major": [f"[S{revision}] [revision {revision}] Needs a counter-example."],
+                           "minor": []})
+    return json.dumps({"critical": [], "major": [], "minor": [f"[S1] [revision {revision}] Could cite a source."]})
+
+
+class GenerationLatencyAgent(SimulatedLatencyAgent):
+    """Simulated agent whose latency grows with the length of its response."""
+
+    def __init__(self, seconds_per_token: float, **kwargs):
+        self.seconds_per_token = seconds_per_token
+        super().__init__(**kwargs)
+
+    def _delay(self, text: str) -> float:
+        return super()._delay(text) + estimate_tokens(self.respond(text)) * self.seconds_per_token
+
+
+def measure(args: argparse.Namespace, patch: bool) -> Dict[str, Any]:
+    """Run every ask and summarize analysis output tokens and latency per iteration."""
+    configuration = Configuration(max_iterations=3, warm_up_agents=False, output_mode="quiet",
+                                  patch_reanalysis=patch, prompt_token_budget=None, convergence_threshold=0.0)
+    workflow.set_agent_factory("gemini", lambda configuration: GenerationLatencyAgent(
+        args.seconds_per_token, respond=analysis_response(args.sections), latency_seconds=args.latency))
+    workflow.set_agent_factory("claude", lambda configuration: GenerationLatencyAgent(
+        args.seconds_per_token / 4, respond=critique_response, latency_seconds=args.latency))
+    workflow.configure_agents(configuration)
+    METRICS.reset()
+    app = workflow.build_graph()
+
+    async def run_all():
+        return await asyncio.gather(*(app.ainvoke(workflow.create_initial_state(f"Benchmark ask #{index}",
+                                                                                configuration))
+                                      for index in range(args.asks)))
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            states = asyncio.run(run_all())
+        finally:
+            workflow.cleanup_agents()
+
+    # In full mode first analyses and re-analyses share the label; they are the same size
+    mode = "patch" if patch else "full"
+    tokens = METRICS.get_histogram("analysis_response_tokens", mode=mode)
+    seconds = METRICS.get_histogram("analysis_seconds", mode=mode)
+    critique_prompts: List[int] = [entry["tokens"] for state in states for entry in state["prompt_sizes"]
+                                   if entry["node"] == "claude_critic" and entry["iteration"] > 1]
+    return {
+        "iterations": statistics.mean(state["current_iterations"] - 1 for state in states),
+        "reanalysis_tokens": tokens.sum / tokens.count if tokens and tokens.count else None,
+        "reanalysis_s": seconds.sum / seconds.count if seconds and seconds.count else None,
+        "critique_prompt_tokens": statistics.mean(critique_prompts) if critique_prompts else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full versus patch-based re-analysis benchmark")
+    parser.add_argument("--asks", type=int, default=20, help="Concurrent asks per mode")
+    parser.add_argument("--sections", type=int, default=6, help="Sections of the simulated analysis")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fixed latency per call")
+    parser.add_argument("--seconds-per-token", type=float, default=0.0005, help="Generation time per output token")
+    args = parser.parse_args()
+
+    full = measure(args, patch=False)
+    patch = measure(args, patch=True)
+    print(f"{args.asks} asks, {args.sections}-section analysis, 2 re-analyses per ask")
+    print(f"  full regeneration  re-analysis ~{full['reanalysis_tokens']:.0f} output tokens, "
+          f"{full['reanalysis_s']:.3f}s; critique prompt after loop-back ~{full['critique_prompt_tokens']:.0f} tokens")
+    print(f"  patch              re-analysis ~{patch['reanalysis_tokens']:.0f} output tokens, "
+          f"{patch['reanalysis_s']:.3f}s; critique prompt after loop-back ~{patch['critique_prompt_tokens']:.0f} tokens")
+    print(f"  saved per re-analysis: {1 - patch['reanalysis_tokens'] / full['reanalysis_tokens']:.0%} output tokens, "
+          f"{1 - patch['reanalysis_s'] / full['reanalysis_s']:.0%} latency; iterations {full['iterations']:.2f} "
+          f"vs {patch['iterations']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Throughput against a provider quota: no retries, retries alone, and retries behind the
+shared client-side rate limiter.
+
+A simulated provider accepts `--quota-rpm` requests per minute and rejects the rest with a
+429-style error carrying a retry-after hint. Many workers call it as fast as they can for
+`--duration` seconds through agents sharing one ProviderGuard.
+
+Usage:
+    python -m benchmarks.rate_limit_benchmark --quota-rpm 1200 --workers 32 --duration 5
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, HumanMessage
+from agents.ai_agent import AiAgent
+from agents.resilience import ProviderError, configure_provider, TokenBucket
+
+PROVIDER = "benchmark"
+
+
+class QuotaExceededError(ProviderError):
+    """429 from the simulated provider."""
+
+
+class QuotaLLM:
+    """Simulated chat model enforcing a requests-per-minute quota on the server side."""
+
+    def __init__(self, quota_rpm: float, latency_seconds: float):
+        self.bucket = TokenBucket(quota_rpm, burst_seconds=1.0)
+        self.latency_seconds = latency_seconds
+        self.accepted = 0
+        self.rejected = 0
+
+    async def ainvoke(self, messages: List[Any]) -> AIMessage:
+        wait = self.bucket.reserve(1)
+        if wait > 0:
+            # Rejected requests do not use up quota
+            self.bucket.adjust(-1)
+            self.rejected += 1
+            raise QuotaExceededError("429 Too Many Requests", rate_limited=True, retry_after=wait)
+        self.accepted += 1
+        await asyncio.sleep(self.latency_seconds)
+        return AIMessage(content="ok")
+
+
+class QuotaAgent(AiAgent):
+    """Agent calling the simulated provider through the shared guard."""
+
+    provider = PROVIDER
+
+    def __init__(self, llm: QuotaLLM):
+        self._llm = llm
+        super().__init__()
+
+    def _initialize_llm(self) -> QuotaLLM:
+        return self._llm
+
+    def _report_processing(self, *args, **kwargs):
+        pass
+
+
+def measure(args: argparse.Namespace, requests_per_minute: Optional[float], max_retries: int) -> Dict[str, Any]:
+    """Run the workers against a fresh provider and summarize throughput, rejections and latency."""
+    configure_provider(PROVIDER, requests_per_minute=requests_per_minute, max_retries=max_retries,
+                       base_delay=0.05, max_delay=1.0, failure_threshold=10 ** 6)
+    llm = QuotaLLM(args.quota_rpm, args.latency)
+    agents = [QuotaAgent(llm) for _ in range(args.workers)]
+    latencies: List[float] = []
+    failures = 0
+
+    async def worker(agent: QuotaAgent, stop_at: float):
+        nonlocal failures
+        while time.perf_counter() < stop_at:
+            start_time = time.perf_counter()
+            try:
+                await agent.aprocess_message(HumanMessage(content="Critique this analysis"))
+                latencies.append(time.perf_counter() - start_time)
+            except ProviderError:
+                failures += 1
+
+    async def run_all():
+        stop_at = time.perf_counter() + args.duration
+        await asyncio.gather(*(worker(agent, stop_at) for agent in agents))
+
+    start_time = time.perf_counter()
+    asyncio.run(run_all())
+    elapsed = time.perf_counter() - start_time
+    return {
+        "completed_per_s": len(latencies) / elapsed,
+        "rejected_per_s": llm.rejected / elapsed,
+        "failed": failures,
+        "p95_s": statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Provider quota throughput benchmark")
+    parser.add_argument("--quota-rpm", type=float, default=1200, help="Requests per minute the provider accepts")
+    parser.add_argument("--workers", type=int, default=32, help="Concurrent callers")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per variant")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated latency of an accepted call")
+    args = parser.parse_args()
+
+    variants = {
+        "no retries": measure(args, None, 0),
+        "retries only": measure(args, None, 3),
+        "shared limiter": measure(args, args.quota_rpm, 3)
+    }
+    print(f"{args.workers} workers, provider quota {args.quota_rpm:g} rpm ({args.quota_rpm / 60:g}/s)")
+    for name, stats in variants.items():
+        p95 = f"{stats['p95_s']:.3f}s" if stats["p95_s"] is not None else "n/a"
+        print(f"  {name:<15} completed {stats['completed_per_s']:6.1f}/s  429s {stats['rejected_per_s']:7.1f}/s  "
+              f"failed {stats['failed']:6d}  p95 {p95}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Hit rate and lookup latency of the semantic cache at growing index sizes.
+
+The corpus is built from question templates filled with a subject, a domain and a region;
+every template also has a paraphrased form. Some subject/domain pairs and one region are never
+stored. The index stores a random subset of the other asks and is queried with:
+    repeat       an ask that is stored, word for word
+    paraphrase   the paraphrased form of a stored ask, which should hit that ask
+    other topic  an ask about a subject/domain pair that is not stored, which should miss
+    region swap  a stored ask moved to the held-out region, one word apart, which should miss
+                 (the key-term guard rejects it whatever the similarity)
+
+Similarities are recorded once per query and the rates are reported for every `--thresholds`.
+
+Usage:
+    python -m benchmarks.semantic_cache_benchmark --sizes 1000 10000 100000
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+os.environ.setdefault("MCP_USE_ANONYMIZED_TELEMETRY", "false")
+
+from semantic_cache import SemanticCache
+
+TEMPLATES = [
+    ("What are the main risks of {s} for {d} in {a}?", "Which risks does {s} pose to {d} in {a}?"),
+    ("How will {s} change {d} in {a}?", "In what ways is {s} going to change {d} in {a}?"),
+    ("What are the pros and cons of using {s} in {d} in {a}?", "Pros and cons of {s} for {d} in {a}"),
+    ("Should companies in {d} invest in {s} in {a}?", "Is investing in {s} worthwhile for {d} companies in {a}?"),
+    ("What regulations apply to {s} in {d} in {a}?", "Which rules govern {s} within {d} in {a}?"),
+    ("Explain the impact of {s} on {d} in {a}", "What impact does {s} have on {d} in {a}?"),
+    ("What skills do {d} teams need for {s} in {a}?", "Which skills should {d} teams build for {s} in {a}?"),
+    ("Compare the costs and benefits of {s} for {d} in {a}", "What are the costs versus benefits of {s} in {d} in {a}?"),
+]
+
+SUBJECTS = [
+    "quantum computing", "remote work", "large language models", "blockchain", "edge computing",
+    "autonomous vehicles", "gene editing", "solar power", "drone delivery", "open source software",
+    "cloud migration", "zero trust security", "robotic process automation", "digital twins", "5G networks",
+    "synthetic data", "carbon capture", "vertical farming", "3D printing", "augmented reality",
+    "microservices", "serverless computing", "biometric authentication", "smart contracts", "predictive analytics",
+    "computer vision", "speech recognition", "wearable sensors", "satellite internet", "battery storage",
+    "hydrogen fuel cells", "low code platforms", "data mesh", "federated learning", "homomorphic encryption",
+    "recommendation systems", "chatbots", "fraud detection models", "supply chain tracking", "telemedicine",
+    "electric trucks", "precision agriculture", "smart grids", "cyber insurance", "passwordless login",
+    "open banking", "central bank digital currencies", "lab grown meat", "exoskeletons", "mixed reality training"
+]
+
+DOMAINS = [
+    "cryptography", "banking", "healthcare", "retail", "logistics", "manufacturing", "education",
+    "insurance", "agriculture", "energy", "telecommunications", "government services", "media",
+    "real estate", "aviation", "shipping", "pharmaceuticals", "legal services", "hospitality", "construction",
+    "mining", "automotive", "gaming", "sports", "fashion", "food delivery", "public transport", "utilities",
+    "accounting", "recruitment", "advertising", "nonprofits", "journalism", "defense", "space exploration",
+    "water management", "waste management", "tourism", "wealth management", "clinical research"
+]
+
+REGIONS = ["Europe", "the United States", "Japan", "India", "Brazil", "Africa", "Canada", "Australia"]
+
+# Share of the subject/domain pairs that are never stored
+HELD_OUT_FRACTION = 0.1
+
+# Region that is never stored
+HELD_OUT_REGION = REGIONS[-1]
+
+
+def combinations(seed: int) -> Tuple[List[Tuple[int, str, str, str]], List[Tuple[int, str, str, str]]]:
+    """Shuffled (template, subject, domain, region) combinations: the storable ones and the held-out topics."""
+    random_source = random.Random(seed)
+    pairs = [(subject, domain) for subject in SUBJECTS for domain in DOMAINS]
+    held_out_pairs = set(random_source.sample(pairs, int(len(pairs) * HELD_OUT_FRACTION)))
+    storable, held_out = [], []
+    for template in range(len(TEMPLATES)):
+        for subject, domain in pairs:
+            for region in REGIONS[:-1]:
+                item = (template, subject, domain, region)
+                (held_out if (subject, domain) in held_out_pairs else storable).append(item)
+    random_source.shuffle(storable)
+    random_source.shuffle(held_out)
+    return storable, held_out
+
+
+def phrase(item: Tuple[int, str, str, str], paraphrased: bool = False) -> str:
+    template, subject, domain, region = item
+    return TEMPLATES[template][1 if paraphrased else 0].format(s=subject, d=domain, a=region)
+
+
+def build(path: str, stored: List[Tuple[int, str, str, str]]) -> Dict[str, float]:
+    """Store every ask through `SemanticCache.store` and reopen the index from disk."""
+    cache = SemanticCache(path, threshold=0.0)
+    start_time = time.perf_counter()
+    for item in stored:
+        cache.store(phrase(item), {"analysis_output": f"Analysis of {phrase(item)}", "critic_output": None,
+                                   "current_iterations": 1, "stop_reason": "no_blocking_issues"})
+    build_seconds = time.perf_counter() - start_time
+    cache.close()
+    start_time = time.perf_counter()
+    SemanticCache(path, threshold=0.0).close()
+    return {
+        "stores_per_s": len(stored) / build_seconds,
+        "open_s": time.perf_counter() - start_time,
+        "vector_mb": os.path.getsize(os.path.join(path, "vectors.f32")) / 1e6
+    }
+
+
+def query(path: str, queries: Dict[str, List[Tuple[str, str]]]) -> Dict[str, List[Tuple[float, bool]]]:
+    """Similarity of the best match of every query and whether it is the expected ask."""
+    cache = SemanticCache(path, threshold=0.0)
+    results = {}
+    for kind, asks in queries.items():
+        results[kind] = []
+        for ask, expected in asks:
+            match = cache.lookup(ask)
+            results[kind].append((match["similarity"], match["ask"] == expected) if match else (0.0, False))
+    stats = cache.stats()
+    cache.close()
+    results["latency"] = [(stats["p50_ms"], True), (stats["p95_ms"], True)]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Semantic cache benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Index sizes")
+    parser.add_argument("--queries", type=int, default=1000, help="Queries of each kind per size")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.7, 0.8, 0.9], help="Thresholds to report")
+    parser.add_argument("--seed", type=int, default=11, help="Seed for the corpus shuffle")
+    args = parser.parse_args()
+
+    storable, held_out = combinations(args.seed)
+    sampler = random.Random(args.seed)
+    print(f"{len(storable)} storable asks, {len(held_out)} about held-out topics")
+    for size in sorted(args.sizes):
+        if size > len(storable):
+            print(f"  size {size}: skipped, the corpus has {len(storable)} storable asks")
+            continue
+        stored = storable[:size]
+        sample = sampler.sample(stored, min(args.queries, size))
+        queries = {
+            "repeat": [(phrase(item), phrase(item)) for item in sample],
+            "paraphrase": [(phrase(item, paraphrased=True), phrase(item)) for item in sample],
+            "other topic": [(phrase(item), None) for item in sampler.sample(held_out, args.queries)],
+            "region swap": [(phrase(item[:3] + (HELD_OUT_REGION,)), None) for item in sample]
+        }
+        path = tempfile.mkdtemp(prefix="semantic_cache_")
+        try:
+            built = build(path, stored)
+            results = query(path, queries)
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+
+        (p50, _), (p95, _) = results.pop("latency")
+        print(f"  size {size}: {built['stores_per_s']:.0f} stores/s, reopened in {built['open_s']:.2f}s, "
+              f"{built['vector_mb']:.0f} MB of vectors; lookup p50 {p50:.2f}ms p95 {p95:.2f}ms")
+        for threshold in args.thresholds:
+            rates = []
+            for kind, outcomes in results.items():
+                hits = [correct for similarity, correct in outcomes if similarity >= threshold]
+                if kind in ("other topic", "region swap"):
+                    rates.append(f"{kind} false hits {len(hits) / len(outcomes):6.1%}")
+                else:
+                    rates.append(f"{kind} hits {len(hits) / len(outcomes):6.1%} "
+                                 f"(correct {sum(hits) / len(outcomes):6.1%})")
+            print(f"    threshold {threshold:.2f}: " + "  ".join(rates))
+
+
+if __name__ == "__main__":
+    main()
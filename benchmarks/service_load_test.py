@@ -0,0 +1,160 @@
+"""
+Load test of the service mode: closed-loop clients POST asks to an in-process `AnalysisService`
+backed by stub agents, so the numbers show the service's own queueing and admission control.
+
+Each load level runs `--clients` clients for `--duration` seconds; a client sends its next ask as
+soon as the previous one is answered and waits `--backoff` seconds after a 503. Levels at and below
+`--concurrency` never queue, levels above `--concurrency + --queue-limit` are partly rejected, and
+the latency of admitted asks stays bounded by the queue instead of growing with the load. The last
+level streams progress events. The fixed cost a `main.py` run pays per ask (startup, imports, MCP
+handshake) is measured by `benchmarks.startup_benchmark`; here it is paid once, at service start.
+
+Usage:
+    python -m benchmarks.service_load_test --clients 4 16 64 --duration 5
+    python -m benchmarks.service_load_test --port 8765 --clients 8   # against a running service
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+os.environ.setdefault("MCP_USE_ANONYMIZED_TELEMETRY", "false")
+
+import main as workflow
+from output_sink import OutputSink, set_output_sink
+from service import AnalysisService, ServiceSink
+from state import Configuration
+from benchmarks.fake_agents import SimulatedAnalysisAgent, SimulatedCritiqueAgent
+from benchmarks.graph_benchmark import percentile, use_agents
+
+
+async def post_ask(connect: Callable, ask: str, stream: bool = False) -> Dict[str, Any]:
+    """POST one ask and read the whole response; NDJSON events are counted when streaming."""
+    start_time = time.perf_counter()
+    reader, writer = await connect()
+    body = json.dumps({"ask": ask, "stream": stream}).encode("utf-8")
+    writer.write(b"POST /asks HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 b"Content-Length: %d\r\n\r\n%s" % (len(body), body))
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    while (await reader.readline()) not in (b"\r\n", b""):
+        pass
+    events, first_event_s = 0, None
+    if stream and status == 200:
+        # Chunked NDJSON: one event per chunk, the last one carries the record
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            if not size:
+                break
+            await reader.readexactly(size + 2)
+            events += 1
+            first_event_s = first_event_s or time.perf_counter() - start_time
+    else:
+        await reader.read()
+    writer.close()
+    return {"status": status, "seconds": time.perf_counter() - start_time, "events": events,
+            "first_event_s": first_event_s}
+
+
+async def run_level(connect: Callable, clients: int, duration: float, backoff: float, stream: bool) -> Dict[str, Any]:
+    """Run `clients` closed-loop clients for `duration` seconds."""
+    stop_at = time.perf_counter() + duration
+    results: List[Dict[str, Any]] = []
+
+    async def client(index: int):
+        sent = 0
+        while time.perf_counter() < stop_at:
+            result = await post_ask(connect, f"Load test ask {index}-{sent}", stream)
+            results.append(result)
+            sent += 1
+            if result["status"] == 503:
+                await asyncio.sleep(backoff)
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(client(index) for index in range(clients)))
+    elapsed = time.perf_counter() - start_time
+    answered = [result for result in results if result["status"] == 200]
+    latencies = [result["seconds"] for result in answered]
+    first_events = [result["first_event_s"] for result in answered if result["first_event_s"] is not None]
+    return {
+        "answered_per_s": len(answered) / elapsed,
+        "rejected": sum(1 for result in results if result["status"] == 503),
+        "requests": len(results),
+        "p50_ms": percentile(latencies, 0.5) * 1000 if latencies else None,
+        "p95_ms": percentile(latencies, 0.95) * 1000 if latencies else None,
+        "events_per_ask": sum(result["events"] for result in answered) / len(answered) if answered else 0,
+        "first_event_ms": percentile(first_events, 0.5) * 1000 if first_events else None
+    }
+
+
+async def start_stub_service(args: argparse.Namespace, socket_path: str) -> Tuple[AnalysisService, Dict[str, float]]:
+    """Start an in-process service on stub agents, timing what a `main.py` run would pay per ask."""
+    latency = dict(latency_seconds=args.latency, jitter_seconds=args.latency / 5, seed=args.seed)
+    use_agents(lambda: SimulatedAnalysisAgent(**latency), lambda: SimulatedCritiqueAgent("loop_once", **latency))
+    configuration = Configuration(warm_up_agents=False, output_mode="quiet")
+    workflow.configure_agents(configuration)
+    sink = set_output_sink(ServiceSink(OutputSink()))
+
+    start_time = time.perf_counter()
+    app = workflow.build_graph()
+    compile_s = time.perf_counter() - start_time
+    await asyncio.gather(workflow.aget_agent("gemini"), workflow.aget_agent("claude"))
+    warm_up_s = time.perf_counter() - start_time - compile_s
+
+    service = AnalysisService(app, configuration, concurrency=args.concurrency, queue_limit=args.queue_limit,
+                              sink=sink)
+    await service.start(socket_path=socket_path)
+    return service, {"compile_s": compile_s, "warm_up_s": warm_up_s}
+
+
+async def run(args: argparse.Namespace):
+    service: Optional[AnalysisService] = None
+    if args.port:
+        connect = lambda: asyncio.open_connection(args.host, args.port)
+        print(f"Target: http://{args.host}:{args.port}")
+    else:
+        socket_path = os.path.join(tempfile.mkdtemp(), "service.sock")
+        service, startup = await start_stub_service(args, socket_path)
+        connect = lambda: asyncio.open_unix_connection(socket_path)
+        print(f"Stub service: {args.concurrency} workers, queue of {args.queue_limit}, {args.latency * 1000:.0f}ms per "
+              f"agent call, one loop-back per ask; graph compiled in {startup['compile_s'] * 1000:.0f}ms and agents "
+              f"warmed in {startup['warm_up_s'] * 1000:.0f}ms, once")
+
+    try:
+        levels = [(clients, False) for clients in args.clients] + [(args.clients[-1], True)]
+        for clients, stream in levels:
+            stats = await run_level(connect, clients, args.duration, args.backoff, stream)
+            latency = (f"p50 {stats['p50_ms']:7.1f}ms  p95 {stats['p95_ms']:7.1f}ms" if stats["p50_ms"] is not None
+                       else "no answers")
+            line = (f"  {clients:>3} clients{' (stream)' if stream else '         '}  "
+                    f"{stats['answered_per_s']:6.1f} asks/s  {latency}  "
+                    f"rejected {stats['rejected']}/{stats['requests']}")
+            if stream:
+                line += f"  {stats['events_per_ask']:.1f} events/ask, first after {stats['first_event_ms']:.1f}ms"
+            print(line)
+    finally:
+        if service:
+            await service.close()
+            workflow.cleanup_agents()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Service mode load test")
+    parser.add_argument("--clients", type=int, nargs="+", default=[4, 16, 64], help="Concurrent clients per level")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per load level")
+    parser.add_argument("--backoff", type=float, default=0.05, help="Client pause after a 503")
+    parser.add_argument("--concurrency", type=int, default=8, help="Workers of the stub service")
+    parser.add_argument("--queue-limit", type=int, default=16, help="Queue limit of the stub service")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated latency per agent call")
+    parser.add_argument("--seed", type=int, default=7, help="Seed for the deterministic jitter")
+    parser.add_argument("--host", default="127.0.0.1", help="Host of a running service (with --port)")
+    parser.add_argument("--port", type=int, help="Port of a running service instead of the stub service")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
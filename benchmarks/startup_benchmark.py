@@ -0,0 +1,117 @@
+"""
+Startup cost of main.py: module import, --help, and time until the first graph node runs
+(plus the full single-iteration run, which includes the Claude MCP server start).
+
+The first-node measurement uses a real GeminiAgent (provider SDK import and client setup)
+whose model call is replaced by a canned answer, and a ClaudeMcpAgent connected to the
+local stub MCP server, so no provider is contacted.
+
+Usage:
+    python -m benchmarks.startup_benchmark --repeats 3
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_command(args: List[str]) -> float:
+    """Run a Python command in a fresh interpreter and return its wall-clock time."""
+    start_time = time.perf_counter()
+    subprocess.run([sys.executable, *args], cwd=REPO_ROOT, capture_output=True, check=True)
+    return time.perf_counter() - start_time
+
+
+def run_first_node_child(process_start: float, warm_up: bool):
+    """Child process: import main, compile the graph and report when the first node starts."""
+    import_start = time.time()
+    import main
+    from langchain_core.messages import AIMessage
+    from agents import GeminiAgent, ClaudeMcpAgent
+    from benchmarks.mcp_loop_benchmark import stub_server_config
+    import_end = time.time()
+
+    first_node = {}
+
+    class ProbeGeminiAgent(GeminiAgent):
+        """GeminiAgent that records the first call instead of contacting Gemini."""
+
+        async def _aprocess_message_internal(self, message):
+            first_node.setdefault("time", time.time())
+            return AIMessage(content="Probe analysis")
+
+    os.environ.setdefault("GEMINI_API_KEY", "startup-benchmark")
+    main.set_agent_factory("gemini", lambda configuration: ProbeGeminiAgent())
+    main.set_agent_factory("claude", lambda configuration: ClaudeMcpAgent(server_config=stub_server_config(0.0)))
+
+    configuration = main.Configuration(max_iterations=1, warm_up_agents=warm_up)
+    main.configure_agents(configuration)
+    if warm_up:
+        main.start_agent_warmup()
+    compile_start = time.time()
+    app = main.build_graph()
+    compile_end = time.time()
+
+    try:
+        asyncio.run(app.ainvoke(main.create_initial_state("Startup probe", configuration)))
+        run_end = time.time()
+    finally:
+        main.cleanup_agents()
+
+    print("STARTUP_RESULT " + json.dumps({
+        "interpreter_s": import_start - process_start,
+        "import_s": import_end - import_start,
+        "compile_s": compile_end - compile_start,
+        "first_node_s": first_node["time"] - process_start,
+        "full_run_s": run_end - process_start
+    }))
+
+
+def measure_first_node(warm_up: bool) -> Dict[str, float]:
+    """Spawn a child process and collect its startup timings."""
+    process_start = time.time()
+    args = ["-m", "benchmarks.startup_benchmark", "--child", str(process_start)]
+    if not warm_up:
+        args.append("--no-warmup")
+    env = dict(os.environ, MCP_USE_ANONYMIZED_TELEMETRY="false")
+    completed = subprocess.run([sys.executable, *args], cwd=REPO_ROOT, capture_output=True, text=True, env=env)
+    for line in completed.stdout.splitlines():
+        if line.startswith("STARTUP_RESULT "):
+            return json.loads(line[len("STARTUP_RESULT "):])
+    raise RuntimeError(f"Startup probe failed: {completed.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="main.py startup benchmark")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per measurement (median is reported)")
+    parser.add_argument("--child", type=float, help=argparse.SUPPRESS)
+    parser.add_argument("--no-warmup", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        run_first_node_child(args.child, warm_up=not args.no_warmup)
+        return
+
+    import_times = [time_command(["-c", "import main"]) for _ in range(args.repeats)]
+    help_times = [time_command(["main.py", "--help"]) for _ in range(args.repeats)]
+    print(f"import main          {statistics.median(import_times):6.2f}s")
+    print(f"main.py --help       {statistics.median(help_times):6.2f}s")
+
+    for warm_up in (False, True):
+        runs = [measure_first_node(warm_up) for _ in range(args.repeats)]
+        label = "with warm-up" if warm_up else "lazy, no warm-up"
+        print(f"first node ({label})")
+        for key in ("interpreter_s", "import_s", "compile_s", "first_node_s", "full_run_s"):
+            print(f"  {key:<14} {statistics.median(run[key] for run in runs):6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
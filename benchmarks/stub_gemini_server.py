@@ -0,0 +1,112 @@
+"""
+Local stand-in for the Gemini REST API, for benchmarks that exercise the real client.
+
+Answers `generateContent` with a fixed reply after `latency` seconds and model metadata
+requests at once. Every new connection first waits `handshake_latency` seconds, standing in
+for the TCP and TLS setup a real endpoint costs, and connections are kept alive, so the
+numbers show how often clients pay for setup. Point GeminiAgent at it with GEMINI_BASE_URL.
+
+Usage:
+    python -m benchmarks.stub_gemini_server --port 8766 --latency 0.2 --handshake-latency 0.15
+"""
+
+import argparse
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Tuple
+
+
+class StubGeminiServer(ThreadingHTTPServer):
+    """Threaded HTTP/1.1 server answering Gemini REST requests, counting connections and requests."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int] = ("127.0.0.1", 0), latency: float = 0.2,
+                 handshake_latency: float = 0.15):
+        super().__init__(address, _StubGeminiHandler)
+        self.latency = latency
+        self.handshake_latency = handshake_latency
+        self.connections = 0
+        self.requests = 0
+        self._counter_lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def count(self, connection: bool = False):
+        with self._counter_lock:
+            if connection:
+                self.connections += 1
+            else:
+                self.requests += 1
+
+    def start(self) -> "StubGeminiServer":
+        """Serve from a daemon thread."""
+        threading.Thread(target=self.serve_forever, name="stub-gemini", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _StubGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; without this, delayed ACKs stall busy connections
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.server.count(connection=True)
+        time.sleep(self.server.handshake_latency)
+
+    def log_message(self, format: str, *args: Any):
+        pass
+
+    def _reply(self, payload: Dict[str, Any]):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        # Model metadata, as fetched by the connection warm-up
+        model = self.path.split("?")[0].rsplit("/", 1)[-1]
+        self._reply({"name": f"models/{model}", "displayName": model})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.server.count()
+        time.sleep(self.server.latency)
+        self._reply({
+            "candidates": [{"content": {"role": "model", "parts": [{"text": "Stub analysis."}]},
+                            "finishReason": "STOP", "index": 0}],
+            "usageMetadata": {"promptTokenCount": 8, "candidatesTokenCount": 3, "totalTokenCount": 11}
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub Gemini REST server")
+    parser.add_argument("--port", type=int, default=8766, help="Port to listen on")
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per generateContent call")
+    parser.add_argument("--handshake-latency", type=float, default=0.15, help="Seconds of setup per new connection")
+    args = parser.parse_args()
+
+    server = StubGeminiServer(("127.0.0.1", args.port), args.latency, args.handshake_latency)
+    print(f"Stub Gemini API on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
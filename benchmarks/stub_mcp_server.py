@@ -0,0 +1,74 @@
+"""
+Local stand-in for the `claude mcp serve` STDIO server.
+Exposes a fake `Task` tool that answers with a canned or scripted critique after a configurable latency.
+Batched prompts (id-tagged `<<<REQUEST id>>>` blocks) get one `<<<ANSWER id>>>` block per request.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+from typing import Optional
+from mcp.server.fastmcp import FastMCP
+
+if not __package__:
+    # Started as a script by the MCP client; make the `benchmarks` package importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.critique_patterns import PATTERNS, scripted_critique
+
+# Critique returned by the fake Task tool, wrapped like Claude Code's JSON responses
+CANNED_CRITIQUE = '{"critical": [], "major": [], "minor": ["Could cite a source."]}'
+
+# Request blocks of a batched prompt, see `agents.mcp_batcher.build_batch_prompt`
+_REQUEST_BLOCK = re.compile(r"<<<REQUEST\s+(\w+)>>>\s*(.*?)\s*<<<END\s+\1>>>", re.DOTALL)
+
+
+def build_server(latency_seconds: float = 0.0, pattern: Optional[str] = None, item_latency_seconds: float = 0.0,
+                 ignore_batches: bool = False) -> FastMCP:
+    """
+    Build the stub MCP server.
+
+    Args:
+        latency_seconds: Artificial delay applied to every Task call
+        pattern: Critique pattern from `benchmarks.critique_patterns`, None for the canned critique
+        item_latency_seconds: Additional delay per request of a Task call, the cost of writing each answer
+        ignore_batches: Answer a batched prompt with a single unframed critique, like a model ignoring the format
+
+    Returns:
+        FastMCP server exposing the fake Task tool
+    """
+    server = FastMCP("claude-code-stub", log_level="WARNING")
+
+    def critique_for(prompt: str) -> str:
+        return scripted_critique(pattern, prompt) if pattern else CANNED_CRITIQUE
+
+    @server.tool(name="Task", description="Fake Claude Code Task tool used for benchmarks.")
+    async def task(description: str, prompt: str, subagent_type: str = "general-purpose") -> str:
+        requests = [] if ignore_batches else _REQUEST_BLOCK.findall(prompt)
+        delay = latency_seconds + item_latency_seconds * max(1, len(requests))
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if requests:
+            text = "\n\n".join(f"<<<ANSWER {request_id}>>>\n{critique_for(query)}\n<<<END {request_id}>>>"
+                                for request_id, query in requests)
+        else:
+            text = critique_for(prompt)
+        return json.dumps({"content": [{"type": "text", "text": text}]})
+
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub Claude Code MCP server")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait in each Task call")
+    parser.add_argument("--pattern", choices=sorted(PATTERNS), help="Scripted critique pattern")
+    parser.add_argument("--item-latency", type=float, default=0.0, help="Additional seconds per request of a call")
+    parser.add_argument("--ignore-batches", action="store_true", help="Answer batched prompts without answer blocks")
+    args = parser.parse_args()
+    build_server(args.latency, args.pattern, args.item_latency, args.ignore_batches).run()
+
+
+if __name__ == "__main__":
+    main()
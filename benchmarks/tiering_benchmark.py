@@ -0,0 +1,115 @@
+"""
+Time per ask with model tiering: one model for every analysis, a faster loop-back tier for
+re-analyses of non-critical critiques, and a fallback tier while the primary model is slow.
+
+Each simulated model has its own latency; `--degraded-rate` of the primary model's calls
+take `--degraded-latency` in the degraded variants. Every ask loops back twice on major issues.
+
+Usage:
+    python -m benchmarks.tiering_benchmark --asks 600 --threshold 0.5
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import statistics
+import time
+from typing import Any, Dict
+
+os.environ.setdefault("MCP_USE_ANONYMIZED_TELEMETRY", "false")
+
+import main as workflow
+from checkpointing import ainvoke_resumable
+from deadlines import LATENCIES
+from metrics import METRICS
+from model_tiers import TIER_POLICY
+from state import Configuration
+from benchmarks.critique_patterns import scripted_analysis, scripted_critique
+from benchmarks.deadline_benchmark import OutlierLatencyAgent
+from benchmarks.fake_agents import SimulatedLatencyAgent
+
+PRIMARY_MODEL = "gemini-2.5-flash"
+LOOP_BACK_MODEL = "gemini-2.5-flash-lite"
+FALLBACK_MODEL = "gemini-2.0-flash"
+
+
+def measure(args: argparse.Namespace, degraded: bool, **tiering) -> Dict[str, Any]:
+    """Run every ask with the given tier settings and summarize time per ask and calls per tier."""
+    configuration = Configuration(max_iterations=3, warm_up_agents=False, output_mode="quiet",
+                                  analysis_model=PRIMARY_MODEL, **tiering)
+    latencies = {PRIMARY_MODEL: args.primary_latency, LOOP_BACK_MODEL: args.loop_back_latency,
+                 FALLBACK_MODEL: args.fallback_latency}
+
+    def analysis_agent(configuration: Configuration):
+        model = configuration.analysis_model
+        outlier_rate = args.degraded_rate if degraded and model == PRIMARY_MODEL else 0.0
+        return OutlierLatencyAgent(outlier_rate, args.degraded_latency, respond=scripted_analysis,
+                                   latency_seconds=latencies[model], jitter_seconds=latencies[model] / 5,
+                                   seed=args.seed)
+
+    workflow.set_agent_factory("gemini", analysis_agent)
+    workflow.set_agent_factory("claude", lambda configuration: SimulatedLatencyAgent(
+        lambda text: scripted_critique("loop_twice", text), latency_seconds=args.critique_latency, seed=args.seed))
+    workflow.configure_agents(configuration)
+    METRICS.reset()
+    LATENCIES.reset()
+    TIER_POLICY.reset()
+    app = workflow.build_graph()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def run_one(index: int) -> float:
+        async with semaphore:
+            start_time = time.perf_counter()
+            await ainvoke_resumable(app, workflow.create_initial_state(f"Benchmark ask #{index}", configuration))
+            return time.perf_counter() - start_time
+
+    async def run_all():
+        return await asyncio.gather(*(run_one(index) for index in range(args.asks)))
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            results = sorted(asyncio.run(run_all()))
+        finally:
+            workflow.cleanup_agents()
+
+    calls = {model: METRICS.get_counter("model_tier_calls_total", tier=tier, model=model)
+             for tier, model in (("primary", PRIMARY_MODEL), ("loop_back", LOOP_BACK_MODEL),
+                                 ("fallback", FALLBACK_MODEL))}
+    return {
+        "mean_s": statistics.mean(results),
+        "p95_s": results[int(len(results) * 0.95) - 1],
+        "calls": {model: int(count) for model, count in calls.items() if count}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model tiering benchmark")
+    parser.add_argument("--asks", type=int, default=600, help="Asks per variant")
+    parser.add_argument("--concurrency", type=int, default=20, help="Asks running at the same time")
+    parser.add_argument("--primary-latency", type=float, default=0.2, help="Latency of the primary model")
+    parser.add_argument("--loop-back-latency", type=float, default=0.08, help="Latency of the loop-back model")
+    parser.add_argument("--fallback-latency", type=float, default=0.12, help="Latency of the fallback model")
+    parser.add_argument("--critique-latency", type=float, default=0.1, help="Latency of a critique")
+    parser.add_argument("--degraded-rate", type=float, default=0.3, help="Slow primary calls when degraded")
+    parser.add_argument("--degraded-latency", type=float, default=1.0, help="Latency of a slow primary call")
+    parser.add_argument("--threshold", type=float, default=0.5, help="p95 latency threshold of a tier")
+    parser.add_argument("--seed", type=int, default=3, help="Seed for outlier draws and jitter")
+    args = parser.parse_args()
+
+    variants = {
+        "single model": measure(args, degraded=False),
+        "loop-back tier": measure(args, degraded=False, loop_back_model=LOOP_BACK_MODEL),
+        "degraded, no fallback": measure(args, degraded=True, loop_back_model=LOOP_BACK_MODEL),
+        "degraded, fallback": measure(args, degraded=True, loop_back_model=LOOP_BACK_MODEL,
+                                      fallback_model=FALLBACK_MODEL, tier_latency_threshold_seconds=args.threshold)
+    }
+    print(f"{args.asks} asks, 3 analyses and 3 critiques each; degraded primary: {args.degraded_rate:.0%} of "
+          f"calls take {args.degraded_latency:g}s")
+    for name, stats in variants.items():
+        calls = ", ".join(f"{model} {count}" for model, count in stats["calls"].items())
+        print(f"  {name:<22} mean {stats['mean_s']:.3f}s  p95 {stats['p95_s']:.3f}s  analyses: {calls}")
+
+
+if __name__ == "__main__":
+    main()
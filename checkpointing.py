@@ -0,0 +1,171 @@
+"""
+Persistent LangGraph checkpoints in SQLite, so an interrupted run resumes from its last completed node.
+"""
+
+import os
+import time
+import zlib
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from metrics import METRICS, SIZE_BUCKETS
+from deadlines import deadline_from_now
+from output_sink import CURRENT_RUN_ID, notice
+
+# Checkpoint database used when a run id is given without an explicit path
+DEFAULT_CHECKPOINT_PATH = ".cache/checkpoints.sqlite3"
+
+# Serialized values smaller than this are stored uncompressed
+COMPRESSION_MIN_BYTES = 512
+
+# Types stored in State besides builtins, allowed when checkpoints are loaded
+CHECKPOINT_ALLOWED_TYPES = [("state", "Configuration")]
+
+_COMPRESSED_SUFFIX = "+zlib"
+
+
+class CompressedSerializer:
+    """
+    LangGraph serializer compressing large serialized values with zlib.
+    The analysis and critique texts dominate every checkpoint and compress well.
+    """
+
+    def __init__(self, serde: Any = None, min_bytes: int = COMPRESSION_MIN_BYTES, level: int = 6):
+        """
+        Initialize the serializer.
+
+        Args:
+            serde: Serializer producing the uncompressed bytes, defaults to LangGraph's msgpack serializer
+            min_bytes: Values smaller than this are stored uncompressed
+            level: zlib compression level
+        """
+        if serde is None:
+            from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+            serde = JsonPlusSerializer(allowed_msgpack_modules=CHECKPOINT_ALLOWED_TYPES)
+        self.serde = serde
+        self.min_bytes = min_bytes
+        self.level = level
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        type_, data = self.serde.dumps_typed(obj)
+        if len(data) >= self.min_bytes:
+            compressed = zlib.compress(data, self.level)
+            if len(compressed) < len(data):
+                type_, data = type_ + _COMPRESSED_SUFFIX, compressed
+        METRICS.observe("checkpoint_value_bytes", len(data), SIZE_BUCKETS)
+        return type_, data
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.endswith(_COMPRESSED_SUFFIX):
+            type_, payload = type_[:-len(_COMPRESSED_SUFFIX)], zlib.decompress(payload)
+        return self.serde.loads_typed((type_, payload))
+
+
+def _create_saver_class():
+    """Build the metered saver class; deferred so langgraph-checkpoint-sqlite is only imported when used."""
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    class MeteredAsyncSqliteSaver(AsyncSqliteSaver):
+        """AsyncSqliteSaver recording the time spent writing checkpoints and pending writes."""
+
+        async def aput(self, config, checkpoint, metadata, new_versions):
+            start_time = time.perf_counter()
+            try:
+                return await super().aput(config, checkpoint, metadata, new_versions)
+            finally:
+                METRICS.observe("checkpoint_write_seconds", time.perf_counter() - start_time, kind="checkpoint")
+
+        async def aput_writes(self, config, writes, task_id, task_path=""):
+            start_time = time.perf_counter()
+            try:
+                return await super().aput_writes(config, writes, task_id, task_path)
+            finally:
+                METRICS.observe("checkpoint_write_seconds", time.perf_counter() - start_time, kind="writes")
+
+    return MeteredAsyncSqliteSaver
+
+
+@asynccontextmanager
+async def open_checkpointer(path: Optional[str], serde: Any = None) -> AsyncIterator[Any]:
+    """
+    Open the SQLite checkpointer on the running event loop.
+
+    Args:
+        path: SQLite file, or None to run without checkpoints
+        serde: Checkpoint serializer, defaults to a CompressedSerializer
+
+    Yields:
+        Checkpoint saver to attach to the compiled graph, or None when `path` is None
+    """
+    if not path:
+        yield None
+        return
+
+    import aiosqlite
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    async with aiosqlite.connect(path) as connection:
+        saver = _create_saver_class()(connection, serde=serde or CompressedSerializer())
+        await saver.setup()
+        yield saver
+
+
+def run_config(run_id: Optional[str], deadline_at: Optional[float] = None) -> Dict[str, Any]:
+    """LangGraph config addressing the checkpoints of one run and carrying its deadline."""
+    configurable = {"deadline_at": deadline_at}
+    if run_id:
+        configurable["thread_id"] = run_id
+    return {"configurable": configurable}
+
+
+async def ainvoke_resumable(app: Any, initial_state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run the graph for `initial_state`, resuming from the run's last checkpoint if there is one.
+    A run that already finished returns its final state without calling any agent. Checkpoints
+    of a different ask under the same run id are discarded and the run starts over.
+    The deadline (`Configuration.deadline_seconds`) starts with this call, so a resumed run
+    gets its full time budget again.
+
+    Args:
+        app: Compiled graph, with or without a checkpointer
+        initial_state: Initial state; its `run_id` is the checkpoint thread id
+
+    Returns:
+        Final state of the run
+    """
+    # Events reported during the run, e.g. agent timings, are tagged with its run id
+    token = CURRENT_RUN_ID.set(initial_state["run_id"])
+    try:
+        return await _ainvoke(app, initial_state)
+    finally:
+        CURRENT_RUN_ID.reset(token)
+
+
+async def _ainvoke(app: Any, initial_state: Dict[str, Any]) -> Dict[str, Any]:
+    """Start, resume or reuse the run of `initial_state`, see `ainvoke_resumable`."""
+    configuration = initial_state.get("configuration")
+    deadline_at = deadline_from_now(configuration.deadline_seconds if configuration else None)
+    if getattr(app, "checkpointer", None) is None:
+        return await app.ainvoke(initial_state, run_config(None, deadline_at))
+
+    config = run_config(initial_state["run_id"], deadline_at)
+    snapshot = await app.aget_state(config)
+    if snapshot.values and snapshot.values.get("ask") != initial_state.get("ask"):
+        # The run id was reused for another question; its checkpoints must not answer this one
+        notice(f"🧷 Run {initial_state['run_id']} has checkpoints of a different ask, starting over")
+        METRICS.increment("checkpoint_resumes_total", outcome="restarted")
+        await app.checkpointer.adelete_thread(initial_state["run_id"])
+        snapshot = await app.aget_state(config)
+    if not snapshot.values:
+        # Sync durability: each checkpoint is on disk before the next node starts an LLM call
+        return await app.ainvoke(initial_state, config, durability="sync")
+    if not snapshot.next:
+        notice(f"🧷 Run {initial_state['run_id']} already completed, reusing its final state")
+        METRICS.increment("checkpoint_resumes_total", outcome="completed")
+        return snapshot.values
+
+    notice(f"🧷 Resuming run {initial_state['run_id']} at {', '.join(snapshot.next)}")
+    METRICS.increment("checkpoint_resumes_total", outcome="resumed")
+    return await app.ainvoke(None, config, durability="sync")
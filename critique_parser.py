@@ -0,0 +1,284 @@
+"""
+Parsing of Claude critiques into the structured {"critical": [], "major": [], "minor": []} shape.
+"""
+
+import difflib
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+SEVERITIES = ("critical", "major", "minor")
+
+# Prefix added by ClaudeMcpAgent to every response
+CLAUDE_RESPONSE_PREFIX = "Claude (via MCP):"
+
+# Item texts that mean "no issue" rather than an actual issue
+_EMPTY_ITEMS = {"", "none", "n/a", "na", "-", "no issues", "none identified", "none found", "nothing"}
+
+_JSON_FENCE = re.compile(r"```(?:json)?\s*([\[{].*?[\]}])\s*```", re.DOTALL | re.IGNORECASE)
+# A severity word is a heading only when followed by ":", a spaced dash or the end of the line,
+# so prose like "Majority of ..." or "Critically, ..." is not taken for an issue
+_SEVERITY_HEADING = re.compile(
+    r"^\s*(?:[#>*_\-\s]*)(critical|major|minor)\b(?:\s+issues?)?(?:\s*\(\d+\))?\s*[*_]*"
+    r"(?:\s*(?::|\s[-\u2013\u2014])\s*[*_]*\s*(.*?)|\s*)$",
+    re.IGNORECASE
+)
+_BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+(.*)$")
+_CANDIDATE_HEADING = re.compile(r"^\s*[#>*_\-\s]*candidate\s*#?(\d+)\b[^\n]*$", re.IGNORECASE | re.MULTILINE)
+# "no critical issues", also with a list of severities: "no critical or major issues", "no critical/major"
+_NEGATED_SEVERITY = re.compile(
+    r"\b(?:no|zero|0|without|not any)\s+(?:\w+\s+)?(?:critical|major|minor)\b"
+    r"(?:\s*(?:,|/|\bor\b|\band\b|\bnor\b)\s*(?:\w+\s+)?(?:critical|major|minor)\b)*",
+    re.IGNORECASE
+)
+_BLOCKING_SEVERITY = re.compile(r"\b(?:critical|major)\b", re.IGNORECASE)
+
+
+class CritiqueParser:
+    """Utility class turning raw critique text into severity buckets."""
+
+    @staticmethod
+    def parse(raw_response: str) -> Dict[str, Any]:
+        """
+        Parse a raw critique into severity buckets.
+
+        Args:
+            raw_response: Critique text returned by the critic agent
+
+        Returns:
+            Dictionary with `critical`, `major` and `minor` item lists, the original
+            `raw_response`, and `parsed` telling whether any structure was found
+        """
+        text = CritiqueParser.strip_prefix(raw_response or "")
+        buckets = CritiqueParser._parse_json(text)
+        if buckets is None:
+            buckets = CritiqueParser._parse_sections(text)
+
+        critique = {severity: [] for severity in SEVERITIES}
+        if buckets is not None:
+            critique.update(buckets)
+        critique["raw_response"] = raw_response
+        critique["parsed"] = buckets is not None
+        return critique
+
+    @staticmethod
+    def parse_batch(raw_response: str, count: int) -> Tuple[Optional[int], List[Dict[str, Any]]]:
+        """
+        Parse a critique of several numbered candidates returned by one critic call.
+
+        Expects `{"best": n, "candidates": [{"candidate": n, "critical": [], ...}]}` or just the
+        list of candidate objects, and falls back to `Candidate n` sections parsed one by one.
+        A response in none of these shapes is read as one critique applying to every candidate.
+
+        Args:
+            raw_response: Critique text returned by the critic agent
+            count: Number of candidates that were critiqued
+
+        Returns:
+            Tuple of (0-based index of the critic's preferred candidate or None,
+            one critique per candidate in the shape returned by `parse`)
+        """
+        text = CritiqueParser.strip_prefix(raw_response or "")
+        best = None
+        sections: Dict[int, str] = {}
+        buckets_by_index: Dict[int, Dict[str, List[str]]] = {}
+
+        for data in CritiqueParser._json_values(text):
+            if isinstance(data, dict):
+                entries = next((value for key, value in data.items()
+                                if "candidate" in str(key).lower() and isinstance(value, list)), None)
+            else:
+                entries = data
+            if not entries or not any(isinstance(entry, dict) for entry in entries):
+                continue
+            if isinstance(data, dict):
+                best = CritiqueParser._candidate_index(data.get("best"), count)
+            for position, entry in enumerate(entries):
+                if not isinstance(entry, dict):
+                    continue
+                number = next((value for key, value in entry.items()
+                               if str(key).lower() in ("candidate", "index", "id")), position + 1)
+                index = CritiqueParser._candidate_index(number, count)
+                if index is not None:
+                    buckets_by_index[index] = CritiqueParser._buckets_from_dict(entry) or {}
+                    sections[index] = json.dumps(entry)
+            break
+
+        if not buckets_by_index:
+            matches = list(_CANDIDATE_HEADING.finditer(text))
+            for match, following in zip(matches, matches[1:] + [None]):
+                index = CritiqueParser._candidate_index(match.group(1), count)
+                if index is not None:
+                    sections[index] = text[match.end():following.start() if following else len(text)]
+                    buckets_by_index[index] = CritiqueParser._parse_sections(sections[index])
+
+        if not buckets_by_index:
+            # No per-candidate structure: parse the response as a single critique rather than
+            # leaving every candidate unparsed, where keys like "critical" would look like issues
+            return best, [CritiqueParser.parse(raw_response) for _ in range(count)]
+
+        critiques = []
+        for index in range(count):
+            critique = {severity: [] for severity in SEVERITIES}
+            buckets = buckets_by_index.get(index)
+            if buckets is not None:
+                critique.update(buckets)
+            critique["raw_response"] = sections.get(index, raw_response)
+            critique["parsed"] = buckets is not None
+            critiques.append(critique)
+        return best, critiques
+
+    @staticmethod
+    def _candidate_index(value: Any, count: int) -> Optional[int]:
+        """Convert a 1-based candidate number into a valid 0-based index."""
+        try:
+            index = int(str(value).strip().lstrip("#")) - 1
+        except (TypeError, ValueError):
+            return None
+        return index if 0 <= index < count else None
+
+    @staticmethod
+    def strip_prefix(text: str) -> str:
+        """Remove the `Claude (via MCP):` prefix from a response."""
+        text = text.strip()
+        if text.startswith(CLAUDE_RESPONSE_PREFIX):
+            text = text[len(CLAUDE_RESPONSE_PREFIX):].strip()
+        return text
+
+    @staticmethod
+    def _parse_json(text: str) -> Optional[Dict[str, List[str]]]:
+        """Parse a JSON object (optionally inside a code fence) into severity buckets."""
+        for data in CritiqueParser._json_objects(text):
+            buckets = CritiqueParser._buckets_from_dict(data)
+            if buckets:
+                return buckets
+        return None
+
+    @staticmethod
+    def _json_objects(text: str) -> List[Dict[str, Any]]:
+        """Decode the JSON objects found in fenced blocks or between the outermost braces."""
+        return [data for data in CritiqueParser._json_values(text) if isinstance(data, dict)]
+
+    @staticmethod
+    def _json_values(text: str) -> List[Any]:
+        """Decode the JSON objects and arrays found in fenced blocks or between the outermost braces or brackets."""
+        candidates = [match.group(1) for match in _JSON_FENCE.finditer(text)]
+        # The outermost pair is tried first, e.g. the array around a list of objects
+        spans = [(text.find(opening), text.rfind(closing)) for opening, closing in ("{}", "[]")]
+        candidates.extend(text[start:end + 1] for start, end in sorted(spans) if start != -1 and end > start)
+
+        values = []
+        for candidate in candidates:
+            try:
+                data = json.loads(candidate)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(data, (dict, list)):
+                values.append(data)
+        return values
+
+    @staticmethod
+    def _buckets_from_dict(data: Dict[str, Any]) -> Optional[Dict[str, List[str]]]:
+        """Collect severity buckets from a JSON object."""
+        # Accept keys such as "critical", "Critical Issues" or "major_issues"
+        buckets: Dict[str, List[str]] = {}
+        for key, value in data.items():
+            severity = next((s for s in SEVERITIES if s in str(key).lower()), None)
+            if severity:
+                buckets.setdefault(severity, []).extend(CritiqueParser._normalize_items(value))
+        return buckets or None
+
+    @staticmethod
+    def _parse_sections(text: str) -> Optional[Dict[str, List[str]]]:
+        """Parse `Critical:` / `**Major issues**` style sections followed by bullet lists."""
+        buckets: Dict[str, List[str]] = {}
+        current = None
+        for line in text.splitlines():
+            heading = _SEVERITY_HEADING.match(line)
+            if heading:
+                current = heading.group(1).lower()
+                buckets.setdefault(current, [])
+                inline = (heading.group(2) or "").strip()
+                if inline:
+                    buckets[current].extend(CritiqueParser._normalize_items(inline))
+                continue
+            bullet = _BULLET.match(line)
+            if current and bullet:
+                buckets[current].extend(CritiqueParser._normalize_items(bullet.group(1)))
+        return buckets or None
+
+    @staticmethod
+    def _normalize_items(value: Any) -> List[str]:
+        """Convert a JSON value or text into a list of non-empty issue strings."""
+        if value is None:
+            return []
+        if isinstance(value, list):
+            items = []
+            for item in value:
+                items.extend(CritiqueParser._normalize_items(item))
+            return items
+        if isinstance(value, dict):
+            text = value.get("issue") or value.get("description") or value.get("text") or json.dumps(value)
+        else:
+            text = str(value)
+        text = text.strip().strip("*_").strip()
+        if text.lower().rstrip(".") in _EMPTY_ITEMS:
+            return []
+        return [text]
+
+    @staticmethod
+    def has_blocking_issues(critique: Dict[str, Any]) -> bool:
+        """
+        Tell whether a parsed critique still has critical or major issues.
+        Unparsed critiques fall back to keyword matching that ignores negations like "no critical issues".
+
+        Args:
+            critique: Result of `parse`
+
+        Returns:
+            True if another analysis iteration is warranted
+        """
+        if critique.get("parsed"):
+            return bool(critique.get("critical") or critique.get("major"))
+        raw = _NEGATED_SEVERITY.sub("", critique.get("raw_response") or "")
+        return _BLOCKING_SEVERITY.search(raw) is not None
+
+
+def analysis_change_ratio(previous: Optional[str], current: Optional[str]) -> float:
+    """
+    Fraction of text that changed between two analyses (0.0 identical, 1.0 completely different).
+
+    Args:
+        previous: Analysis from the previous iteration
+        current: Analysis from the current iteration
+
+    Returns:
+        Change ratio in [0.0, 1.0]
+    """
+    if not previous or not current:
+        return 1.0
+    return 1.0 - difflib.SequenceMatcher(None, previous, current).ratio()
+
+
+def select_best_candidate(preferred: Optional[int], critiques: List[Dict[str, Any]]) -> int:
+    """
+    Pick the candidate with the fewest issues, by severity; the critic's preference breaks ties.
+
+    Args:
+        preferred: 0-based index the critic named as best, or None
+        critiques: One parsed critique per candidate, from `CritiqueParser.parse_batch`
+
+    Returns:
+        0-based index of the selected candidate
+    """
+    def rank(index: int):
+        critique = critiques[index]
+        return (
+            not critique.get("parsed"),
+            len(critique.get("critical") or []),
+            len(critique.get("major") or []),
+            len(critique.get("minor") or []),
+            index != preferred,
+            index
+        )
+    return min(range(len(critiques)), key=rank)
@@ -0,0 +1,179 @@
+"""
+Run deadlines, per-call timeouts and hedged requests for the agent calls made by graph nodes.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+from metrics import METRICS
+
+# Recent latencies kept per call kind to derive the hedging delay
+LATENCY_WINDOW = 200
+
+# Recorded attempts needed before the hedging delay is trusted
+HEDGE_MIN_SAMPLES = 10
+
+# Timers may fire marginally before the wall-clock deadline they were set for
+DEADLINE_SLACK_SECONDS = 0.05
+
+
+class LatencyTracker:
+    """Thread-safe sliding window of recent call latencies, keyed by call kind."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float):
+        with self._lock:
+            self._latencies.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def count(self, key: str) -> int:
+        with self._lock:
+            return len(self._latencies.get(key, ()))
+
+    def percentile(self, key: str, percentile: float) -> Optional[float]:
+        """
+        Latency at `percentile` (0-100) among the recent calls of `key`.
+
+        Returns:
+            Seconds, or None when no attempt of `key` has been recorded yet
+        """
+        with self._lock:
+            latencies = sorted(self._latencies.get(key, ()))
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, max(0, round(percentile / 100 * len(latencies)) - 1))
+        return latencies[index]
+
+    def reset(self):
+        with self._lock:
+            self._latencies.clear()
+
+
+# Process-wide latency window shared by all runs
+LATENCIES = LatencyTracker()
+
+
+def deadline_from_now(seconds: Optional[float]) -> Optional[float]:
+    """Wall-clock deadline `seconds` from now, None for no deadline."""
+    return time.time() + seconds if seconds else None
+
+
+def run_deadline() -> Optional[float]:
+    """
+    Deadline of the graph run calling this, from its LangGraph config (see `checkpointing.run_config`).
+    Kept out of the state so that checkpoints never hold a stale deadline.
+    """
+    from langgraph.config import get_config
+
+    try:
+        return get_config().get("configurable", {}).get("deadline_at")
+    except RuntimeError:
+        # Called outside of a graph run
+        return None
+
+
+def remaining_seconds(deadline_at: Optional[float]) -> Optional[float]:
+    """Seconds left until `deadline_at`, None when there is no deadline."""
+    return None if deadline_at is None else deadline_at - time.time()
+
+
+def deadline_passed(deadline_at: Optional[float]) -> bool:
+    """Whether `deadline_at`, if any, has passed."""
+    remaining = remaining_seconds(deadline_at)
+    return remaining is not None and remaining <= DEADLINE_SLACK_SECONDS
+
+
+def call_timeout(node_timeout: Optional[float], deadline_at: Optional[float]) -> Optional[float]:
+    """Time limit for one call: the node timeout, shortened to what is left of the run deadline."""
+    remaining = remaining_seconds(deadline_at)
+    if remaining is None:
+        return node_timeout
+    return remaining if node_timeout is None else min(node_timeout, remaining)
+
+
+def hedge_delay(key: str, percentile: Optional[float], min_samples: int = HEDGE_MIN_SAMPLES) -> Optional[float]:
+    """Delay before a duplicate request is sent, None when hedging is off or there is too little history."""
+    if percentile is None or LATENCIES.count(key) < min_samples:
+        return None
+    return LATENCIES.percentile(key, percentile)
+
+
+async def _timed(call: Callable[[], Awaitable[Any]], key: str) -> Any:
+    """
+    Await one attempt of a call and record its latency. An attempt cancelled by a timeout or a
+    faster hedge is recorded with the time it ran, a lower bound of its latency, so a slowing
+    provider raises the percentiles instead of dropping out of them.
+    """
+    start_time = time.perf_counter()
+    try:
+        result = await call()
+    except asyncio.CancelledError:
+        LATENCIES.record(key, time.perf_counter() - start_time)
+        raise
+    LATENCIES.record(key, time.perf_counter() - start_time)
+    return result
+
+
+async def _hedged(call: Callable[[], Awaitable[Any]], delay: float, key: str) -> Any:
+    """
+    Start `call`, and a second one if the first has not answered after `delay` seconds.
+    The first successful answer wins and the other call is cancelled; an error only
+    surfaces once both calls have failed.
+    """
+    primary = asyncio.ensure_future(_timed(call, key))
+    tasks = {primary}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        hedge_sent = not done
+        if hedge_sent:
+            tasks.add(asyncio.ensure_future(_timed(call, key)))
+            METRICS.increment("hedged_requests_total", call=key)
+        while True:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                tasks.discard(task)
+                if task.exception() is None:
+                    if hedge_sent:
+                        METRICS.increment("hedged_wins_total", call=key, winner="primary" if task is primary else "hedge")
+                    return task.result()
+                if not tasks:
+                    raise task.exception()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def call_with_deadline(call: Callable[[], Awaitable[Any]], key: str, timeout: Optional[float],
+                             hedge_percentile: Optional[float] = None) -> Any:
+    """
+    Await an agent call under a time limit, optionally hedged, recording its latency.
+
+    Args:
+        call: Factory returning a new awaitable for the call, invoked again for a hedge
+        key: Call kind whose latency history sets the hedging delay, e.g. "gemini_analysis"
+        timeout: Time limit in seconds, None for none
+        hedge_percentile: Latency percentile (0-100) after which a duplicate request is sent, None to disable
+
+    Returns:
+        The call result
+
+    Raises:
+        asyncio.TimeoutError: If no answer arrived in time; in-flight calls are cancelled
+    """
+    if timeout is not None and timeout <= 0:
+        METRICS.increment("call_timeouts_total", call=key)
+        raise asyncio.TimeoutError(f"no time left for {key}")
+    delay = hedge_delay(key, hedge_percentile)
+    awaitable = _hedged(call, delay, key) if delay is not None else _timed(call, key)
+    try:
+        # asyncio.timeout cancels the call in place, without wrapping it in another task
+        async with asyncio.timeout(timeout):
+            return await awaitable
+    except asyncio.TimeoutError:
+        METRICS.increment("call_timeouts_total", call=key)
+        raise
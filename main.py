@@ -1,89 +1,643 @@
+import argparse
+import asyncio
+import sys
+import threading
+import time
+from dataclasses import replace
+from typing import Any, Callable, Dict, List, Optional
 from dotenv import load_dotenv
-from langgraph.graph import StateGraph, END, START
 from langchain_core.messages import HumanMessage
-from state import State, StatePrinter, Configuration
-from agents import GeminiAgent, ClaudeMcpAgent
-from tools import ALL_TOOLS
-from message_printer import MessagePrinter
+from state import State, StatePrinter, Configuration, create_initial_state
+from critique_parser import CritiqueParser, analysis_change_ratio, select_best_candidate
+from prompt_budget import PromptCompactor, estimate_tokens, critique_issues
+from analysis_patch import apply_patch, parse_patch, patch_targets, render_sections, sections_text, split_sections
+from batch_runner import BatchRunner, print_batch_summary
+from metrics import METRICS, COUNT_BUCKETS, SIZE_BUCKETS
+from checkpointing import DEFAULT_CHECKPOINT_PATH, open_checkpointer, ainvoke_resumable
+from deadlines import call_timeout, call_with_deadline, deadline_passed, run_deadline
+from model_tiers import PRIMARY_TIER, TIER_POLICY, record_tier_call, tier_call_key, tier_models
+from output_sink import (ConsoleSink, create_output_sink, emit, get_output_sink, notice, report_stream, reserve_stdout,
+                         set_output_sink)
 
 load_dotenv()
 
-# Initialize Gemini bot instance with tools and memory
-gemini_agent = GeminiAgent()
-claude_agent = ClaudeMcpAgent()
+# Agents are created lazily on first use (or by the background warm-up), so importing
+# this module or running --help does not load provider SDKs or spawn the MCP server
+_configuration = Configuration()
+_response_cache = None
+_agents: Dict[str, Any] = {}
+_agent_locks: Dict[str, threading.Lock] = {}
 
-def gemini_agent_node(state: State) -> State:
+def _create_gemini_agent(configuration: Configuration):
+    from agents import GeminiAgent
+    from tools import ALL_TOOLS
+    return GeminiAgent(
+        tools=ALL_TOOLS,
+        max_tool_rounds=configuration.max_tool_rounds,
+        tool_timeout_seconds=configuration.tool_timeout_seconds,
+        model=configuration.analysis_model,
+        temperature=configuration.analysis_temperature,
+        connection_pool_size=configuration.gemini_connection_pool_size
+    )
+
+def _create_claude_agent(configuration: Configuration):
+    from agents import ClaudeMcpAgent
+    return ClaudeMcpAgent(
+        pool_size=configuration.mcp_pool_size,
+        batch_size=configuration.mcp_batch_size,
+        batch_window_seconds=configuration.mcp_batch_window_seconds
+    )
+
+_agent_factories: Dict[str, Callable[[Configuration], Any]] = {
+    "gemini": _create_gemini_agent,
+    "claude": _create_claude_agent
+}
+
+def set_agent_factory(name: str, factory: Callable[[Configuration], Any]):
+    """Replace the factory used to build an agent, e.g. to run the graph against stub agents."""
+    _agent_factories[name] = factory
+    for agent_name in [agent_name for agent_name in _agents if agent_name.partition("/")[0] == name]:
+        _agents.pop(agent_name).cleanup()
+
+def _agent_configuration(name: str) -> Configuration:
+    """
+    Configuration an agent is built with. "gemini/<tier>" names the Gemini agent of a model
+    tier, built by the "gemini" factory with the tier's model as `analysis_model`.
+    """
+    tier = name.partition("/")[2]
+    if not tier:
+        return _configuration
+    return replace(_configuration, analysis_model=tier_models(_configuration)[tier])
+
+def get_agent(name: str):
+    """
+    Get an agent by name, creating it on first use. Safe to call from several threads.
+    Model tiers other than the primary one are addressed as "gemini/<tier>".
+    """
+    agent = _agents.get(name)
+    if agent is not None:
+        return agent
+
+    with _agent_locks.setdefault(name, threading.Lock()):
+        agent = _agents.get(name)
+        if agent is None:
+            agent = _agent_factories[name.partition("/")[0]](_agent_configuration(name))
+            if _response_cache:
+                agent.set_response_cache(_response_cache)
+            _agents[name] = agent
+    return agent
+
+async def aget_agent(name: str):
+    """Get an agent from a graph node without blocking the event loop while it is created."""
+    agent = _agents.get(name)
+    if agent is None:
+        agent = await asyncio.to_thread(get_agent, name)
+    return agent
+
+def start_agent_warmup() -> threading.Thread:
+    """
+    Create every agent in a background thread, e.g. while the graph compiles.
+    Agents are built in graph order so the first node's agent is ready first.
+    """
+    def warm_up():
+        for name in list(_agent_factories):
+            try:
+                get_agent(name)
+            except Exception as e:
+                notice(f"Warning: Could not warm up {name} agent: {e}")
+
+    thread = threading.Thread(target=warm_up, name="agent-warmup", daemon=True)
+    thread.start()
+    return thread
+
+async def awarm_up_connections(connections: int):
+    """
+    Open `connections` connections of every analysis tier's shared provider client with cheap requests.
+    Awaited on the loop that makes the calls, since async connection pools belong to their loop;
+    a failed warm-up only leaves the connection to the first real call.
+    """
+    async def warm_up(name: str):
+        try:
+            agent = await aget_agent(name)
+            warm = getattr(agent, "awarm_up", None)
+            if warm is not None:
+                await warm(connections)
+        except Exception as e:
+            notice(f"Warning: Could not warm up {name} connections: {e}")
+
+    names = [_tier_agent_name(tier) for tier in tier_models(_configuration)] + ["claude"]
+    await asyncio.gather(*(warm_up(name) for name in names))
+
+def cleanup_agents():
+    """Release resources held by every created agent."""
+    for agent in list(_agents.values()):
+        try:
+            agent.cleanup()
+        except Exception as e:
+            notice(f"Warning: Error during agent cleanup: {e}")
+    _agents.clear()
+
+DEMO_ASK = "Are social networks good? Let's try to understand the benefits. Let's try being concise."
+
+def _record_timing(state: State, node_name: str, seconds: float):
+    """Accumulate time spent in a node into the state timings and report the node as done."""
+    timings = dict(state.get("timings") or {})
+    timings[node_name] = round(timings.get(node_name, 0.0) + seconds, 3)
+    state["timings"] = timings
+    emit("node", state.get("run_id"), node=node_name, seconds=round(seconds, 3),
+         iteration=state.get("current_iterations"))
+
+RE_ANALYSIS_TEMPLATE = "Re-analyze this query addressing the following critique:\n\nOriginal Query: {ask}\n\nCritique to address: {critique}\n\nProvide improved analysis."
+CRITIQUE_TEMPLATE = "Critique this analysis and return JSON with critical, major, minor issues, make it very concise: {analysis}"
+
+# Patch-based re-analysis: sections are addressed by [S<n>] ids in critiques and edits
+PATCH_ANALYSIS_TEMPLATE = (
+    "Revise this analysis to address the following critique, editing only the sections shown.\n\n"
+    "Original Query: {ask}\n\nCritique to address: {critique}\n\nSections to revise:\n{sections}\n\n"
+    "Return only the revised sections, each starting with its [S<n>] id. An id with no text deletes the section; "
+    "a new id after the last section adds one."
+)
+SECTIONED_CRITIQUE_TEMPLATE = (
+    "Critique this analysis and return JSON with critical, major, minor issues, starting each issue with the "
+    "[S<n>] id of the section it concerns, make it very concise: {analysis}"
+)
+PATCHED_CRITIQUE_TEMPLATE = (
+    "Critique these revised sections of an analysis (the other sections were already critiqued) and return JSON "
+    "with critical, major, minor issues, starting each issue with the [S<n>] id of the section it concerns, "
+    "make it very concise: {analysis}"
+)
+
+# Smallest budget left for a compacted payload, even if the template alone is over budget
+MIN_PAYLOAD_TOKENS = 100
+
+def _payload_budget(budget: int, empty_instruction: str) -> int:
+    """Tokens left for the payload once the instruction template is counted."""
+    return max(budget - estimate_tokens(empty_instruction), MIN_PAYLOAD_TOKENS)
+
+def _record_prompt_size(state: State, node_name: str, instruction: str, original_tokens: int):
+    """Record and report the size of a node instruction before and after compaction."""
+    config = state.get("configuration")
+    entry = {
+        "iteration": state.get("current_iterations"),
+        "node": node_name,
+        "tokens": estimate_tokens(instruction),
+        "original_tokens": original_tokens,
+        "budget": config.prompt_token_budget if config else None
+    }
+    state["prompt_sizes"] = (state.get("prompt_sizes") or []) + [entry]
+    METRICS.observe("prompt_tokens", entry["tokens"], SIZE_BUCKETS, node=node_name)
+    if entry["tokens"] < original_tokens:
+        METRICS.increment("prompt_compactions_total", node=node_name)
+    StatePrinter.print_prompt_size(entry, state.get("run_id"))
+
+def _prepare_analysis_instruction(state: State, allow_patch: bool = True) -> str:
+    """
+    Build the (re-)analysis instruction, compacting the critique when it exceeds the prompt budget.
+    With `Configuration.patch_reanalysis`, a critique naming the sections of its issues gets a
+    re-analysis asking for edits to those sections only (`State.patch_targets`).
+    """
+    config = state.get("configuration")
+    budget = config.prompt_token_budget if config else None
+    state["patch_targets"] = None
     # Check if this is a loop-back (critique exists)
-    if state.get("critic_output"):
+    critic_output = state.get("critic_output")
+    if critic_output:
         # Re-analysis with critique context
-        critique = state["critic_output"]["raw_response"]
-        instruction = f"Re-analyze this query addressing the following critique:\n\nOriginal Query: {state['ask']}\n\nCritique to address: {critique}\n\nProvide improved analysis."
+        if allow_patch and config and config.patch_reanalysis:
+            sections = split_sections(state.get("analysis_output"))
+            state["patch_targets"] = patch_targets(critic_output, len(sections))
+        targets = state["patch_targets"]
+
+        def build(critique: str) -> str:
+            if targets:
+                return PATCH_ANALYSIS_TEMPLATE.format(ask=state['ask'], critique=critique,
+                                                      sections=render_sections(sections, targets))
+            return RE_ANALYSIS_TEMPLATE.format(ask=state['ask'], critique=critique)
+
+        critique = critic_output["raw_response"]
+        instruction = build(critique)
+        original_tokens = estimate_tokens(instruction)
+        sent_issues = critique_issues(critic_output)
+        if budget and original_tokens > budget:
+            room = _payload_budget(budget, build(""))
+            critique, omitted, sent_issues = PromptCompactor.compact_critique(
+                critic_output, state.get("addressed_issues") or [], room)
+            if omitted:
+                critique += f"\n\n({omitted} minor or previously raised issues omitted)"
+            instruction = build(critique)
+        # Issues sent once are treated as addressed when later critiques repeat them; omitted ones are not
+        state["addressed_issues"] = list(dict.fromkeys((state.get("addressed_issues") or []) + sent_issues))
     else:
         # First analysis
         instruction = f"Analyze: {state['ask']}"
+        original_tokens = estimate_tokens(instruction)
 
     # Store instruction in state
     state["node_instruction"] = instruction
+    _record_prompt_size(state, "gemini_analysis", instruction, original_tokens)
+    return instruction
+
+async def _call_agent(state: State, key: str, node_timeout: Optional[float], call: Callable[[], Any],
+                      hedge: bool = True) -> Any:
+    """
+    Run an agent call within the node timeout and what is left of the run deadline.
+
+    Args:
+        state: Current state (or candidate task) providing the configuration
+        key: Call kind, used for timeout metrics and the latency history behind hedging
+        node_timeout: Time limit of this node's call, None for none
+        call: Factory returning a new awaitable for the call
+        hedge: Whether a duplicate request may be sent when the call is slow
+
+    Raises:
+        asyncio.TimeoutError: If the call did not finish in time; it has been cancelled
+    """
+    config = state.get("configuration")
+    hedge_percentile = config.hedge_percentile if config and hedge else None
+    return await call_with_deadline(call, key, call_timeout(node_timeout, run_deadline()), hedge_percentile)
+
+def _stop_on_timeout(state: State, node_name: str):
+    """End the run after a timed out call, keeping the best analysis produced so far."""
+    # A call cut short by the run deadline ends the run as "deadline", otherwise the node timed out
+    stop_reason = "deadline" if deadline_passed(run_deadline()) else "node_timeout"
+    state["stop_reason"] = stop_reason
+    METRICS.increment("workflow_runs_total", stop_reason=stop_reason)
+    METRICS.observe("workflow_iterations", state.get("current_iterations", 1) - 1, COUNT_BUCKETS)
+    label = "Deadline reached" if stop_reason == "deadline" else "Node timeout"
+    notice(f"\n⌛ {label} during {node_name}, finishing with the best analysis so far", state.get("run_id"))
+
+def _select_tier(state: State) -> str:
+    """Choose the model tier of the next analysis from the critique it addresses and recent tier latencies."""
+    config = state.get("configuration")
+    tier = TIER_POLICY.select(config, state.get("critic_output")) if config else PRIMARY_TIER
+    state["model_tier"] = tier
+    if tier != PRIMARY_TIER:
+        notice(f"🪜 Analysis tier: {tier} ({tier_models(config)[tier]})", state.get("run_id"))
+    return tier
+
+def _tier_agent_name(tier: str) -> str:
+    return "gemini" if tier == PRIMARY_TIER else f"gemini/{tier}"
+
+def _record_tier_call(config: Optional[Configuration], tier: str, seconds: float):
+    if config:
+        record_tier_call(tier, tier_models(config)[tier], seconds)
+
+async def gemini_agent_node(state: State) -> State:
+    config = state.get("configuration")
+    # Chosen before the instruction is prepared, while critic_output still holds the critique to address
+    tier = _select_tier(state)
+    instruction = _prepare_analysis_instruction(state)
+    targets = state.get("patch_targets")
+    # A patch is not readable as it arrives; the patched analysis is shown once applied
+    streaming = bool(config and config.stream_analysis) and not targets
 
     # Create message for AI agent and get response
     agent_message = HumanMessage(content=instruction)
-    response_message = gemini_agent.process_message(agent_message)
+    start_time = time.perf_counter()
+    with METRICS.span("gemini_analysis", run_id=state.get("run_id"), iteration=state.get("current_iterations")):
+        gemini_agent = await aget_agent(_tier_agent_name(tier))
 
-    # Extract analysis output from response
-    state["analysis_output"] = response_message.content
+        async def stream_analysis() -> str:
+            # Print the analysis as it is generated
+            StatePrinter.print_analysis_header(state)
+            chunks = []
+            async for chunk in gemini_agent.astream_message(agent_message):
+                StatePrinter.print_analysis_chunk(chunk)
+                chunks.append(chunk)
+            return "".join(chunks)
+
+        async def analyze(message: HumanMessage = agent_message) -> str:
+            response_message = await gemini_agent.aprocess_message(message)
+            return response_message.content
+
+        timeout = config.analysis_timeout_seconds if config else None
+        edits = None
+        try:
+            # A streamed analysis is printed as it arrives, so it is never hedged
+            analysis = await _call_agent(state, tier_call_key(tier), timeout,
+                                         stream_analysis if streaming else analyze, hedge=not streaming)
+            edits = parse_patch(analysis) if targets else None
+            if targets and not edits:
+                # No [S<n>] markers: the response only holds the targeted sections, never the whole analysis
+                if len(targets) == 1 and analysis.strip():
+                    METRICS.increment("analysis_patch_fallbacks_total", recovery="single_section")
+                    edits = {targets[0]: analysis.strip()}
+                else:
+                    METRICS.increment("analysis_patch_fallbacks_total", recovery="full_analysis")
+                    notice("🩹 Patch response named no sections, re-analyzing in full", state.get("run_id"))
+                    targets = None
+                    full_message = HumanMessage(content=_prepare_analysis_instruction(state, allow_patch=False))
+                    analysis = await _call_agent(state, tier_call_key(tier), timeout, lambda: analyze(full_message))
+        except asyncio.TimeoutError:
+            analysis = None
+    seconds = time.perf_counter() - start_time
+    _record_timing(state, "gemini_analysis", seconds)
+
+    if analysis is None:
+        # The previous analysis stays in analysis_output
+        _stop_on_timeout(state, "gemini_analysis")
+        return state
+
+    _record_tier_call(config, tier, seconds)
+    METRICS.observe("analysis_response_tokens", estimate_tokens(analysis), SIZE_BUCKETS,
+                    mode="patch" if targets else "full")
+    METRICS.observe("analysis_seconds", seconds, mode="patch" if targets else "full")
+    # Keep the previous analysis to detect convergence between iterations
+    state["previous_analysis_output"] = state.get("analysis_output")
+    state["patched_sections"] = None
+    if targets:
+        analysis, state["patched_sections"] = apply_patch(state["analysis_output"], edits)
+        notice(f"🩹 Patched sections {', '.join(f'S{number}' for number in sorted(edits))}", state.get("run_id"))
+    state["analysis_output"] = analysis
     state["critic_output"] = None
-    StatePrinter.print_analysis_only(state)
+    if streaming:
+        StatePrinter.print_analysis_footer(state)
+    else:
+        StatePrinter.print_analysis_only(state)
     return state
 
-def claude_agent_node(state: State) -> State:
+async def claude_agent_node(state: State) -> State:
+    if state.get("stop_reason"):
+        # The analysis call timed out: nothing new to critique, should_continue_analysis ends the run.
+        # Checked here rather than in a conditional edge, which LangGraph would evaluate after every analysis
+        return state
+    config = state.get("configuration")
+    budget = config.prompt_token_budget if config else None
     # Create instruction for Claude
-    instruction = f"Critique this analysis and return JSON with critical, major, minor issues, make it very concise: {state['analysis_output']}"
+    analysis = state['analysis_output']
+    template = CRITIQUE_TEMPLATE
+    if config and config.patch_reanalysis:
+        # Sections are numbered so issues can name them; after a patch only the changed ones are shown
+        patched = state.get("patched_sections")
+        template = PATCHED_CRITIQUE_TEMPLATE if patched else SECTIONED_CRITIQUE_TEMPLATE
+        analysis = render_sections(split_sections(analysis), patched or None)
+    instruction = template.format(analysis=analysis)
+    original_tokens = estimate_tokens(instruction)
+    if budget and original_tokens > budget:
+        room = _payload_budget(budget, template.format(analysis=""))
+        instruction = template.format(analysis=PromptCompactor.compact_text(analysis, room))
 
     # Store instruction in state
     state["node_instruction"] = instruction
+    _record_prompt_size(state, "claude_critic", instruction, original_tokens)
 
     # Create message for AI agent and get response
     agent_message = HumanMessage(content=instruction)
-    response_message = claude_agent.process_message(agent_message)
+    start_time = time.perf_counter()
+    with METRICS.span("claude_critic", run_id=state.get("run_id"), iteration=state.get("current_iterations")):
+        claude_agent = await aget_agent("claude")
+        try:
+            response_message = await _call_agent(state, "claude_critic",
+                                                 config.critique_timeout_seconds if config else None,
+                                                 lambda: claude_agent.aprocess_message(agent_message))
+        except asyncio.TimeoutError:
+            response_message = None
+    _record_timing(state, "claude_critic", time.perf_counter() - start_time)
+
+    if response_message is None:
+        # Keep the uncritiqued analysis: it was written to address the previous critique
+        _stop_on_timeout(state, "claude_critic")
+        return state
+
+    # Parse the critique into critical/major/minor buckets
+    state["critic_output"] = CritiqueParser.parse(response_message.content)
+    # Increment iteration counter
+    state["current_iterations"] = state.get("current_iterations", 0) + 1
+    StatePrinter.print_critic_only(state)
+    _update_stop_reason(state)
+    return state
+
+BATCH_CRITIQUE_TEMPLATE = (
+    "Critique each of these {count} candidate analyses and return JSON "
+    '{{"best": <candidate number>, "candidates": [{{"candidate": <number>, "critical": [], "major": [], "minor": []}}]}}, '
+    "make it very concise.\n\n{candidates}"
+)
+
+# Angles appended to candidate instructions so parallel candidates are not near-duplicates
+CANDIDATE_HINTS = (
+    "",
+    "Lead with concrete evidence and examples.",
+    "Address the strongest counter-arguments explicitly.",
+    "Favor a short, structured answer."
+)
+
+async def plan_candidates_node(state: State) -> State:
+    """Prepare the instruction and model tier shared by this iteration's candidates."""
+    _select_tier(state)
+    # Candidates are complete alternative analyses, so they are never patches
+    _prepare_analysis_instruction(state, allow_patch=False)
+    return state
+
+def fan_out_candidates(state: State) -> List[Any]:
+    """Send the analysis instruction to `candidate_count` parallel candidate nodes."""
+    from langgraph.types import Send
+
+    config = state.get("configuration")
+    count = config.candidate_count if config else 1
+    tasks = []
+    for index in range(count):
+        hint = CANDIDATE_HINTS[index % len(CANDIDATE_HINTS)]
+        tasks.append(Send("gemini_candidate", {
+            "run_id": state.get("run_id"),
+            "iteration": state.get("current_iterations"),
+            "index": index,
+            "configuration": config,
+            "tier": state.get("model_tier") or PRIMARY_TIER,
+            "instruction": f"{state['node_instruction']}\n\n{hint}" if hint else state["node_instruction"]
+        }))
+    return tasks
+
+async def gemini_candidate_node(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Generate one candidate analysis; runs in parallel with the other candidates of the iteration."""
+    config = task.get("configuration")
+    start_time = time.perf_counter()
+    with METRICS.span("gemini_candidate", run_id=task["run_id"], iteration=task["iteration"], index=task["index"]):
+        gemini_agent = await aget_agent(_tier_agent_name(task["tier"]))
+        try:
+            response_message = await _call_agent(
+                task, tier_call_key(task["tier"]), config.analysis_timeout_seconds if config else None,
+                lambda: gemini_agent.aprocess_message(HumanMessage(content=task["instruction"])))
+        except asyncio.TimeoutError:
+            # The batch critique goes ahead with the candidates that made it in time
+            notice(f"⌛ Candidate {task['index'] + 1} timed out", task["run_id"])
+            return {"candidates": []}
+    _record_tier_call(config, task["tier"], time.perf_counter() - start_time)
+    return {"candidates": [{
+        "iteration": task["iteration"],
+        "index": task["index"],
+        "analysis": response_message.content,
+        "seconds": round(time.perf_counter() - start_time, 3)
+    }]}
 
-    # For now, store the raw response - we'll add parsing later
-    state["critic_output"] = {"raw_response": response_message.content}
+async def critique_candidates_node(state: State) -> State:
+    """Critique every candidate of the iteration in one Claude call and keep the best one."""
+    config = state.get("configuration")
+    budget = config.prompt_token_budget if config else None
+    candidates = [candidate for candidate in state.get("candidates") or []
+                  if candidate["iteration"] == state.get("current_iterations")]
+    if not candidates:
+        # Every candidate timed out; the previous analysis stays in analysis_output
+        _stop_on_timeout(state, "gemini_candidate")
+        return state
+    # Candidates run in parallel, so the slowest one is the time spent generating them
+    _record_timing(state, "gemini_candidates", max((candidate["seconds"] for candidate in candidates), default=0.0))
+
+    def build_instruction(analyses: List[str]) -> str:
+        sections = "\n\n".join(f"Candidate {number}:\n{analysis}" for number, analysis in enumerate(analyses, 1))
+        return BATCH_CRITIQUE_TEMPLATE.format(count=len(analyses), candidates=sections)
+
+    analyses = [candidate["analysis"] for candidate in candidates]
+    instruction = build_instruction(analyses)
+    original_tokens = estimate_tokens(instruction)
+    if budget and original_tokens > budget:
+        room = _payload_budget(budget, build_instruction([""] * len(analyses))) // max(1, len(analyses))
+        instruction = build_instruction([PromptCompactor.compact_text(analysis, room) for analysis in analyses])
+    state["node_instruction"] = instruction
+    _record_prompt_size(state, "critique_candidates", instruction, original_tokens)
+
+    start_time = time.perf_counter()
+    with METRICS.span("claude_critic", run_id=state.get("run_id"), iteration=state.get("current_iterations"),
+                      candidates=len(candidates)):
+        claude_agent = await aget_agent("claude")
+        try:
+            response_message = await _call_agent(state, "claude_critic",
+                                                 config.critique_timeout_seconds if config else None,
+                                                 lambda: claude_agent.aprocess_message(HumanMessage(content=instruction)))
+        except asyncio.TimeoutError:
+            response_message = None
+    _record_timing(state, "claude_critic", time.perf_counter() - start_time)
+
+    if response_message is None:
+        # No critique to choose by; keep the candidate generated without an extra hint
+        state["selected_candidate"] = candidates[0]["index"]
+        state["previous_analysis_output"] = state.get("analysis_output")
+        state["analysis_output"] = candidates[0]["analysis"]
+        StatePrinter.print_analysis_only(state)
+        _stop_on_timeout(state, "claude_critic")
+        return state
+
+    preferred, critiques = CritiqueParser.parse_batch(response_message.content, len(candidates))
+    selected = select_best_candidate(preferred, critiques)
+    state["selected_candidate"] = candidates[selected]["index"]
+    state["previous_analysis_output"] = state.get("analysis_output")
+    state["analysis_output"] = candidates[selected]["analysis"]
+    state["critic_output"] = critiques[selected]
+    StatePrinter.print_analysis_only(state)
+    notice(f"🏆 Selected candidate {selected + 1} of {len(candidates)}", state.get("run_id"))
     # Increment iteration counter
     state["current_iterations"] = state.get("current_iterations", 0) + 1
     StatePrinter.print_critic_only(state)
+    _update_stop_reason(state)
     return state
 
+def _analysis_change(state: State) -> float:
+    """Change ratio of the latest analysis; after a patch, between the targeted sections and their revisions."""
+    patched = state.get("patched_sections")
+    if patched is None:
+        return analysis_change_ratio(state.get("previous_analysis_output"), state.get("analysis_output"))
+    return analysis_change_ratio(sections_text(state.get("previous_analysis_output"), state.get("patch_targets")),
+                                 sections_text(state.get("analysis_output"), patched))
+
+def _update_stop_reason(state: State):
+    """
+    Decide whether the loop should stop after this critique and record the LLM calls saved
+    compared to looping whenever the raw critique mentions "critical" or "major".
+    """
+    config = state.get("configuration")
+    max_iterations = config.max_iterations if config else 3
+    convergence_threshold = config.convergence_threshold if config else 0.0
+    completed_iterations = state.get("current_iterations", 1) - 1
+    critique = state.get("critic_output") or {}
+
+    # The critique's own verdict comes first, so a clean last iteration is not reported as max_iterations
+    if not CritiqueParser.has_blocking_issues(critique):
+        stop_reason = "no_blocking_issues"
+    elif _analysis_change(state) < convergence_threshold:
+        stop_reason = "converged"
+    elif completed_iterations >= max_iterations:
+        stop_reason = "max_iterations"
+    elif deadline_passed(run_deadline()):
+        stop_reason = "deadline"
+    else:
+        stop_reason = None
+    state["stop_reason"] = stop_reason
+    if stop_reason:
+        METRICS.increment("workflow_runs_total", stop_reason=stop_reason)
+        METRICS.observe("workflow_iterations", completed_iterations, COUNT_BUCKETS)
+
+    # The keyword rule would have kept looping until max_iterations
+    raw_response = (critique.get("raw_response") or "").lower()
+    keyword_rule_continues = "critical" in raw_response or "major" in raw_response
+    remaining_iterations = max_iterations - completed_iterations
+    if stop_reason in ("no_blocking_issues", "converged") and keyword_rule_continues and remaining_iterations > 0:
+        # One analysis and one critique per iteration, or every candidate and one batch critique
+        calls_per_iteration = config.candidate_count + 1 if config and config.candidate_count > 1 else 2
+        saved = calls_per_iteration * remaining_iterations
+        state["llm_calls_saved"] = state.get("llm_calls_saved", 0) + saved
+        METRICS.increment("llm_calls_saved_total", saved)
+        notice(f"💡 Stopped early ({stop_reason}), saved {saved} LLM calls", state.get("run_id"))
+
 def should_continue_analysis(state: State) -> str:
-    """Determine if analysis should continue based on critique and iteration limits."""
+    """Determine if analysis should continue based on the parsed critique, convergence and iteration limits."""
     current_iterations = state.get("current_iterations", 1)
     config = state.get("configuration")
     max_iterations = config.max_iterations if config else 3
+    stop_reason = state.get("stop_reason")
+    run_id = state.get("run_id")
 
-    # Check if we've reached the maximum iterations
-    if current_iterations > max_iterations:
-        print(f"Maximum iterations ({max_iterations}) reached, finishing...")
+    if stop_reason == "max_iterations":
+        notice(f"Maximum iterations ({max_iterations}) reached, finishing...", run_id)
+        return "END"
+    if stop_reason == "converged":
+        notice("Analysis converged between iterations, finishing...", run_id)
+        return "END"
+    if stop_reason == "no_blocking_issues":
+        notice("No critical or major issues found, finishing...", run_id)
+        return "END"
+    if stop_reason in ("deadline", "node_timeout"):
+        notice("Out of time, finishing with the best analysis so far...", run_id)
         return "END"
 
-    # Check if critic_output exists and has content
-    critic_output = state.get("critic_output", {})
-    raw_response = critic_output.get("raw_response", "")
+    notice(f"Found critical or major issues, continuing analysis... (iteration {current_iterations}/{max_iterations})",
+           run_id)
+    return "gemini_analysis"
 
-    # Simple check - if critique mentions "critical" or "major" issues, continue
-    if "critical" in raw_response.lower() or "major" in raw_response.lower():
-        print(f"Found critical or major issues, continuing analysis... (iteration {current_iterations}/{max_iterations})")
-        return "gemini_analysis"
-    else:
-        print("No critical or major issues found, finishing...")
-        return "END"
+def build_graph(checkpointer=None):
+    """
+    Build and compile the Gemini analysis / Claude critique workflow graph.
+    The graph holds the serial loop, or candidate fan-out when the configuration set by
+    `configure_agents` asks for more than one candidate; only the nodes in use are added,
+    since every node and routing function costs LangGraph work on each step of a run.
+
+    Args:
+        checkpointer: LangGraph checkpoint saver persisting the state after every node, None for none
+    """
+    # Imported here to keep module import and --help fast
+    from langgraph.graph import StateGraph, END, START
 
-def main():
-    print("LangGraph Demo")
-    
-    # Create a StateGraph
     graph = StateGraph(State)
-    graph.add_edge(START, "gemini_analysis")
+    if _configuration.candidate_count > 1:
+        # Fan-out: candidate_count parallel analyses, one batch critique per iteration
+        graph.add_node("plan_candidates", plan_candidates_node)
+        graph.add_node("gemini_candidate", gemini_candidate_node)
+        graph.add_node("critique_candidates", critique_candidates_node)
+        graph.add_edge(START, "plan_candidates")
+        graph.add_conditional_edges("plan_candidates", fan_out_candidates, ["gemini_candidate"])
+        graph.add_edge("gemini_candidate", "critique_candidates")
+        graph.add_conditional_edges(
+            "critique_candidates",
+            should_continue_analysis,
+            {
+                "gemini_analysis": "plan_candidates",
+                "END": END
+            }
+        )
+        return graph.compile(checkpointer=checkpointer)
+
+    # Serial loop: one analysis, one critique per iteration
     graph.add_node("gemini_analysis", gemini_agent_node)
     graph.add_node("claude_critic", claude_agent_node)
+    graph.add_edge(START, "gemini_analysis")
     graph.add_edge("gemini_analysis", "claude_critic")
     graph.add_conditional_edges(
         "claude_critic",
@@ -93,41 +647,392 @@ def main():
             "END": END
         }
     )
-    app = graph.compile()
+    return graph.compile(checkpointer=checkpointer)
+
+def configure_agents(configuration: Configuration):
+    """
+    Apply configuration-driven agent settings such as the response cache and provider quotas.
+    Agents created afterwards are built with this configuration.
+    """
+    global _configuration, _response_cache
+    _configuration = configuration
+    _response_cache = None
+    METRICS.configure(enabled=configuration.metrics_enabled, trace_path=configuration.trace_path)
+    set_output_sink(create_output_sink(configuration.output_mode, configuration.events_path))
+
+    # Rate limits, retries and circuit breakers shared by every agent of a provider
+    from agents.resilience import configure_provider
+
+    for provider, requests_per_minute, tokens_per_minute in (
+        ("gemini", configuration.gemini_requests_per_minute, configuration.gemini_tokens_per_minute),
+        ("claude", configuration.claude_requests_per_minute, configuration.claude_tokens_per_minute)
+    ):
+        configure_provider(
+            provider,
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+            max_retries=configuration.provider_max_retries,
+            failure_threshold=configuration.circuit_failure_threshold,
+            reset_seconds=configuration.circuit_reset_seconds
+        )
+
+    # Agent calls are recorded to, or replayed from, a cassette; agents created afterwards pick it up
+    from agents.cassette import Cassette, set_cassette
+
+    set_cassette(Cassette(configuration.cassette_path, configuration.cassette_mode, configuration.cassette_latency)
+                 if configuration.cassette_path else None)
+
+    if configuration.response_cache_enabled:
+        from agents import ResponseCache
 
-    print("===START Interaction ===")
+        _response_cache = ResponseCache(
+            path=configuration.response_cache_path,
+            memory_entries=configuration.response_cache_memory_entries,
+            ttl_seconds=configuration.response_cache_ttl_seconds,
+            max_entries=configuration.response_cache_max_entries
+        )
+
+    for agent in _agents.values():
+        agent.set_response_cache(_response_cache)
+
+    if configuration.tool_cache_bypass:
+        from tools import set_tool_cache_bypass
+        set_tool_cache_bypass(True)
+    return _response_cache
+
+def print_cache_stats(response_cache):
+    """Print response cache hit/miss counters."""
+    stats = response_cache.stats()
+    print(f"💾 Response cache: {stats['memory_hits']} memory hits, {stats['disk_hits']} disk hits, "
+          f"{stats['misses']} misses (hit rate {stats['hit_rate']:.0%})", file=report_stream())
+
+def open_semantic_cache(configuration: Configuration):
+    """Open the semantic cache of earlier asks, or return None when it is disabled."""
+    if not configuration.semantic_cache_enabled:
+        return None
+    # Deferred so NumPy is only imported when the cache is used
+    from semantic_cache import SemanticCache
+
+    return SemanticCache(
+        path=configuration.semantic_cache_path,
+        threshold=configuration.semantic_cache_threshold,
+        dimensions=configuration.semantic_cache_dimensions
+    )
+
+def print_semantic_cache_stats(semantic_cache):
+    """Print semantic cache hits, misses and lookup latency."""
+    stats = semantic_cache.stats()
+    latency = f", lookup p50 {stats['p50_ms']:.2f}ms p95 {stats['p95_ms']:.2f}ms" if stats["p50_ms"] is not None else ""
+    print(f"🧲 Semantic cache: {stats['hits']} hits, {stats['misses']} misses (hit rate {stats['hit_rate']:.0%}), "
+          f"{stats['rejections']} similar asks rejected for other names or numbers, {stats['entries']} entries{latency}",
+          file=report_stream())
+
+def print_cassette_stats():
+    """Print the calls recorded to or replayed from the installed cassette."""
+    from agents.cassette import get_cassette
+
+    cassette = get_cassette()
+    if cassette is None:
+        return
+    stats = cassette.stats()
+    if cassette.replaying:
+        print(f"📼 Cassette: replayed {stats['replayed']} calls from {stats['path']} ({stats['misses']} misses)",
+              file=report_stream())
+    else:
+        print(f"📼 Cassette: recorded {stats['recorded']} calls to {stats['path']}", file=report_stream())
+
+def print_client_stats():
+    """Print first-call and steady-state latency of every shared provider client that was called."""
+    from agents.client_registry import client_stats
+
+    for stats in client_stats():
+        if not stats["calls"]:
+            continue
+        warm_up = f" after a {stats['warm_up_s'] * 1000:.0f}ms warm-up" if stats["warm_up_s"] is not None else ""
+        steady = (f", steady p50 {stats['steady_p50_s'] * 1000:.0f}ms p95 {stats['steady_p95_s'] * 1000:.0f}ms"
+                  if stats["steady_p50_s"] is not None else "")
+        print(f"🔌 {stats['provider']} client {stats['model']} ({stats['users']} agents, {stats['calls']} calls): "
+              f"first call {stats['first_call_s'] * 1000:.0f}ms{warm_up}{steady}", file=report_stream())
+
+def print_tool_cache_stats():
+    """Print per-tool cache hit rates for tools that were called."""
+    # Nothing to report if no agent loaded the tools
+    if "tools" not in sys.modules:
+        return
+    from tools import get_tool_cache_stats
+
+    for tool_name, stats in get_tool_cache_stats().items():
+        if stats["hits"] + stats["misses"]:
+            print(f"🧰 Tool cache {tool_name}: {stats['hits']} hits, {stats['misses']} misses "
+                  f"(hit rate {stats['hit_rate']:.0%})", file=report_stream())
+
+def export_metrics(configuration: Configuration):
+    """Write the Prometheus metrics file and flush the remaining trace spans."""
+    if configuration.metrics_path:
+        METRICS.export_prometheus(configuration.metrics_path)
+        print(f"📊 Metrics written to {configuration.metrics_path}", file=report_stream())
+    if configuration.trace_path:
+        METRICS.flush_trace()
+        print(f"📊 Trace spans written to {configuration.trace_path}", file=report_stream())
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="LangGraph multi-agent analysis demo")
+    parser.add_argument("--batch", metavar="INPUT",
+                        help="Run asks from a JSONL file ('-' for stdin) instead of the demo question")
+    parser.add_argument("--output", default="batch_results.jsonl",
+                        help="JSONL file receiving one final state per ask in batch mode ('-' for stdout)")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="Maximum number of asks processed concurrently in batch and service mode")
+    parser.add_argument("--serve", action="store_true",
+                        help="Run as a local HTTP service answering POST /asks with warm agents")
+    parser.add_argument("--host", default="127.0.0.1", help="Address the service listens on")
+    parser.add_argument("--port", type=int, default=8765, help="Port the service listens on")
+    parser.add_argument("--socket", metavar="PATH", help="Unix socket the service listens on instead of a port")
+    parser.add_argument("--queue-limit", type=int, default=16,
+                        help="Asks waiting for a worker in service mode before new ones are rejected with 503")
+    parser.add_argument("--max-iterations", type=int, default=3,
+                        help="Maximum Gemini/Claude iterations per ask")
+    parser.add_argument("--candidates", type=int, default=1,
+                        help="Candidate analyses generated in parallel per iteration, critiqued in one Claude call")
+    parser.add_argument("--deadline", type=float, metavar="SECONDS",
+                        help="End-to-end time limit per ask; the run then ends with its best analysis so far")
+    parser.add_argument("--analysis-timeout", type=float, default=Configuration.analysis_timeout_seconds,
+                        metavar="SECONDS", help="Time limit for each analysis call (0 for none)")
+    parser.add_argument("--critique-timeout", type=float, default=Configuration.critique_timeout_seconds,
+                        metavar="SECONDS", help="Time limit for each critique call (0 for none)")
+    parser.add_argument("--hedge-percentile", type=float, metavar="P",
+                        help="Send a duplicate request when a call outlasts the P-th percentile of recent latencies")
+    parser.add_argument("--analysis-model", default=Configuration.analysis_model,
+                        help="Gemini model for first analyses and re-analyses of critical issues")
+    parser.add_argument("--loop-back-model",
+                        help="Cheaper Gemini model for re-analyses when only major or minor issues remain")
+    parser.add_argument("--fallback-model",
+                        help="Gemini model used while the preferred model's p95 latency is over --tier-latency-threshold")
+    parser.add_argument("--tier-latency-threshold", type=float, metavar="SECONDS",
+                        help="p95 analysis latency above which a model tier is avoided")
+    parser.add_argument("--patch-reanalysis", action="store_true",
+                        help="Re-analyze only the sections a critique names, as edits applied to the analysis")
+    parser.add_argument("--gemini-rpm", type=float, help="Gemini requests per minute shared by all runs")
+    parser.add_argument("--gemini-tpm", type=float, help="Gemini tokens per minute shared by all runs")
+    parser.add_argument("--claude-rpm", type=float, help="Claude MCP requests per minute shared by all runs")
+    parser.add_argument("--claude-tpm", type=float, help="Claude MCP tokens per minute shared by all runs")
+    parser.add_argument("--max-retries", type=int, default=Configuration.provider_max_retries,
+                        help="Retries of a failed provider call, with jittered exponential backoff")
+    parser.add_argument("--prompt-budget", type=int, default=Configuration.prompt_token_budget,
+                        help="Estimated tokens per instruction before its payload is compacted (0 to disable)")
+    parser.add_argument("--quiet", action="store_true",
+                        help="Do not print analyses, critiques and progress while runs execute")
+    parser.add_argument("--events-file", metavar="PATH",
+                        help="Write run events as JSONL to PATH ('-' for stdout) instead of printing them")
+    parser.add_argument("--no-stream", action="store_true",
+                        help="Print the analysis only once it is complete")
+    parser.add_argument("--response-cache", action="store_true",
+                        help="Reuse cached agent responses for identical instructions")
+    parser.add_argument("--semantic-cache", action="store_true",
+                        help="Answer asks similar to earlier ones with their stored analysis and critique")
+    parser.add_argument("--semantic-threshold", type=float, default=Configuration.semantic_cache_threshold,
+                        help="Cosine similarity from which an earlier ask with the same names and numbers "
+                             "counts as the same ask; lower values also match other topics")
+    parser.add_argument("--no-tool-cache", action="store_true",
+                        help="Bypass the tool result cache")
+    parser.add_argument("--mcp-pool-size", type=int, default=1,
+                        help="Number of Claude MCP sessions used for parallel critiques")
+    parser.add_argument("--mcp-batch-size", type=int, default=1,
+                        help="Critiques of concurrent runs sent in one Claude MCP call (batch and service mode)")
+    parser.add_argument("--mcp-batch-window", type=float, default=Configuration.mcp_batch_window_seconds,
+                        help="Seconds a critique waits for others to join its MCP batch")
+    parser.add_argument("--no-warmup", action="store_true",
+                        help="Create agents on first use instead of warming them up in the background")
+    parser.add_argument("--warm-connections", type=int, default=0, metavar="N",
+                        help="Connections each shared provider client opens before the first ask (default: 0)")
+    parser.add_argument("--gemini-pool-size", type=int, metavar="N",
+                        help="HTTP connections of each shared Gemini client (default: SDK default)")
+    parser.add_argument("--metrics-file", metavar="PATH",
+                        help="Write Prometheus text metrics to PATH at exit")
+    parser.add_argument("--trace-file", metavar="PATH",
+                        help="Append JSONL trace spans to PATH")
+    parser.add_argument("--no-metrics", action="store_true",
+                        help="Disable in-process metrics and tracing")
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument("--record-cassette", metavar="PATH",
+                          help="Append every Gemini, tool and Claude MCP call with its response to a cassette file")
+    cassette.add_argument("--replay-cassette", metavar="PATH",
+                          help="Answer agent calls from a recorded cassette instead of calling the providers")
+    parser.add_argument("--replay-latency", choices=("original", "zero"), default=Configuration.cassette_latency,
+                        help="Wait as long as each recorded call took, or replay at CPU speed")
+    parser.add_argument("--checkpoint-db", metavar="PATH",
+                        help="Persist a checkpoint after every node in this SQLite file so runs can resume")
+    parser.add_argument("--run-id",
+                        help=f"Run id to start or resume (checkpoints default to {DEFAULT_CHECKPOINT_PATH})")
+    return parser.parse_args(argv)
+
+def run_single(configuration: Configuration, run_id: Optional[str] = None, semantic_cache=None):
+    """
+    Run the demo question through the workflow, resuming `run_id` if it has checkpoints;
+    with a semantic cache, a similar earlier ask's result is reused instead.
+    """
+    print("===START Interaction ===", file=report_stream())
 
     # Create initial state dictionary
-    initial_state = {
-        "ask": "Are social networks good? Let's try to understand the benefits. Let's try being concise.",
-        "node_instruction": None,
-        "analysis_output": None,
-        "critic_output": None,
-        "configuration": Configuration(max_iterations=3),
-        "current_iterations": 1
-    }
+    initial_state = create_initial_state(DEMO_ASK, configuration, run_id=run_id)
+    if configuration.checkpoint_path:
+        print(f"🧷 Run id: {initial_state['run_id']} (resume with --run-id {initial_state['run_id']})",
+              file=report_stream())
 
     # Print the question at the beginning
     StatePrinter.print_ask_only(initial_state)
 
-    result = app.invoke(initial_state)
+    async def run():
+        async with open_checkpointer(configuration.checkpoint_path) as checkpointer:
+            app = build_graph(checkpointer)
+            if configuration.warm_up_connections:
+                await awarm_up_connections(configuration.warm_up_connections)
+            if semantic_cache:
+                return await semantic_cache.ainvoke(app, initial_state)
+            return await ainvoke_resumable(app, initial_state)
+
+    result = asyncio.run(run())
 
-    print(f"\n🎉 WORKFLOW COMPLETED! 🎉")
+    print(f"\n🎉 WORKFLOW COMPLETED! 🎉", file=report_stream())
 
-    print("===END Interaction ===")
+    print("===END Interaction ===", file=report_stream())
+
+def run_batch(configuration: Configuration, input_path: str, output_path: str, concurrency: int,
+              run_id: Optional[str] = None, semantic_cache=None):
+    """Run every ask from a JSONL input through the workflow and stream the results."""
+    source = sys.stdin if input_path == "-" else open(input_path, "r", encoding="utf-8")
+    sink = sys.stdout if output_path == "-" else open(output_path, "w", encoding="utf-8")
+    if isinstance(get_output_sink(), ConsoleSink):
+        # Blocks from concurrent asks are told apart by their run id; they go to stderr when
+        # the records are written to stdout (`main` reserves it)
+        set_output_sink(ConsoleSink(tag_runs=True))
+
+    async def run():
+        async with open_checkpointer(configuration.checkpoint_path) as checkpointer:
+            runner = BatchRunner(build_graph(checkpointer), configuration, concurrency=concurrency, run_id=run_id,
+                                 semantic_cache=semantic_cache)
+            if configuration.checkpoint_path and not run_id:
+                print(f"🧷 Batch run id: {runner.run_id} (resume with --run-id {runner.run_id})",
+                      file=report_stream())
+            if configuration.warm_up_connections:
+                await awarm_up_connections(configuration.warm_up_connections)
+            return await runner.run(source, sink)
 
-    # Safe cleanup - only delete if variables exist
     try:
-        if 'gemini_agent' in globals():
-            del gemini_agent
-    except:
-        pass
+        summary = asyncio.run(run())
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    print_batch_summary(summary)
+
+def run_service(configuration: Configuration, concurrency: int, queue_limit: int, host: str = "127.0.0.1",
+                port: int = 8765, socket_path: Optional[str] = None, semantic_cache=None):
+    """Serve asks over local HTTP with the graph compiled once and the agents kept warm."""
+    from service import AnalysisService, ServiceSink
+
+    # Streaming clients get their run's events from the sink; the console tags blocks by run id
+    sink = set_output_sink(ServiceSink(create_output_sink(configuration.output_mode, configuration.events_path,
+                                                          tag_runs=True)))
+
+    async def run():
+        async with open_checkpointer(configuration.checkpoint_path) as checkpointer:
+            app = build_graph(checkpointer)
+            # The first ask should not pay for provider imports or the MCP handshake
+            await asyncio.gather(aget_agent("gemini"), aget_agent("claude"))
+            if configuration.warm_up_connections:
+                await awarm_up_connections(configuration.warm_up_connections)
+            service = AnalysisService(app, configuration, concurrency=concurrency, queue_limit=queue_limit,
+                                      sink=sink, semantic_cache=semantic_cache)
+            await service.start(host, port, socket_path)
+            where = socket_path or f"http://{service.address[0]}:{service.address[1]}"
+            print(f"🛰️  Serving asks on {where} ({concurrency} workers, queue of {queue_limit})",
+                  file=report_stream())
+            await service.serve_forever()
+
+    asyncio.run(run())
+    print("🛰️  Service stopped", file=report_stream())
+
+def main(argv=None):
+    args = parse_args(argv)
+    if (args.batch and args.output == "-") or args.events_file == "-":
+        # Results or events are JSONL on stdout: the banner, console events and reports go to stderr
+        reserve_stdout()
+    print("LangGraph Demo", file=report_stream())
+
+    configuration = Configuration(
+        max_iterations=args.max_iterations,
+        prompt_token_budget=args.prompt_budget or None,
+        candidate_count=max(1, args.candidates),
+        deadline_seconds=args.deadline,
+        analysis_timeout_seconds=args.analysis_timeout or None,
+        critique_timeout_seconds=args.critique_timeout or None,
+        hedge_percentile=args.hedge_percentile,
+        analysis_model=args.analysis_model,
+        loop_back_model=args.loop_back_model,
+        fallback_model=args.fallback_model,
+        tier_latency_threshold_seconds=args.tier_latency_threshold,
+        patch_reanalysis=args.patch_reanalysis,
+        gemini_requests_per_minute=args.gemini_rpm,
+        gemini_tokens_per_minute=args.gemini_tpm,
+        claude_requests_per_minute=args.claude_rpm,
+        claude_tokens_per_minute=args.claude_tpm,
+        provider_max_retries=args.max_retries,
+        response_cache_enabled=args.response_cache,
+        semantic_cache_enabled=args.semantic_cache,
+        semantic_cache_threshold=args.semantic_threshold,
+        # Streaming to the console only makes sense for a single interactive run
+        stream_analysis=(not args.batch and not args.serve and not args.no_stream and not args.quiet
+                         and not args.events_file),
+        mcp_pool_size=args.mcp_pool_size,
+        mcp_batch_size=max(1, args.mcp_batch_size),
+        mcp_batch_window_seconds=args.mcp_batch_window,
+        warm_up_agents=not args.no_warmup,
+        warm_up_connections=max(0, args.warm_connections),
+        gemini_connection_pool_size=args.gemini_pool_size,
+        tool_cache_bypass=args.no_tool_cache,
+        metrics_enabled=not args.no_metrics,
+        metrics_path=args.metrics_file,
+        trace_path=args.trace_file,
+        output_mode="jsonl" if args.events_file else "quiet" if args.quiet else "console",
+        events_path=args.events_file,
+        cassette_path=args.record_cassette or args.replay_cassette,
+        cassette_mode="replay" if args.replay_cassette else "record",
+        cassette_latency=args.replay_latency,
+        checkpoint_path=args.checkpoint_db or (DEFAULT_CHECKPOINT_PATH if args.run_id else None)
+    )
+    response_cache = configure_agents(configuration)
+    semantic_cache = open_semantic_cache(configuration)
+
+    # Start agents (provider imports, MCP server spawn) while the graph compiles
+    if configuration.warm_up_agents:
+        start_agent_warmup()
 
     try:
-        if 'claude_agent' in globals():
-            del claude_agent
-    except:
-        pass
+        if args.serve:
+            run_service(configuration, args.concurrency, args.queue_limit, host=args.host, port=args.port,
+                        socket_path=args.socket, semantic_cache=semantic_cache)
+        elif args.batch:
+            run_batch(configuration, args.batch, args.output, args.concurrency, run_id=args.run_id,
+                      semantic_cache=semantic_cache)
+        else:
+            run_single(configuration, run_id=args.run_id, semantic_cache=semantic_cache)
+    finally:
+        if response_cache:
+            print_cache_stats(response_cache)
+            response_cache.close()
+        if semantic_cache:
+            print_semantic_cache_stats(semantic_cache)
+            semantic_cache.close()
+        print_tool_cache_stats()
+        print_cassette_stats()
+        print_client_stats()
+        cleanup_agents()
+        # Flushes the events still queued by a JSONL sink
+        set_output_sink(ConsoleSink())
+        export_metrics(configuration)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,234 @@
+"""
+In-process metrics and tracing: counters, histograms and spans exported as a
+Prometheus text file and a JSONL trace file, with no network dependency.
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Histogram buckets for latencies in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Histogram buckets for prompt and response sizes in characters
+SIZE_BUCKETS = (100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+
+# Histogram buckets for small counts such as iterations per run
+COUNT_BUCKETS = (1, 2, 3, 4, 5, 7, 10, 15, 20)
+
+# Spans kept in memory before they are flushed to the trace file
+TRACE_FLUSH_THRESHOLD = 1000
+TRACE_BUFFER_LIMIT = 100000
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative histogram with fixed upper bounds."""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Approximate a percentile from bucket upper bounds."""
+        if not self.count:
+            return None
+        target = fraction * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return self.buckets[index] if index < len(self.buckets) else float("inf")
+        return float("inf")
+
+
+class MetricsRegistry:
+    """
+    Thread-safe registry of counters, histograms and trace spans.
+    Every operation is a dictionary update under a lock, cheap enough to leave on in production.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.trace_path: Optional[str] = None
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._histogram_buckets: Dict[str, Tuple[float, ...]] = {}
+        self._spans: deque = deque(maxlen=TRACE_BUFFER_LIMIT)
+        self._lock = threading.Lock()
+        self._trace_lock = threading.Lock()
+
+    def configure(self, enabled: bool = True, trace_path: Optional[str] = None):
+        """
+        Configure collection and the JSONL trace destination.
+
+        Args:
+            enabled: Whether metrics and spans are collected
+            trace_path: JSONL file receiving finished spans, None to keep them in memory only
+        """
+        self.enabled = enabled
+        self.trace_path = trace_path
+
+    @staticmethod
+    def _label_key(labels: Dict[str, Any]) -> LabelKey:
+        return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+    def increment(self, name: str, value: float = 1, **labels):
+        """Add `value` to a counter."""
+        if not self.enabled:
+            return
+        key = self._label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = LATENCY_BUCKETS, **labels):
+        """Record a value in a histogram."""
+        if not self.enabled:
+            return
+        key = self._label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                buckets = self._histogram_buckets.setdefault(name, buckets)
+                histogram = series[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Dict[str, Any]]:
+        """
+        Time a block of code as a trace span and record its duration histogram.
+
+        Args:
+            name: Span name, e.g. the graph node name
+            attributes: Extra attributes stored with the span (run id, iteration, ...)
+
+        Yields:
+            Mutable attribute dictionary, so the block can add attributes
+        """
+        if not self.enabled:
+            yield attributes
+            return
+        start_wall = time.time()
+        start_time = time.perf_counter()
+        status = "ok"
+        try:
+            yield attributes
+        except BaseException as e:
+            status = type(e).__name__
+            raise
+        finally:
+            duration = time.perf_counter() - start_time
+            self.observe("span_duration_seconds", duration, span=name)
+            self._spans.append({
+                "name": name,
+                "start": round(start_wall, 6),
+                "duration_s": round(duration, 6),
+                "status": status,
+                "attributes": attributes
+            })
+            if self.trace_path and len(self._spans) >= TRACE_FLUSH_THRESHOLD:
+                self.flush_trace()
+
+    def get_histogram(self, name: str, **labels) -> Optional[Histogram]:
+        """Get a histogram series, or None if nothing was observed."""
+        with self._lock:
+            return self._histograms.get(name, {}).get(self._label_key(labels))
+
+    def get_counter(self, name: str, **labels) -> float:
+        """Get a counter value, 0 if it was never incremented."""
+        with self._lock:
+            return self._counters.get(name, {}).get(self._label_key(labels), 0)
+
+    def flush_trace(self, path: Optional[str] = None):
+        """
+        Append buffered spans to the JSONL trace file.
+
+        Args:
+            path: Trace file, defaults to the configured `trace_path`
+        """
+        path = path or self.trace_path
+        if not path:
+            return
+        with self._trace_lock:
+            spans: List[Dict[str, Any]] = []
+            while self._spans:
+                spans.append(self._spans.popleft())
+            if not spans:
+                return
+            _ensure_parent_directory(path)
+            with open(path, "a", encoding="utf-8") as trace_file:
+                trace_file.write("".join(json.dumps(span, default=str) + "\n" for span in spans))
+
+    def render_prometheus(self) -> str:
+        """Render every counter and histogram in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                        cumulative += bucket_count
+                        lines.append(f"{name}_bucket{_format_labels(key, le=_format_value(bound))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(key, le='+Inf')} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(histogram.sum)}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def export_prometheus(self, path: str):
+        """Write the Prometheus text file atomically, so scrapers never read a partial file."""
+        _ensure_parent_directory(path)
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as metrics_file:
+            metrics_file.write(self.render_prometheus())
+        os.replace(temporary_path, path)
+
+    def reset(self):
+        """Drop every metric and buffered span."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._histogram_buckets.clear()
+        self._spans.clear()
+
+
+def _ensure_parent_directory(path: str):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+
+def _format_labels(key: LabelKey, **extra) -> str:
+    items = list(key) + list(extra.items())
+    if not items:
+        return ""
+    escaped = (f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+               for name, value in items)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# Registry shared by the whole process
+METRICS = MetricsRegistry()
@@ -0,0 +1,109 @@
+"""
+Model tiering for analysis calls: which Gemini model answers an analysis, from the critique
+it addresses and the latency each tier has shown recently.
+
+Tiers are named after the job they do:
+    primary    first analyses and re-analyses of critical issues (`Configuration.analysis_model`)
+    loop_back  re-analyses when only major or minor issues remain (`loop_back_model`)
+    fallback   used while the preferred tier's p95 latency is over the threshold (`fallback_model`)
+"""
+
+import threading
+from typing import Dict, Optional
+from deadlines import LATENCIES
+from metrics import METRICS
+
+PRIMARY_TIER = "primary"
+LOOP_BACK_TIER = "loop_back"
+FALLBACK_TIER = "fallback"
+
+# Latency percentile compared against `Configuration.tier_latency_threshold_seconds`
+TIER_LATENCY_PERCENTILE = 95
+
+# Recorded calls of a tier, timed-out ones included, before its latency is trusted
+TIER_MIN_SAMPLES = 10
+
+# One call in this many still goes to a slow tier, so its latency stats can recover
+TIER_PROBE_INTERVAL = 10
+
+
+def tier_models(configuration) -> Dict[str, str]:
+    """Model of every configured tier, primary first."""
+    models = {PRIMARY_TIER: configuration.analysis_model}
+    if configuration.loop_back_model:
+        models[LOOP_BACK_TIER] = configuration.loop_back_model
+    if configuration.fallback_model:
+        models[FALLBACK_TIER] = configuration.fallback_model
+    return models
+
+
+def tier_call_key(tier: str) -> str:
+    """Call kind of a tier's analyses, keying its latency history (and hedging delay) in `LATENCIES`."""
+    return "gemini_analysis" if tier == PRIMARY_TIER else f"gemini_analysis/{tier}"
+
+
+def tier_latency(tier: str, percentile: float = TIER_LATENCY_PERCENTILE) -> Optional[float]:
+    """Recent latency percentile of a tier, None until it has `TIER_MIN_SAMPLES` calls."""
+    key = tier_call_key(tier)
+    if LATENCIES.count(key) < TIER_MIN_SAMPLES:
+        return None
+    return LATENCIES.percentile(key, percentile)
+
+
+def record_tier_call(tier: str, model: str, seconds: float):
+    """Record an analysis call of a tier; `LATENCIES` already holds its latency for the policy."""
+    METRICS.increment("model_tier_calls_total", tier=tier, model=model)
+    METRICS.observe("model_tier_latency_seconds", seconds, tier=tier, model=model)
+
+
+class TierPolicy:
+    """Chooses the tier of each analysis call; shared by all runs so latency observations are pooled."""
+
+    def __init__(self, probe_interval: int = TIER_PROBE_INTERVAL):
+        self.probe_interval = probe_interval
+        self._skipped: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _probe(self, tier: str) -> bool:
+        """Whether this call should go to a slow tier anyway, once every `probe_interval` calls."""
+        with self._lock:
+            skipped = self._skipped.get(tier, 0) + 1
+            self._skipped[tier] = 0 if skipped >= self.probe_interval else skipped
+        return skipped >= self.probe_interval
+
+    def select(self, configuration, critique: Optional[Dict]) -> str:
+        """
+        Pick the tier answering the next analysis.
+
+        Args:
+            configuration: Configuration with the tier models and latency threshold
+            critique: Parsed critique being addressed, None for a first analysis
+
+        Returns:
+            Tier name, a key of `tier_models(configuration)`
+        """
+        models = tier_models(configuration)
+        only_minor_fixes = bool(critique) and not critique.get("critical")
+        preferred = LOOP_BACK_TIER if only_minor_fixes and LOOP_BACK_TIER in models else PRIMARY_TIER
+        threshold = configuration.tier_latency_threshold_seconds
+        latency = tier_latency(preferred)
+        if not threshold or latency is None or latency <= threshold or self._probe(preferred):
+            return preferred
+
+        # The fallback tier is tried first, then the other tiers in order
+        alternatives = sorted((tier for tier in models if tier != preferred), key=lambda tier: tier != FALLBACK_TIER)
+        for tier in alternatives:
+            alternative_latency = tier_latency(tier)
+            if alternative_latency is None or alternative_latency <= threshold:
+                METRICS.increment("model_tier_fallbacks_total", preferred=preferred, selected=tier)
+                return tier
+        # Every tier is over the threshold: take the fastest
+        return min(models, key=lambda tier: tier_latency(tier) or float("inf"))
+
+    def reset(self):
+        with self._lock:
+            self._skipped.clear()
+
+
+# Process-wide policy shared by all runs
+TIER_POLICY = TierPolicy()
@@ -0,0 +1,269 @@
+"""
+Output sinks for the events graph nodes and agents report while a run progresses:
+pretty console output, nothing at all, or JSONL lines written by a background thread.
+"""
+
+import contextvars
+import json
+import queue
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, IO, List, Optional
+from metrics import METRICS
+
+# Events buffered by the JSONL sink before new ones are dropped
+EVENT_QUEUE_LIMIT = 10000
+
+# Events written by the JSONL sink per file write
+EVENT_BATCH_SIZE = 256
+
+# Run id of the graph run being executed, for events emitted without one (e.g. by agents)
+CURRENT_RUN_ID: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_run_id", default=None)
+
+SEPARATOR = "=" * 60
+
+# Set when stdout carries JSONL records (e.g. batch results written to '-'), which console output must stay out of
+_stdout_reserved = False
+
+
+class OutputSink:
+    """Receives run events; the base sink drops them, which is the quiet mode."""
+
+    def emit(self, event: str, run_id: Optional[str] = None, **fields):
+        """
+        Report one event.
+
+        Args:
+            event: Event name, e.g. "analysis" or "critique"
+            run_id: Run the event belongs to, defaults to the run being executed
+            **fields: JSON-serializable event payload
+        """
+
+    def close(self):
+        """Flush pending events and release the sink's resources."""
+
+
+class ConsoleSink(OutputSink):
+    """
+    Pretty console output, as printed by the workflow before sinks existed.
+    Each event is rendered into one string and written at once, so blocks from concurrent
+    runs do not interleave line by line; `tag_runs` prefixes them with the run id.
+    """
+
+    def __init__(self, stream: Optional[IO[str]] = None, tag_runs: bool = False):
+        """
+        Initialize the console sink.
+
+        Args:
+            stream: Text stream to write to, defaults to the current `report_stream()`
+            tag_runs: Prefix each block with its run id, for concurrent runs
+        """
+        self.stream = stream
+        self.tag_runs = tag_runs
+        self._lock = threading.Lock()
+        self._renderers: Dict[str, Callable[..., str]] = {
+            "ask": self._render_ask,
+            "analysis_start": self._render_analysis_start,
+            "analysis_chunk": lambda text: text,
+            "analysis": self._render_analysis,
+            "critique": self._render_critique,
+            "prompt_size": self._render_prompt_size,
+            "agent_timing": self._render_agent_timing,
+            "state": self._render_state,
+            "message": lambda text, **_: f"{text}\n",
+            "notice": lambda text: f"{text}\n"
+        }
+
+    def emit(self, event: str, run_id: Optional[str] = None, **fields):
+        renderer = self._renderers.get(event)
+        if renderer is None:
+            return
+        text = renderer(**fields)
+        run_id = run_id or CURRENT_RUN_ID.get()
+        if self.tag_runs and run_id and event != "analysis_chunk":
+            text = "".join(f"[{run_id}] {line}" if line.strip() else line for line in text.splitlines(True))
+        stream = self.stream or report_stream()
+        with self._lock:
+            stream.write(text)
+            if event == "analysis_chunk":
+                stream.flush()
+
+    @staticmethod
+    def _iteration(iteration: Optional[int], max_iterations: Optional[int]) -> str:
+        return f"🔄 Iteration: {iteration}/{max_iterations}"
+
+    def _render_ask(self, ask: Optional[str], iteration: Optional[int], max_iterations: Optional[int]) -> str:
+        return (f"\n{SEPARATOR}\n{self._iteration(iteration, max_iterations)}\n❓ QUESTION:\n{SEPARATOR}\n"
+                f"{ask}\n{SEPARATOR}\n\n")
+
+    def _render_analysis_start(self, iteration: Optional[int], max_iterations: Optional[int]) -> str:
+        return f"\n{SEPARATOR}\n{self._iteration(iteration, max_iterations)}\n🤖 ANALYSIS:\n{SEPARATOR}\n"
+
+    def _render_analysis(self, analysis: Optional[str], iteration: Optional[int], max_iterations: Optional[int],
+                         streamed: bool = False) -> str:
+        # A streamed analysis has already been written chunk by chunk after its header
+        if streamed:
+            return f"{SEPARATOR}\n\n"
+        return f"{self._render_analysis_start(iteration, max_iterations)}{analysis}\n{SEPARATOR}\n\n"
+
+    def _render_critique(self, critique: Any, iteration: Optional[int], max_iterations: Optional[int]) -> str:
+        if critique:
+            body = critique.get("raw_response", "") if isinstance(critique, dict) else critique
+        else:
+            body = "None"
+        return f"\n{SEPARATOR}\n{self._iteration(iteration, max_iterations)}\n🔍 CRITIQUE:\n{SEPARATOR}\n{body}\n{SEPARATOR}\n\n"
+
+    @staticmethod
+    def _render_prompt_size(node: str, tokens: int, original_tokens: int, budget: Optional[int], **_) -> str:
+        compacted = f" (compacted from {original_tokens}, budget {budget})" if tokens < original_tokens else ""
+        return f"📏 {node} prompt: ~{tokens} tokens{compacted}\n"
+
+    @staticmethod
+    def _render_agent_timing(agent: str, seconds: float, cached: bool = False, streamed: bool = False,
+                             first_token_seconds: Optional[float] = None) -> str:
+        prefix = "\n" if streamed else ""
+        if cached:
+            return f"{prefix}⏱️  {agent} processing time: {seconds:.2f}s (cached)\n"
+        if streamed:
+            first_token_label = f"{first_token_seconds:.2f}s" if first_token_seconds is not None else "n/a"
+            return f"{prefix}⏱️  {agent} processing time: {seconds:.2f}s (first token: {first_token_label})\n"
+        return f"⏱️  {agent} processing time: {seconds:.2f}s\n"
+
+    def _render_state(self, ask: Optional[str], instruction: Optional[str], analysis: Optional[str], critique: Any,
+                      iteration: Optional[int], max_iterations: Optional[int]) -> str:
+        lines = [f"\n{SEPARATOR}", "📊 State:", SEPARATOR, self._iteration(iteration, max_iterations),
+                 f"\n❓ ASK: {ask}", "\n🎯 NODE INSTRUCTION:", f"   {instruction}",
+                 "\n🤖 ANALYSIS OUTPUT:", f"   {analysis}", "\n🔍 CRITIC OUTPUT:"]
+        if critique:
+            if isinstance(critique, dict):
+                lines.extend(f"   {key}: {value}" for key, value in critique.items())
+            else:
+                lines.append(f"   {critique}")
+        else:
+            lines.append("   None")
+        lines.append(f"{SEPARATOR}\n")
+        return "\n".join(lines) + "\n"
+
+
+class JsonlSink(OutputSink):
+    """
+    Buffered JSONL event writer: `emit` only enqueues, a background thread serializes and
+    writes the events in batches. When the writer falls behind by `EVENT_QUEUE_LIMIT` events,
+    new events are dropped (counted as `output_events_dropped_total`) rather than blocking a run.
+    Streamed analysis chunks are skipped; the complete analysis follows in its "analysis" event.
+    """
+
+    def __init__(self, path: str, max_queued: int = EVENT_QUEUE_LIMIT):
+        """
+        Initialize the sink and start its writer thread.
+
+        Args:
+            path: JSONL file to append events to, '-' for stdout
+            max_queued: Events buffered before new ones are dropped
+        """
+        self.path = path
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=max_queued)
+        self._thread = threading.Thread(target=self._write_loop, name="jsonl-output", daemon=True)
+        self._thread.start()
+
+    def emit(self, event: str, run_id: Optional[str] = None, **fields):
+        if event == "analysis_chunk":
+            return
+        record = event_record(event, run_id, fields)
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            METRICS.increment("output_events_dropped_total")
+
+    def _write_loop(self):
+        stream = sys.stdout if self.path == "-" else open(self.path, "a", encoding="utf-8")
+        try:
+            while True:
+                batch: List[Optional[Dict[str, Any]]] = [self._queue.get()]
+                while len(batch) < EVENT_BATCH_SIZE:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                records = [record for record in batch if record is not None]
+                stream.write("".join(json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in records))
+                stream.flush()
+                if len(records) < len(batch):
+                    return
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+
+    def close(self):
+        if self._thread.is_alive():
+            # Blocks until there is room, so events queued before close are all written
+            self._queue.put(None)
+            self._thread.join()
+
+
+_sink: OutputSink = ConsoleSink()
+
+
+def event_record(event: str, run_id: Optional[str], fields: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON-serializable record of an event, tagged with its run id and time."""
+    record = {"ts": time.time(), "run_id": run_id or CURRENT_RUN_ID.get(), "event": event}
+    record.update(fields)
+    return record
+
+
+def create_output_sink(mode: str = "console", events_path: Optional[str] = None, tag_runs: bool = False) -> OutputSink:
+    """
+    Build the sink for an output mode.
+
+    Args:
+        mode: "console", "quiet" or "jsonl"
+        events_path: JSONL file for the "jsonl" mode, '-' for stdout
+        tag_runs: Prefix console blocks with their run id
+
+    Raises:
+        ValueError: If the mode is unknown or "jsonl" has no events path
+    """
+    if mode == "console":
+        return ConsoleSink(tag_runs=tag_runs)
+    if mode == "quiet":
+        return OutputSink()
+    if mode == "jsonl":
+        if not events_path:
+            raise ValueError("The jsonl output mode needs an events path")
+        return JsonlSink(events_path)
+    raise ValueError(f"Unknown output mode: {mode}")
+
+
+def reserve_stdout(reserved: bool = True):
+    """Send console output and reports to stderr from now on, because stdout carries JSONL records."""
+    global _stdout_reserved
+    _stdout_reserved = reserved
+
+
+def report_stream() -> IO[str]:
+    """Stream for console output and reports: stdout, or stderr while stdout is reserved for records."""
+    return sys.stderr if _stdout_reserved else sys.stdout
+
+
+def set_output_sink(sink: OutputSink) -> OutputSink:
+    """Install the process-wide sink, closing the previous one. Returns the new sink."""
+    global _sink
+    previous, _sink = _sink, sink
+    if previous is not sink:
+        previous.close()
+    return sink
+
+
+def get_output_sink() -> OutputSink:
+    return _sink
+
+
+def emit(event: str, run_id: Optional[str] = None, **fields):
+    """Report an event to the process-wide sink."""
+    _sink.emit(event, run_id, **fields)
+
+
+def notice(text: str, run_id: Optional[str] = None):
+    """Report a one-line progress message, e.g. why a run stopped."""
+    _sink.emit("notice", run_id, text=text)
@@ -0,0 +1,147 @@
+"""
+Token budgeting for node instructions and compaction of the payloads they embed.
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Tuple
+from critique_parser import SEVERITIES, CritiqueParser
+
+# Rough characters per token for English prose; avoids loading a provider tokenizer
+CHARS_PER_TOKEN = 4
+
+# Longest issue text kept when critique items have to be shortened
+MAX_ITEM_CHARS = 200
+
+TRUNCATION_MARKER = " […]"
+
+_SECTION_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in a text."""
+    return (len(text or "") + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def normalize_issue(issue: str) -> str:
+    """Normalize an issue text so repeated issues compare equal."""
+    return _WHITESPACE.sub(" ", issue).strip().lower().rstrip(".")
+
+
+class PromptCompactor:
+    """Utility class shrinking analyses and critiques to fit a token budget."""
+
+    @staticmethod
+    def compact_text(text: str, max_tokens: int) -> str:
+        """
+        Shorten a text section by section, keeping the leading sentences of every section.
+
+        Args:
+            text: Text made of blank-line separated sections (paragraphs, headed blocks, lists)
+            max_tokens: Token budget for the result
+
+        Returns:
+            The text unchanged if it fits, otherwise an abridged version within the budget
+        """
+        if estimate_tokens(text) <= max_tokens:
+            return text
+        max_chars = max(0, max_tokens * CHARS_PER_TOKEN)
+        sections = [section.strip() for section in _SECTION_BREAK.split(text.strip()) if section.strip()]
+        # Share the budget evenly; sections shorter than their share leave room for the others
+        remaining_chars = max_chars
+        remaining_sections = len(sections)
+        abridged = []
+        for section in sorted(range(len(sections)), key=lambda index: len(sections[index])):
+            share = max(0, remaining_chars // remaining_sections - 2)
+            abridged.append((section, PromptCompactor._abridge_section(sections[section], share)))
+            remaining_chars -= len(abridged[-1][1]) + 2
+            remaining_sections -= 1
+        result = "\n\n".join(text for _, text in sorted(abridged) if text)
+        return result[:max_chars]
+
+    @staticmethod
+    def _abridge_section(section: str, max_chars: int) -> str:
+        """Keep whole leading sentences of a section, cutting the first one if nothing else fits."""
+        if len(section) <= max_chars:
+            return section
+        if max_chars <= len(TRUNCATION_MARKER):
+            return ""
+        kept = ""
+        for sentence in _SENTENCE_END.split(section):
+            candidate = f"{kept} {sentence}" if kept else sentence
+            if len(candidate) + len(TRUNCATION_MARKER) > max_chars:
+                break
+            kept = candidate
+        if not kept:
+            kept = section[:max_chars - len(TRUNCATION_MARKER)].rstrip()
+        return kept + TRUNCATION_MARKER
+
+    @staticmethod
+    def compact_critique(critique: Dict[str, Any], addressed: Iterable[str],
+                         max_tokens: int) -> Tuple[str, int, List[str]]:
+        """
+        Render a critique as plain severity sections within a token budget.
+
+        Steps, each applied only while the critique is still over budget: drop the
+        `Claude (via MCP):` prefix and JSON wrapper, drop duplicate items and non-critical
+        items already sent in an earlier iteration, drop minor items, shorten long items,
+        then abridge the whole text.
+
+        Args:
+            critique: Parsed critique from `CritiqueParser.parse`
+            addressed: Normalized issues already sent to the analysis agent
+            max_tokens: Token budget for the critique
+
+        Returns:
+            Tuple of (compacted critique text, number of items omitted, normalized issues
+            the text still contains)
+        """
+        if not critique.get("parsed"):
+            text = CritiqueParser.strip_prefix(critique.get("raw_response") or "")
+            return PromptCompactor.compact_text(text, max_tokens), 0, []
+
+        buckets = {severity: list(critique.get(severity) or []) for severity in SEVERITIES}
+        total_items = sum(len(items) for items in buckets.values())
+        text = PromptCompactor._render_buckets(buckets)
+        if estimate_tokens(text) > max_tokens:
+            addressed = set(addressed)
+            seen = set()
+            for severity in SEVERITIES:
+                kept = []
+                for item in buckets[severity]:
+                    key = normalize_issue(item)
+                    if key in seen or (severity != "critical" and key in addressed):
+                        continue
+                    seen.add(key)
+                    kept.append(item)
+                buckets[severity] = kept
+            text = PromptCompactor._render_buckets(buckets)
+        if estimate_tokens(text) > max_tokens:
+            buckets["minor"] = []
+            text = PromptCompactor._render_buckets(buckets)
+        # Pairs of (issue, text shown for it), so shortened items are still recorded by their full text
+        shown = [(item, item) for severity in SEVERITIES for item in buckets[severity]]
+        if estimate_tokens(text) > max_tokens:
+            shown = [(item, PromptCompactor._abridge_section(item, MAX_ITEM_CHARS)) for item, _ in shown]
+            for severity in SEVERITIES:
+                buckets[severity] = [PromptCompactor._abridge_section(item, MAX_ITEM_CHARS) for item in buckets[severity]]
+            text = PromptCompactor.compact_text(PromptCompactor._render_buckets(buckets), max_tokens)
+        # Abridging the whole text may cut trailing items; only those still there count as sent
+        sent = [normalize_issue(item) for item, item_text in shown if f"- {item_text}" in text]
+        omitted = total_items - len(sent)
+        return text, omitted, sent
+
+    @staticmethod
+    def _render_buckets(buckets: Dict[str, List[str]]) -> str:
+        """Render severity buckets as `Critical:` sections with bullet items."""
+        sections = []
+        for severity in SEVERITIES:
+            if buckets.get(severity):
+                sections.append(f"{severity.capitalize()}:\n" + "\n".join(f"- {item}" for item in buckets[severity]))
+        return "\n\n".join(sections) or "No issues."
+
+
+def critique_issues(critique: Dict[str, Any]) -> List[str]:
+    """Normalized issues of a parsed critique, to be remembered as addressed once sent."""
+    return [normalize_issue(item) for severity in SEVERITIES for item in critique.get(severity) or []]
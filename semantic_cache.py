@@ -0,0 +1,418 @@
+"""
+Semantic cache of finished runs: asks are embedded locally with a hashing vectorizer and
+searched by cosine similarity, so a paraphrase of an ask that already went through the
+Gemini↔Claude loop gets the stored analysis and critique back without invoking the graph.
+
+The vectors live in a float32 file that is memory-mapped and grown in place as entries are
+added; the asks and their results live in a SQLite file next to it. Nothing leaves the process.
+"""
+
+import asyncio
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter, deque
+from typing import Any, Dict, List, Optional, Set, Tuple
+import numpy as np
+from checkpointing import ainvoke_resumable
+from metrics import METRICS
+from output_sink import notice
+from state import StatePrinter
+
+# Bump when the features change, so persisted vectors are re-embedded from the stored asks
+VECTORIZER_VERSION = 1
+
+# Weight of a character trigram relative to a whole word
+CHAR_NGRAM_WEIGHT = 0.2
+
+# Rows per block of the vector file, which grows a block at a time
+INDEX_BLOCK_ROWS = 4096
+
+# IDF weights are recomputed once the index grew by this fraction since they were last computed
+IDF_REFRESH_GROWTH = 0.1
+
+# Lookup latencies kept for the p50/p95 report
+LOOKUP_SAMPLES = 10000
+
+# Nearest asks checked against the key-term guard before a lookup gives up
+GUARD_CANDIDATES = 5
+
+# Only runs that ended on their own are worth reusing
+CACHEABLE_STOP_REASONS = ("no_blocking_issues", "converged", "max_iterations")
+
+STOP_WORDS = frozenset(
+    "a an and are as at be by can could do does for from how i in is it its me my of on or our should "
+    "so than that the their them there these this those to was we what when where which who why will "
+    "with would you your".split()
+)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Words and numbers as written, keeping decimal and thousands separators ("1.5", "10,000"), and sentence ends
+_TOKEN = re.compile(r"[^\W_]+(?:[.,]\d+)*|[.!?]")
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN.findall(text or "")
+
+
+def key_terms(text: str) -> Set[str]:
+    """
+    Lowercased terms an answer depends on: numbers (also inside words like "Q3" or "5G"), acronyms
+    and capitalized words past the start of a sentence, which are mostly names of places,
+    organizations and products. Similar vectors do not tell "sales in Europe" from "sales in Asia".
+    """
+    terms = set()
+    sentence_start = True
+    for token in _tokens(text):
+        if token in ".!?":
+            sentence_start = True
+            continue
+        has_digit = any(char.isdigit() for char in token)
+        is_name = (len(token) > 1 and token.isupper()) or (token[0].isupper() and not sentence_start)
+        if (has_digit or is_name) and token.lower() not in STOP_WORDS:
+            terms.add(token.lower())
+        sentence_start = False
+    return terms
+
+
+def same_key_terms(ask: str, other: str) -> bool:
+    """Whether every key term of each ask also appears in the other, in any case or position."""
+    words = {token.lower() for token in _tokens(ask)}
+    other_words = {token.lower() for token in _tokens(other)}
+    return key_terms(ask) <= other_words and key_terms(other) <= words
+
+
+class HashingVectorizer:
+    """
+    Embeds text into a fixed number of dimensions without a vocabulary: words, word bigrams and
+    character trigrams of each word are hashed (crc32, stable across processes) into signed buckets
+    and weighted by sublinear term frequency. `VectorIndex` applies the IDF part of TF-IDF.
+    """
+
+    def __init__(self, dimensions: int = 512):
+        self.dimensions = dimensions
+
+    @staticmethod
+    def features(text: str) -> Counter:
+        """Weighted features of a text: stop words dropped, word order only kept in bigrams."""
+        words = [word for word in _WORD.findall((text or "").lower()) if word not in STOP_WORDS]
+        features: Counter = Counter()
+        for word in words:
+            features[f"w:{word}"] += 1.0
+            padded = f"#{word}#"
+            for start in range(len(padded) - 2):
+                features[f"c:{padded[start:start + 3]}"] += CHAR_NGRAM_WEIGHT
+        for first, second in zip(words, words[1:]):
+            features[f"b:{first} {second}"] += 1.0
+        return features
+
+    def transform(self, text: str) -> np.ndarray:
+        """Unit-length float32 vector of `text`, all zeros when it has no features."""
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for feature, weight in self.features(text).items():
+            digest = zlib.crc32(feature.encode("utf-8"))
+            sign = 1.0 if digest & 0x80000000 else -1.0
+            vector[digest % self.dimensions] += sign * (1.0 + math.log(weight) if weight >= 1.0 else weight)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+
+class VectorIndex:
+    """
+    Append-only collection of term-frequency vectors with brute-force cosine search weighted by
+    inverse document frequency, so words every ask shares ("what are the main ...") count less
+    than the ones naming its topic.
+
+    Vectors are stored column-major in blocks of `INDEX_BLOCK_ROWS` rows, shape (blocks, dimensions,
+    rows), so a search only reads the dimensions the query has features in (about a tenth of them
+    for a short ask) instead of the whole matrix. With a path the blocks are a memory-mapped file,
+    grown a block at a time; rows past `count` are unused space and a row that never made it to disk
+    is all zeros, which matches nothing. Document frequencies are rebuilt from the blocks when the
+    index is opened and the IDF weights (with the weighted row norms) are refreshed as it grows.
+    """
+
+    def __init__(self, dimensions: int, path: Optional[str] = None, count: int = 0):
+        """
+        Open the index.
+
+        Args:
+            dimensions: Length of every vector
+            path: File backing the blocks, or None to keep them in memory
+            count: Rows already holding vectors (the caller keeps the count with the entries)
+        """
+        self.dimensions = dimensions
+        self.path = path
+        self.count = 0
+        self._blocks = self._allocate(max(1, -(-count // INDEX_BLOCK_ROWS)))
+        self.count = count
+        self._norms = np.zeros(self.capacity, dtype=np.float32)
+        self._document_frequency = np.zeros(dimensions, dtype=np.float64)
+        for block in range(-(-count // INDEX_BLOCK_ROWS)):
+            rows = min(INDEX_BLOCK_ROWS, count - block * INDEX_BLOCK_ROWS)
+            self._document_frequency += (self._blocks[block, :, :rows] != 0).sum(axis=1)
+        self._refresh_weights()
+
+    @property
+    def capacity(self) -> int:
+        return len(self._blocks) * INDEX_BLOCK_ROWS
+
+    def _allocate(self, blocks: int) -> np.ndarray:
+        """At least `blocks` blocks, keeping the vectors already stored."""
+        if not self.path:
+            allocated = np.zeros((blocks, self.dimensions, INDEX_BLOCK_ROWS), dtype=np.float32)
+            if self.count:
+                allocated[:len(self._blocks)] = self._blocks
+            return allocated
+
+        block_bytes = self.dimensions * INDEX_BLOCK_ROWS * np.dtype(np.float32).itemsize
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if size < blocks * block_bytes:
+            with open(self.path, "ab") as vector_file:
+                vector_file.truncate(blocks * block_bytes)
+            size = blocks * block_bytes
+        return np.memmap(self.path, dtype=np.float32, mode="r+",
+                         shape=(size // block_bytes, self.dimensions, INDEX_BLOCK_ROWS))
+
+    def _refresh_weights(self):
+        """Recompute the IDF weights and every row's norm under them."""
+        self._squared_weights = np.square(
+            np.log((1.0 + self.count) / (1.0 + self._document_frequency)) + 1.0).astype(np.float32)
+        for block in range(-(-self.count // INDEX_BLOCK_ROWS)):
+            start = block * INDEX_BLOCK_ROWS
+            self._norms[start:start + INDEX_BLOCK_ROWS] = np.sqrt(self._squared_weights @ np.square(self._blocks[block]))
+        self._refreshed_count = self.count
+
+    def add(self, vector: np.ndarray) -> int:
+        """Append a vector and return its row."""
+        if self.count >= self.capacity:
+            self.flush()
+            self._blocks = self._allocate(len(self._blocks) + 1)
+            self._norms = np.concatenate([self._norms, np.zeros(INDEX_BLOCK_ROWS, dtype=np.float32)])
+        block, offset = divmod(self.count, INDEX_BLOCK_ROWS)
+        self._blocks[block, :, offset] = vector
+        self._norms[self.count] = np.sqrt(np.square(vector) @ self._squared_weights)
+        self._document_frequency += vector != 0
+        self.count += 1
+        if self.count >= self._refreshed_count * (1.0 + IDF_REFRESH_GROWTH):
+            self._refresh_weights()
+        return self.count - 1
+
+    def search(self, vector: np.ndarray, limit: int = 1) -> List[Tuple[int, float]]:
+        """Rows and weighted cosine similarities of the `limit` nearest vectors, most similar first."""
+        dimensions = np.flatnonzero(vector)
+        weighted = vector[dimensions] * self._squared_weights[dimensions]
+        query_norm = float(np.sqrt(vector[dimensions] @ weighted))
+        if not self.count or not query_norm:
+            return []
+        blocks = self._blocks[:-(-self.count // INDEX_BLOCK_ROWS)]
+        scores = np.tensordot(weighted, blocks[:, dimensions, :], axes=(0, 1)).reshape(-1)[:self.count]
+        norms = self._norms[:self.count] * query_norm
+        scores = np.divide(scores, norms, out=np.zeros_like(scores), where=norms > 0)
+        limit = min(limit, self.count)
+        rows = np.argpartition(-scores, limit - 1)[:limit]
+        return [(int(row), float(scores[row])) for row in rows[np.argsort(-scores[rows], kind="stable")]]
+
+    def flush(self):
+        if isinstance(self._blocks, np.memmap):
+            self._blocks.flush()
+
+
+class SemanticCache:
+    """
+    Final analyses and critiques of earlier asks, found by the similarity of a new ask to them.
+    A similar ask is only reused when both asks name the same key terms (see `key_terms`), since
+    swapping a region or a year barely moves the vectors but changes the answer.
+    Lookups and stores are thread-safe; `ainvoke` runs them off the event loop.
+    """
+
+    def __init__(self, path: Optional[str] = None, threshold: float = 0.9, dimensions: int = 512):
+        """
+        Open (and create if needed) the cache.
+
+        Args:
+            path: Directory holding `entries.sqlite3` and `vectors.f32`, or None to keep the cache in memory only
+            threshold: Cosine similarity from which an earlier ask counts as the same ask
+            dimensions: Vector dimensions; changing it re-embeds the stored asks on open
+        """
+        self.path = path
+        self.threshold = threshold
+        self.vectorizer = HashingVectorizer(dimensions)
+        self._lock = threading.Lock()
+        self._lookup_seconds: deque = deque(maxlen=LOOKUP_SAMPLES)
+        self.hits = 0
+        self.misses = 0
+        self.rejections = 0
+        self._entries: List[Dict[str, Any]] = []
+        self._connection = None
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self._open_database(os.path.join(path, "entries.sqlite3"))
+            self.index = self._open_index(os.path.join(path, "vectors.f32"))
+        else:
+            self.index = VectorIndex(dimensions)
+
+    def _open_database(self, path: str):
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries (row INTEGER PRIMARY KEY, ask TEXT NOT NULL, "
+            "result TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._connection.commit()
+
+    def _open_index(self, vector_path: str) -> VectorIndex:
+        """Map the vector file, re-embedding every stored ask when it was written with other settings."""
+        count = self._connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        layout = f"{VECTORIZER_VERSION}:{self.vectorizer.dimensions}:{INDEX_BLOCK_ROWS}"
+        stored = self._connection.execute("SELECT value FROM meta WHERE key = 'layout'").fetchone()
+        if stored and stored[0] == layout and os.path.exists(vector_path):
+            return VectorIndex(self.vectorizer.dimensions, vector_path, count)
+
+        if os.path.exists(vector_path):
+            os.remove(vector_path)
+        index = VectorIndex(self.vectorizer.dimensions, vector_path)
+        for (ask,) in self._connection.execute("SELECT ask FROM entries ORDER BY row"):
+            index.add(self.vectorizer.transform(ask))
+        index.flush()
+        self._connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('layout', ?)", (layout,))
+        self._connection.commit()
+        return index
+
+    def lookup(self, ask: str) -> Optional[Dict[str, Any]]:
+        """
+        Find the stored result of the most similar earlier ask.
+
+        Args:
+            ask: New ask
+
+        Returns:
+            Stored result (`ask`, `analysis_output`, `critic_output`, `current_iterations`, `stop_reason`)
+            with its `similarity`, or None when no earlier ask with the same key terms reaches the threshold
+        """
+        start_time = time.perf_counter()
+        vector = self.vectorizer.transform(ask)
+        entry, similarity, rejected = None, 0.0, 0
+        with self._lock:
+            for row, similarity in self.index.search(vector, GUARD_CANDIDATES):
+                if similarity < self.threshold:
+                    break
+                candidate = self._entry(row)
+                if candidate and same_key_terms(ask, candidate["ask"]):
+                    entry = candidate
+                    break
+                rejected += 1
+            self.rejections += rejected
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        seconds = time.perf_counter() - start_time
+        self._lookup_seconds.append(seconds)
+        METRICS.increment("semantic_cache_lookups_total", outcome="hit" if entry else "miss")
+        if rejected:
+            METRICS.increment("semantic_cache_key_term_rejections_total", rejected)
+        METRICS.observe("semantic_cache_lookup_seconds", seconds)
+        return dict(entry, similarity=round(similarity, 4)) if entry else None
+
+    def _entry(self, row: int) -> Optional[Dict[str, Any]]:
+        if not self._connection:
+            return self._entries[row]
+        found = self._connection.execute("SELECT ask, result FROM entries WHERE row = ?", (row,)).fetchone()
+        return dict(json.loads(found[1]), ask=found[0]) if found else None
+
+    def store(self, ask: str, state: Dict[str, Any]) -> bool:
+        """
+        Store the result of a finished run.
+
+        Args:
+            ask: Ask the run answered
+            state: Final state of the run
+
+        Returns:
+            True when stored; runs cut short (deadline, timeout), without analysis or served
+            from the cache are not
+        """
+        if (state.get("stop_reason") not in CACHEABLE_STOP_REASONS or not state.get("analysis_output")
+                or state.get("semantic_match")):
+            return False
+        result = {
+            "analysis_output": state.get("analysis_output"),
+            "critic_output": state.get("critic_output"),
+            "current_iterations": state.get("current_iterations"),
+            "stop_reason": state.get("stop_reason")
+        }
+        vector = self.vectorizer.transform(ask)
+        with self._lock:
+            row = self.index.add(vector)
+            if not self._connection:
+                self._entries.append(dict(result, ask=ask))
+                return True
+            self._connection.execute("INSERT INTO entries (row, ask, result, created_at) VALUES (?, ?, ?, ?)",
+                                     (row, ask, json.dumps(result, ensure_ascii=False), time.time()))
+            self._connection.commit()
+        return True
+
+    async def ainvoke(self, app: Any, initial_state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Answer `initial_state` from the cache when a similar ask was answered before,
+        otherwise run the graph (see `ainvoke_resumable`) and store its final state.
+
+        Returns:
+            Final state; a cached one has stop reason `semantic_cache` and `semantic_match` set
+        """
+        match = await asyncio.to_thread(self.lookup, initial_state["ask"])
+        if match is None:
+            final_state = await ainvoke_resumable(app, initial_state)
+            await asyncio.to_thread(self.store, initial_state["ask"], final_state)
+            return final_state
+
+        final_state = dict(
+            initial_state,
+            analysis_output=match["analysis_output"],
+            critic_output=match["critic_output"],
+            current_iterations=match["current_iterations"],
+            stop_reason="semantic_cache",
+            # One analysis and one critique per iteration of the stored run (the counter starts at 1)
+            llm_calls_saved=2 * max(1, (match["current_iterations"] or 2) - 1),
+            semantic_match={"ask": match["ask"], "similarity": match["similarity"]}
+        )
+        notice(f"🧲 Reusing the result of a similar ask (similarity {match['similarity']:.2f}): {match['ask']}",
+               initial_state["run_id"])
+        StatePrinter.print_analysis_only(final_state)
+        StatePrinter.print_critic_only(final_state)
+        return final_state
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss counters and lookup latency.
+
+        Returns:
+            Dictionary with hits, misses, hit rate, similar asks rejected for other key terms, entries
+            and p50/p95 lookup milliseconds
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            samples = sorted(self._lookup_seconds)
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "rejections": self.rejections,
+                "entries": self.index.count,
+                "p50_ms": samples[len(samples) // 2] * 1000 if samples else None,
+                "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000 if samples else None
+            }
+
+    def close(self):
+        """Flush the vector file and close the SQLite connection."""
+        with self._lock:
+            self.index.flush()
+            if self._connection:
+                self._connection.close()
+                self._connection = None
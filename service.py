@@ -0,0 +1,369 @@
+"""
+Long-running service mode: one process keeps the compiled graph and warm agents (including the
+`claude mcp serve` sessions) and answers asks over local HTTP, on TCP or a Unix socket, so an ask
+no longer pays Python startup, provider imports, graph compilation and the MCP handshake.
+
+Endpoints:
+    POST /asks     {"ask": "...", "id": optional, "run_id": optional, "stream": false}
+                   answers with the final record, as written by batch mode, plus the ask's "run_id";
+                   with "stream": true the response is NDJSON, one line per event: "queued" and
+                   "started" for the ask, the run's own events (node done, analysis, critique, ...)
+                   and a last `{"event": "result", "record": {...}}` line. "id" only labels the
+                   record, so clients may repeat it. Without "run_id" the service generates one and
+                   drops the run's checkpoints once it completes; a failed run keeps them, and
+                   POSTing the same ask with the returned "run_id" resumes it. A client-supplied
+                   "run_id" keeps its checkpoints, so repeating the ask reuses the finished run
+    GET  /health   queued and running asks and the queue capacity
+    GET  /metrics  Prometheus text metrics
+
+Asks wait in a bounded queue in front of `concurrency` workers. When the queue is full an ask is
+rejected at once with 503 and a Retry-After estimate, instead of waiting for a slot it may never get.
+"""
+
+import asyncio
+import json
+import math
+import signal
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional, Tuple
+from batch_runner import BatchRunner
+from checkpointing import ainvoke_resumable
+from metrics import METRICS
+from output_sink import OutputSink, event_record
+from state import Configuration, create_initial_state
+
+# Largest request body accepted, in bytes
+MAX_REQUEST_BYTES = 1 << 20
+
+# Weight of the latest run in the moving average behind Retry-After
+RUN_SECONDS_SMOOTHING = 0.2
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 503: "Service Unavailable"}
+
+
+class ServiceSink(OutputSink):
+    """
+    Passes events to the configured sink and copies those of runs with a streaming client
+    to that client's queue, on the service's event loop.
+    """
+
+    def __init__(self, inner: OutputSink):
+        self.inner = inner
+        self._subscribers: Dict[str, Tuple[asyncio.AbstractEventLoop, Callable[[Dict[str, Any]], None]]] = {}
+
+    def subscribe(self, run_id: str, deliver: Callable[[Dict[str, Any]], None]):
+        """Send the events of `run_id` to `deliver`, called on the running event loop."""
+        self._subscribers[run_id] = (asyncio.get_running_loop(), deliver)
+
+    def unsubscribe(self, run_id: str):
+        self._subscribers.pop(run_id, None)
+
+    def emit(self, event: str, run_id: Optional[str] = None, **fields):
+        self.inner.emit(event, run_id, **fields)
+        record = event_record(event, run_id, fields)
+        subscriber = self._subscribers.get(record["run_id"])
+        if subscriber is None:
+            return
+        loop, deliver = subscriber
+        try:
+            on_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            deliver(record)
+        else:
+            loop.call_soon_threadsafe(deliver, record)
+
+    def close(self):
+        self.inner.close()
+
+
+class ServiceJob:
+    """An admitted ask, waiting for or held by a worker."""
+
+    def __init__(self, item: Dict[str, Any], stream: bool, run_id: Optional[str] = None):
+        self.item = item
+        # Run id of the ask's events and checkpoints; the client's id only labels the record, since
+        # clients may repeat ids
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        # Checkpoints of a run id the client chose are kept for it to resume or reuse
+        self.keep_checkpoints = run_id is not None
+        self.admitted_at = time.perf_counter()
+        self.result: asyncio.Future = asyncio.get_running_loop().create_future()
+        # Events for a streaming client, ending with None once the result is set
+        self.events: Optional[asyncio.Queue] = asyncio.Queue() if stream else None
+        self.abandoned = False
+
+
+class AnalysisService:
+    """
+    Serves asks from a compiled graph with bounded concurrency and admission control.
+    The graph and agents are created by the caller and reused by every ask.
+    """
+
+    def __init__(self, app: Any, configuration: Configuration, concurrency: int = 4, queue_limit: int = 16,
+                 sink: Optional[ServiceSink] = None, semantic_cache: Optional[Any] = None):
+        """
+        Initialize the service.
+
+        Args:
+            app: Compiled LangGraph application exposing `ainvoke`
+            configuration: Configuration applied to every ask
+            concurrency: Asks run at the same time
+            queue_limit: Admitted asks waiting for a worker before new ones are rejected
+            sink: Installed `ServiceSink`, needed to stream run events to clients
+            semantic_cache: `SemanticCache` answering asks similar to earlier ones without running the graph
+        """
+        self.app = app
+        self.configuration = configuration
+        self.concurrency = max(1, concurrency)
+        self.queue_limit = max(1, queue_limit)
+        self.sink = sink
+        self.semantic_cache = semantic_cache
+        self.running = 0
+        self.address: Optional[Tuple[str, int]] = None
+        self._run_seconds: Optional[float] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._stopped: Optional[asyncio.Event] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765, socket_path: Optional[str] = None):
+        """
+        Start the workers and listen on `socket_path`, or on `host`:`port` when it is None.
+        With port 0 the bound port is in `address`.
+        """
+        self._queue = asyncio.Queue(maxsize=self.queue_limit)
+        self._stopped = asyncio.Event()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        if socket_path:
+            self._server = await asyncio.start_unix_server(self._handle, path=socket_path)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port)
+            self.address = self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        """Serve the started service until `stop()`, SIGINT or SIGTERM, then close it."""
+        loop = asyncio.get_running_loop()
+        for stop_signal in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(stop_signal, self._stopped.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+        try:
+            await self._stopped.wait()
+        finally:
+            await self.close()
+
+    def stop(self):
+        self._stopped.set()
+
+    async def close(self):
+        """Stop accepting asks, cancel the workers and fail the asks still queued or running."""
+        if self._server:
+            self._server.close()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        while not self._queue.empty():
+            self._stop_job(self._queue.get_nowait())
+        if self._server:
+            await self._server.wait_closed()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "running": self.running,
+            "concurrency": self.concurrency,
+            "queue_limit": self.queue_limit
+        }
+
+    def retry_after(self) -> int:
+        """Seconds until a queue slot is likely free, from the average run time so far."""
+        run_seconds = self._run_seconds or 1.0
+        return max(1, math.ceil(run_seconds * (self._queue.qsize() + 1) / self.concurrency))
+
+    def admit(self, item: Dict[str, Any], stream: bool = False, run_id: Optional[str] = None) -> Optional[ServiceJob]:
+        """
+        Queue an ask, or return None when the queue is full and it has to be rejected.
+        With `run_id` the ask resumes that run's checkpoints, if any, and keeps them.
+        """
+        job = ServiceJob(item, stream, run_id)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            job = None
+        else:
+            self._progress(job, "queued", ahead=self._queue.qsize() - 1, running=self.running)
+        METRICS.increment("service_asks_total", outcome="admitted" if job else "rejected")
+        return job
+
+    async def _worker(self):
+        while True:
+            job: ServiceJob = await self._queue.get()
+            if job.abandoned:
+                METRICS.increment("service_asks_total", outcome="abandoned")
+                continue
+            queue_wait = time.perf_counter() - job.admitted_at
+            METRICS.observe("service_queue_wait_seconds", queue_wait)
+            self._progress(job, "started", queue_wait_seconds=round(queue_wait, 3))
+            self.running += 1
+            try:
+                record = await self._run(job)
+            except asyncio.CancelledError:
+                self._stop_job(job)
+                raise
+            finally:
+                self.running -= 1
+            self._finish(job, record)
+
+    async def _run(self, job: ServiceJob) -> Dict[str, Any]:
+        """Run an ask and build its record, the error record if the run failed."""
+        item = job.item
+        start_time = time.perf_counter()
+        initial_state = create_initial_state(item["ask"], self.configuration, run_id=job.run_id)
+        if job.events is not None and self.sink:
+            self.sink.subscribe(initial_state["run_id"], job.events.put_nowait)
+        try:
+            if self.semantic_cache:
+                final_state = await self.semantic_cache.ainvoke(self.app, initial_state)
+            else:
+                final_state = await ainvoke_resumable(self.app, initial_state)
+        except Exception as e:
+            METRICS.increment("service_asks_total", outcome="failed")
+            return {"id": item["id"], "run_id": job.run_id, "ask": item["ask"], "error": str(e),
+                    "latency_s": round(time.perf_counter() - start_time, 3)}
+        finally:
+            if self.sink:
+                self.sink.unsubscribe(initial_state["run_id"])
+        checkpointer = getattr(self.app, "checkpointer", None)
+        if checkpointer is not None and not job.keep_checkpoints:
+            # Nobody can resume a generated run id once the record is returned
+            await checkpointer.adelete_thread(job.run_id)
+
+        seconds = time.perf_counter() - start_time
+        self._run_seconds = seconds if self._run_seconds is None else (
+            RUN_SECONDS_SMOOTHING * seconds + (1 - RUN_SECONDS_SMOOTHING) * self._run_seconds)
+        METRICS.observe("service_run_seconds", seconds)
+        return dict(BatchRunner.state_to_record(item["id"], final_state, seconds), run_id=job.run_id)
+
+    @staticmethod
+    def _progress(job: ServiceJob, event: str, **fields):
+        """Tell a streaming client where its ask is before the run's own events start."""
+        if job.events is not None:
+            job.events.put_nowait(event_record(event, job.run_id, fields))
+
+    def _stop_job(self, job: ServiceJob):
+        self._finish(job, {"id": job.item["id"], "run_id": job.run_id, "ask": job.item["ask"],
+                           "error": "Service stopped"})
+
+    @staticmethod
+    def _finish(job: ServiceJob, record: Dict[str, Any]):
+        if not job.result.done():
+            job.result.set_result(record)
+        if job.events is not None:
+            job.events.put_nowait(None)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one HTTP request; every response closes the connection."""
+        try:
+            request = await self._read_request(reader)
+            if isinstance(request, int):
+                await self._respond(writer, request, {"error": _REASONS[request]})
+                return
+            method, path, body = request
+            if path == "/health":
+                await self._respond(writer, 200, dict(self.stats(), status="ok"))
+            elif path == "/metrics":
+                await self._respond(writer, 200, METRICS.render_prometheus(), "text/plain; version=0.0.4")
+            elif path != "/asks":
+                await self._respond(writer, 404, {"error": f"Unknown path {path}"})
+            elif method != "POST":
+                await self._respond(writer, 405, {"error": "Asks are POSTed"})
+            else:
+                await self._handle_ask(writer, body)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_ask(self, writer: asyncio.StreamWriter, body: bytes):
+        try:
+            payload = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            payload = None
+        if not isinstance(payload, dict) or not isinstance(payload.get("ask"), str) or not payload["ask"].strip():
+            await self._respond(writer, 400, {"error": "Expected a JSON object with an 'ask' string"})
+            return
+        run_id = payload.get("run_id")
+        if run_id is not None and (not isinstance(run_id, str) or not run_id.strip()):
+            await self._respond(writer, 400, {"error": "'run_id' must be a non-empty string"})
+            return
+
+        item = {"id": payload.get("id") or uuid.uuid4().hex[:12], "ask": payload["ask"]}
+        job = self.admit(item, stream=bool(payload.get("stream")), run_id=run_id)
+        if job is None:
+            await self._respond(writer, 503, dict(self.stats(), error="Queue full"),
+                                headers={"Retry-After": str(self.retry_after())})
+            return
+        try:
+            if job.events is None:
+                await self._respond(writer, 200, await asyncio.shield(job.result))
+            else:
+                await self._stream(writer, job)
+        except (ConnectionError, asyncio.CancelledError):
+            # A client gone before its ask started frees the slot; a started run still completes
+            job.abandoned = True
+            raise
+
+    async def _stream(self, writer: asyncio.StreamWriter, job: ServiceJob):
+        """Write the run's events as NDJSON chunks as they arrive, then its record."""
+        writer.write(self._head(200, "application/x-ndjson", {"Transfer-Encoding": "chunked"}))
+        while True:
+            record = await job.events.get()
+            if record is None:
+                record = {"event": "result", "record": job.result.result()}
+            line = (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+            writer.write(b"%x\r\n%s\r\n" % (len(line), line))
+            await writer.drain()
+            if record.get("event") == "result":
+                break
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader):
+        """Read the request line, headers and body; an HTTP status code when the request is unusable."""
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) < 2:
+            return 400
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            return 400
+        if length > MAX_REQUEST_BYTES:
+            return 413
+        body = await reader.readexactly(length) if length else b""
+        return request_line[0].upper(), request_line[1].split("?")[0], body
+
+    @staticmethod
+    def _head(status: int, content_type: str, headers: Optional[Dict[str, str]] = None) -> bytes:
+        lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}", f"Content-Type: {content_type}",
+                 "Connection: close"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, body: Any,
+                       content_type: str = "application/json", headers: Optional[Dict[str, str]] = None):
+        data = (body if isinstance(body, str) else json.dumps(body, ensure_ascii=False, default=str)).encode("utf-8")
+        writer.write(self._head(status, content_type, dict(headers or {}, **{"Content-Length": str(len(data))})))
+        writer.write(data)
+        await writer.drain()
@@ -1,101 +1,172 @@
-from typing import TypedDict, Optional, Dict
+import uuid
+from typing import Annotated, TypedDict, Optional, Dict, List
 from dataclasses import dataclass
+from output_sink import emit
 
 @dataclass(frozen=True)
 class Configuration:
     """Immutable configuration settings for the workflow."""
     max_iterations: int = 3
+    convergence_threshold: float = 0.05                       # Stop when less than this fraction of the analysis changed
+    response_cache_enabled: bool = False                      # Opt-in cache for agent responses
+    response_cache_path: Optional[str] = ".cache/responses.sqlite3"  # SQLite disk tier, None for memory only
+    response_cache_memory_entries: int = 256                  # In-memory LRU tier size
+    response_cache_ttl_seconds: float = 7 * 24 * 3600         # Entries older than this are ignored, in memory and on disk
+    response_cache_max_entries: int = 10000                   # Disk tier size before LRU eviction
+    semantic_cache_enabled: bool = False                      # Answer asks similar to an earlier one from its stored result
+    semantic_cache_path: Optional[str] = ".cache/semantic"    # Directory of the vector index and stored results, None for memory only
+    semantic_cache_threshold: float = 0.9                     # Cosine similarity from which an earlier ask counts as the same ask
+    semantic_cache_dimensions: int = 512                      # Hashed feature dimensions of the ask vectors
+    stream_analysis: bool = False                             # Print Gemini's analysis as tokens arrive
+    mcp_pool_size: int = 1                                    # Claude MCP sessions for parallel critiques
+    mcp_batch_size: int = 1                                   # Concurrent critiques sent in one MCP Task call, 1 to disable
+    mcp_batch_window_seconds: float = 0.05                    # Time a critique waits for others to join its batch
+    warm_up_agents: bool = True                               # Create agents in the background at startup
+    warm_up_connections: int = 0                              # Connections each shared provider client opens before the first ask, 0 to disable
+    gemini_connection_pool_size: Optional[int] = None         # HTTP connections of each shared Gemini client, None for the SDK default
+    max_tool_rounds: int = 3                                  # Tool-calling rounds before a final answer is forced
+    tool_timeout_seconds: Optional[float] = 30.0              # Time limit for each tool call
+    tool_cache_bypass: bool = False                           # Skip the process-wide tool result cache
+    metrics_enabled: bool = True                              # Collect in-process metrics and trace spans
+    metrics_path: Optional[str] = None                        # Prometheus text file written at exit
+    trace_path: Optional[str] = None                          # JSONL file receiving trace spans
+    checkpoint_path: Optional[str] = None                     # SQLite checkpoints for resumable runs, None to disable
+    prompt_token_budget: Optional[int] = 4000                 # Estimated tokens per instruction before compaction, None to disable
+    candidate_count: int = 1                                  # Analyses generated in parallel per iteration, >1 enables fan-out
+    deadline_seconds: Optional[float] = None                  # End-to-end time limit per run, then it ends with its best analysis
+    analysis_timeout_seconds: Optional[float] = 180.0         # Time limit for each analysis call
+    critique_timeout_seconds: Optional[float] = 600.0         # Time limit for each critique call (MCP Task runs are slow)
+    hedge_percentile: Optional[float] = None                  # Send a duplicate request once a call outlasts this latency percentile
+    gemini_requests_per_minute: Optional[float] = None        # Gemini request quota shared by all agents, None for unlimited
+    gemini_tokens_per_minute: Optional[float] = None          # Gemini token quota (prompt and response), None for unlimited
+    claude_requests_per_minute: Optional[float] = None        # Claude MCP request quota shared by all agents, None for unlimited
+    claude_tokens_per_minute: Optional[float] = None          # Claude MCP token quota (estimated from text), None for unlimited
+    provider_max_retries: int = 3                             # Retries of a failed provider call, with jittered exponential backoff
+    circuit_failure_threshold: int = 5                        # Consecutive provider failures that open its circuit
+    circuit_reset_seconds: float = 30.0                       # Time an open circuit rejects calls before a trial call
+    analysis_model: str = "gemini-2.5-flash"                  # Gemini model of the primary tier
+    analysis_temperature: float = 0.1                         # Temperature of every analysis tier
+    loop_back_model: Optional[str] = None                     # Cheaper model for re-analyses when only major/minor issues remain
+    fallback_model: Optional[str] = None                      # Model used while the preferred tier's p95 is over the threshold
+    tier_latency_threshold_seconds: Optional[float] = None    # p95 analysis latency above which a tier is avoided, None to disable
+    patch_reanalysis: bool = False                            # Re-analyses edit only the sections the critique names
+    output_mode: str = "console"                              # Run output: "console", "quiet" or "jsonl" events
+    events_path: Optional[str] = None                         # JSONL file receiving events in "jsonl" mode, '-' for stdout
+    cassette_path: Optional[str] = None                       # Cassette file agent calls are recorded to or replayed from, None to disable
+    cassette_mode: str = "record"                             # "record" appends every agent call, "replay" answers them from the cassette
+    cassette_latency: str = "original"                        # Replay latency: "original" as recorded, "zero" for CPU speed
+
+def merge_candidates(existing: Optional[List[Dict]], new: Optional[List[Dict]]) -> List[Dict]:
+    """
+    Reducer for candidate analyses written by parallel nodes.
+    Candidates are keyed by (iteration, index), so re-delivered writes replace instead of duplicating,
+    and only the latest iteration's candidates are kept.
+    """
+    merged = {(candidate["iteration"], candidate["index"]): candidate for candidate in (existing or []) + (new or [])}
+    if not merged:
+        return []
+    latest = max(iteration for iteration, _ in merged)
+    return [merged[key] for key in sorted(merged) if key[0] == latest]
 
 class State(TypedDict):
+    run_id: str                           # Identifier tagging the run's trace spans
     ask: Optional[str]                    # User's original input/question
     node_instruction: Optional[str]       # Current instruction written by each node
     analysis_output: Optional[str]        # Gemini's analysis result
-    critic_output: Optional[Dict]         # Claude's critique: {"critical": [], "major": [], "minor": []}
+    critic_output: Optional[Dict]         # Claude's critique: {"critical": [], "major": [], "minor": [], "raw_response": str}
+    previous_analysis_output: Optional[str]  # Analysis from the previous iteration, used for convergence
     configuration: Configuration          # Immutable configuration settings
     current_iterations: int               # Current iteration count
+    timings: Optional[Dict[str, float]]   # Accumulated seconds spent per node
+    stop_reason: Optional[str]            # Why the loop stopped: no_blocking_issues, converged, max_iterations, deadline, node_timeout or semantic_cache
+    llm_calls_saved: int                  # LLM calls avoided by stopping before max_iterations
+    addressed_issues: List[str]           # Normalized critique issues already sent for re-analysis
+    prompt_sizes: List[Dict]              # Estimated tokens per node instruction, before and after compaction
+    candidates: Annotated[List[Dict], merge_candidates]  # Fan-out analyses of the current iteration: iteration, index, analysis
+    selected_candidate: Optional[int]     # Index of the candidate kept as analysis_output in fan-out mode
+    model_tier: Optional[str]             # Model tier of the latest analysis: primary, loop_back or fallback
+    patch_targets: Optional[List[int]]    # Sections the pending re-analysis edits, None for a full analysis
+    patched_sections: Optional[List[int]] # Sections changed by the latest patch, critiqued alone; None after a full analysis
+    semantic_match: Optional[Dict]        # Earlier ask whose result was reused (ask, similarity), None when the graph ran
+
+def create_initial_state(ask: str, configuration: Configuration, run_id: Optional[str] = None) -> State:
+    """Build the initial workflow state for a single ask, with a random run id unless one is given."""
+    return {
+        "run_id": run_id or uuid.uuid4().hex[:12],
+        "ask": ask,
+        "node_instruction": None,
+        "analysis_output": None,
+        "critic_output": None,
+        "previous_analysis_output": None,
+        "configuration": configuration,
+        "current_iterations": 1,
+        "timings": {},
+        "stop_reason": None,
+        "llm_calls_saved": 0,
+        "addressed_issues": [],
+        "prompt_sizes": [],
+        "candidates": [],
+        "selected_candidate": None,
+        "model_tier": None,
+        "patch_targets": None,
+        "patched_sections": None,
+        "semantic_match": None
+    }
 
 class StatePrinter:
-    """Utility class for pretty printing state."""
+    """
+    Reports state to the active output sink (see `output_sink`) instead of printing it,
+    so the console, quiet and JSONL modes all get the same events.
+    """
 
     @staticmethod
-    def _get_iteration_display(state: State) -> str:
-        """Helper method to get formatted iteration display."""
-        current_iter = state.get('current_iterations', 0)
+    def _progress(state: State) -> Dict:
+        """Run id and iteration progress shared by every state event."""
         config = state.get('configuration')
-        max_iter = config.max_iterations if config else 3
-        return f"🔄 Iteration: {current_iter}/{max_iter}"
+        return {
+            "run_id": state.get('run_id'),
+            "iteration": state.get('current_iterations', 0),
+            "max_iterations": config.max_iterations if config else 3
+        }
 
     @staticmethod
     def print_ask_only(state: State):
-        """Print only the ask question."""
-        print(f"\n{'='*60}")
-        print(f"{StatePrinter._get_iteration_display(state)}")
-        print(f"❓ QUESTION:")
-        print(f"{'='*60}")
-        print(f"{state.get('ask', 'None')}")
-        print(f"{'='*60}\n")
+        """Report only the ask question."""
+        emit("ask", ask=state.get('ask'), **StatePrinter._progress(state))
 
     @staticmethod
     def print_analysis_only(state: State):
-        """Print only the analysis output."""
-        print(f"\n{'='*60}")
-        print(f"{StatePrinter._get_iteration_display(state)}")
-        print(f"🤖 ANALYSIS:")
-        print(f"{'='*60}")
-        analysis = state.get('analysis_output', 'None')
-        print(f"{analysis}")
-        print(f"{'='*60}\n")
+        """Report only the analysis output."""
+        emit("analysis", analysis=state.get('analysis_output'), **StatePrinter._progress(state))
 
     @staticmethod
-    def print_critic_only(state: State):
-        """Print only the critic output."""
-        print(f"\n{'='*60}")
-        print(f"{StatePrinter._get_iteration_display(state)}")
-        print(f"🔍 CRITIQUE:")
-        print(f"{'='*60}")
-        critic = state.get('critic_output', {})
-        if critic:
-            if isinstance(critic, dict):
-                raw_response = critic.get('raw_response', '')
-                print(f"{raw_response}")
-            else:
-                print(f"{critic}")
-        else:
-            print("None")
-        print(f"{'='*60}\n")
+    def print_analysis_header(state: State):
+        """Report the start of an analysis, before its streamed chunks."""
+        emit("analysis_start", **StatePrinter._progress(state))
 
     @staticmethod
-    def print_state(state: State):
-        """Pretty print the current state."""
-        print(f"\n{'='*60}")
-        print(f"📊 State:")
-        print(f"{'='*60}")
-
-        # Show iteration progress
-        current_iter = state.get('current_iterations', 0)
-        config = state.get('configuration')
-        max_iter = config.max_iterations if config else 3
-        print(f"🔄 Iteration: {current_iter}/{max_iter}")
-
-        print(f"\n❓ ASK: {state.get('ask', 'None')}")
+    def print_analysis_chunk(chunk: str):
+        """Report a streamed analysis chunk."""
+        emit("analysis_chunk", text=chunk)
 
-        print(f"\n🎯 NODE INSTRUCTION:")
-        instruction = state.get('node_instruction', 'None')
-        print(f"   {instruction}")
+    @staticmethod
+    def print_analysis_footer(state: State):
+        """Report the end of a streamed analysis, with its complete text."""
+        emit("analysis", analysis=state.get('analysis_output'), streamed=True, **StatePrinter._progress(state))
 
-        print(f"\n🤖 ANALYSIS OUTPUT:")
-        analysis = state.get('analysis_output', 'None')
-        print(f"   {analysis}")
+    @staticmethod
+    def print_prompt_size(entry: Dict, run_id: Optional[str] = None):
+        """Report the estimated size of a node instruction."""
+        emit("prompt_size", run_id, **entry)
 
-        print(f"\n🔍 CRITIC OUTPUT:")
-        critic = state.get('critic_output', {})
-        if critic:
-            if isinstance(critic, dict):
-                for key, value in critic.items():
-                    print(f"   {key}: {value}")
-            else:
-                print(f"   {critic}")
-        else:
-            print("   None")
+    @staticmethod
+    def print_critic_only(state: State):
+        """Report only the critic output."""
+        emit("critique", critique=state.get('critic_output'), **StatePrinter._progress(state))
 
-        print(f"{'='*60}\n")
\ No newline at end of file
+    @staticmethod
+    def print_state(state: State):
+        """Report the whole current state."""
+        emit("state", ask=state.get('ask'), instruction=state.get('node_instruction'),
+             analysis=state.get('analysis_output'), critique=state.get('critic_output'),
+             **StatePrinter._progress(state))
@@ -0,0 +1,32 @@
+import pytest
+import main
+
+
+class ScriptedAgent:
+    """Agent answering messages with the given responses in turn and recording the messages it got."""
+
+    def __init__(self, *responses: str):
+        self.responses = list(responses)
+        self.messages = []
+
+    async def aprocess_message(self, message):
+        from langchain_core.messages import AIMessage
+
+        self.messages.append(message.content)
+        return AIMessage(content=self.responses.pop(0) if len(self.responses) > 1 else self.responses[0])
+
+    def cleanup(self):
+        pass
+
+
+@pytest.fixture
+def install_agents(monkeypatch):
+    """Serve the graph nodes' agents by name (e.g. gemini=..., claude=...), restoring the factories afterwards."""
+    monkeypatch.setattr(main, "_agent_factories", dict(main._agent_factories))
+
+    def install(**agents):
+        for name, agent in agents.items():
+            main.set_agent_factory(name, lambda configuration, agent=agent: agent)
+
+    yield install
+    main.cleanup_agents()
@@ -0,0 +1,60 @@
+import asyncio
+import io
+import json
+import batch_runner
+import main
+from batch_runner import BatchRunner
+from benchmarks.fake_agents import FakeAnalysisAgent, FakeCritiqueAgent
+from output_sink import reserve_stdout
+from state import Configuration
+
+
+class EchoApp:
+    """Compiled-graph stand-in returning the initial state as the final state."""
+
+    checkpointer = None
+
+    async def ainvoke(self, state, config=None):
+        return state
+
+
+def run_batch(asks, **kwargs):
+    runner = BatchRunner(EchoApp(), Configuration(), **kwargs)
+    source = io.StringIO("".join(json.dumps({"id": number, "ask": ask}) + "\n" for number, ask in enumerate(asks)))
+    sink = io.StringIO()
+    summary = asyncio.run(runner.run(source, sink))
+    return runner, summary, [json.loads(line) for line in sink.getvalue().splitlines()]
+
+
+def test_every_ask_gets_a_record():
+    runner, summary, records = run_batch(["a", "b", ""], concurrency=2)
+    assert sorted(record["id"] for record in records) == [0, 1, 2]
+    assert summary["completed"] == 2 and summary["failed"] == 1
+    assert [record["error"] for record in records if "error" in record] == ["Missing 'ask' field"]
+
+
+def test_latency_samples_are_bounded(monkeypatch):
+    monkeypatch.setattr(batch_runner, "LATENCY_SAMPLES", 5)
+    runner, summary, records = run_batch([f"ask {number}" for number in range(50)])
+    assert summary["completed"] == 50
+    assert len(runner.latencies) == 5
+    assert summary["p50_s"] is not None
+
+
+def test_batch_output_on_stdout_is_only_jsonl(tmp_path, monkeypatch, capsys):
+    factories = dict(main._agent_factories)
+    monkeypatch.setattr(main, "_agent_factories", factories)
+    main.set_agent_factory("gemini", lambda configuration: FakeAnalysisAgent())
+    main.set_agent_factory("claude", lambda configuration: FakeCritiqueAgent())
+    asks = tmp_path / "asks.jsonl"
+    asks.write_text("".join(json.dumps({"id": number, "ask": f"Question {number}?"}) + "\n" for number in range(3)))
+    try:
+        main.main(["--batch", str(asks), "--output", "-", "--no-warmup", "--no-metrics"])
+    finally:
+        reserve_stdout(False)
+        main.cleanup_agents()
+    captured = capsys.readouterr()
+    records = [json.loads(line) for line in captured.out.splitlines()]
+    assert sorted(record["id"] for record in records) == [0, 1, 2]
+    assert all(record["stop_reason"] == "no_blocking_issues" for record in records)
+    assert "BATCH SUMMARY" in captured.err and "LangGraph Demo" in captured.err
@@ -0,0 +1,57 @@
+import asyncio
+import pytest
+from langgraph.checkpoint.memory import InMemorySaver
+from benchmarks.fake_agents import CANNED_ANALYSIS, CANNED_CRITIQUE
+from checkpointing import ainvoke_resumable
+from conftest import ScriptedAgent
+from main import build_graph
+from state import Configuration, create_initial_state
+
+ASK = "Are social networks good?"
+
+
+class FlakyAgent(ScriptedAgent):
+    """Scripted agent whose first call fails, like a provider outage that kills the process."""
+
+    async def aprocess_message(self, message):
+        if not self.messages:
+            self.messages.append(message.content)
+            raise ConnectionError("provider unavailable")
+        return await super().aprocess_message(message)
+
+
+def run(app, ask=ASK, run_id="run-1"):
+    return asyncio.run(ainvoke_resumable(app, create_initial_state(ask, Configuration(), run_id=run_id)))
+
+
+def test_failed_run_resumes_after_its_last_completed_node(install_agents):
+    analyst, critic = ScriptedAgent(CANNED_ANALYSIS), FlakyAgent(CANNED_CRITIQUE)
+    install_agents(gemini=analyst, claude=critic)
+    app = build_graph(InMemorySaver())
+    with pytest.raises(ConnectionError):
+        run(app)
+    state = run(app)
+    assert state["stop_reason"] == "no_blocking_issues"
+    assert state["analysis_output"] == CANNED_ANALYSIS
+    assert len(analyst.messages) == 1 and len(critic.messages) == 2
+
+
+def test_completed_run_is_reused_without_agent_calls(install_agents):
+    analyst, critic = ScriptedAgent(CANNED_ANALYSIS), ScriptedAgent(CANNED_CRITIQUE)
+    install_agents(gemini=analyst, claude=critic)
+    app = build_graph(InMemorySaver())
+    first = run(app)
+    second = run(app)
+    assert second["analysis_output"] == first["analysis_output"]
+    assert len(analyst.messages) == len(critic.messages) == 1
+
+
+def test_reused_run_id_with_another_ask_starts_over(install_agents):
+    analyst, critic = ScriptedAgent(CANNED_ANALYSIS), ScriptedAgent(CANNED_CRITIQUE)
+    install_agents(gemini=analyst, claude=critic)
+    app = build_graph(InMemorySaver())
+    run(app)
+    state = run(app, ask="Is remote work here to stay?")
+    assert state["ask"] == "Is remote work here to stay?"
+    assert len(analyst.messages) == 2
+    assert "remote work" in analyst.messages[1]
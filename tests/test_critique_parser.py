@@ -0,0 +1,61 @@
+from critique_parser import CritiqueParser, select_best_candidate
+
+
+def blocking(raw_response: str) -> bool:
+    return CritiqueParser.has_blocking_issues(CritiqueParser.parse(raw_response))
+
+
+def test_negated_severity_list_is_not_blocking():
+    assert not blocking("Claude (via MCP): No critical or major issues.")
+    assert not blocking("Claude (via MCP): There are no critical, major or minor problems.")
+    assert not blocking("Claude (via MCP): No critical/major issues found.")
+
+
+def test_unnegated_severity_is_blocking():
+    assert blocking("Claude (via MCP): No critical issues, but one major flaw in the sources.")
+
+
+def test_prose_starting_with_severity_word_is_not_a_heading():
+    for raw_response in ("Claude (via MCP): Majority of the points are well supported.",
+                         "Claude (via MCP): Critically, nothing here blocks acceptance."):
+        critique = CritiqueParser.parse(raw_response)
+        assert not critique["parsed"]
+        assert not CritiqueParser.has_blocking_issues(critique)
+
+
+def test_severity_headings():
+    critique = CritiqueParser.parse(
+        "Claude (via MCP):\n## Critical Issues\n- Missing sources\n**Major:** Unclear scope\nMinor - Typos\n"
+    )
+    assert critique["critical"] == ["Missing sources"]
+    assert critique["major"] == ["Unclear scope"]
+    assert critique["minor"] == ["Typos"]
+
+
+def test_batch_critique_as_top_level_list():
+    preferred, critiques = CritiqueParser.parse_batch(
+        'Claude (via MCP): [{"candidate": 1, "critical": [], "major": ["Unsourced"], "minor": []},'
+        ' {"candidate": 2, "critical": [], "major": [], "minor": ["Long"]}]', 2)
+    assert preferred is None
+    assert [critique["parsed"] for critique in critiques] == [True, True]
+    assert critiques[0]["major"] == ["Unsourced"]
+    assert select_best_candidate(preferred, critiques) == 1
+    assert not CritiqueParser.has_blocking_issues(critiques[1])
+
+
+def test_batch_critique_with_one_unnumbered_critique():
+    for raw_response in ('Claude (via MCP): {"critical": [], "major": [], "minor": ["Typos"]}',
+                         "Claude (via MCP):\nCritical: none\nMajor: none\nMinor:\n- Typos"):
+        preferred, critiques = CritiqueParser.parse_batch(raw_response, 3)
+        assert len(critiques) == 3
+        for critique in critiques:
+            assert critique["parsed"] and critique["minor"] == ["Typos"]
+            assert not CritiqueParser.has_blocking_issues(critique)
+
+
+def test_batch_critique_with_candidates_key():
+    preferred, critiques = CritiqueParser.parse_batch(
+        '```json\n{"best": 2, "candidates": [{"candidate": 2, "critical": [], "major": [], "minor": []},'
+        ' {"candidate": 1, "critical": ["Wrong"], "major": [], "minor": []}]}\n```', 2)
+    assert preferred == 1
+    assert critiques[0]["critical"] == ["Wrong"] and critiques[1]["parsed"]
@@ -0,0 +1,39 @@
+import asyncio
+import pytest
+from deadlines import LATENCIES, call_with_deadline
+
+
+def slow_then_fast(slow_seconds):
+    """Call factory whose first attempt takes `slow_seconds` and later ones answer at once."""
+    attempts = []
+
+    async def call():
+        attempts.append(len(attempts))
+        await asyncio.sleep(slow_seconds if len(attempts) == 1 else 0)
+        return len(attempts)
+
+    return call
+
+
+def test_timed_out_attempt_is_recorded():
+    LATENCIES.reset()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(call_with_deadline(slow_then_fast(1.0), "test_call", timeout=0.05))
+    assert LATENCIES.count("test_call") == 1
+    assert LATENCIES.percentile("test_call", 95) >= 0.05
+
+
+def test_hedge_loser_is_recorded():
+    LATENCIES.reset()
+    for _ in range(10):
+        LATENCIES.record("test_call", 0.01)
+
+    async def run():
+        result = await call_with_deadline(slow_then_fast(1.0), "test_call", timeout=5.0, hedge_percentile=50)
+        # Let the cancelled primary attempt finish unwinding
+        await asyncio.sleep(0.01)
+        return result
+
+    assert asyncio.run(run()) == 2
+    assert LATENCIES.count("test_call") == 12
+    assert LATENCIES.percentile("test_call", 100) >= 0.01
@@ -0,0 +1,101 @@
+import asyncio
+from agents.mcp_batcher import McpCallBatcher, build_batch_prompt, split_batch_response
+
+
+def test_batch_response_is_split_by_request_id():
+    ids, prompt = build_batch_prompt([f"query {number}" for number in range(1, 11)])
+    assert ids[0] == "r1" and ids[-1] == "r10"
+    assert "<<<REQUEST r10>>>\nquery 10\n<<<END r10>>>" in prompt
+    response = ("<<<ANSWER r10>>>\nten\n<<<END r10>>>\n"
+                "<<<ANSWER r1>>>one<<<END r1>>>\n"
+                "<<<ANSWER r1>>>repeated<<<END r1>>>\n"
+                "<<<ANSWER r2>>>\n<<<END r2>>>\n"
+                "<<<ANSWER r3>>>unterminated")
+    answers = split_batch_response(response, ids)
+    assert answers[0] == "one" and answers[9] == "ten"
+    # Empty, unterminated and absent answers are missing
+    assert answers[1:9] == [None] * 8
+
+
+class Provider:
+    """Records the calls a batcher makes; batched answers are dropped for queries in `drop`."""
+
+    def __init__(self, drop=(), fail=False):
+        self.drop = set(drop)
+        self.fail = fail
+        self.single_calls = []
+        self.batch_calls = []
+
+    async def send_one(self, query):
+        self.single_calls.append(query)
+        return f"single answer to {query}"
+
+    async def send_batch(self, queries):
+        self.batch_calls.append(queries)
+        await asyncio.sleep(0)
+        if self.fail:
+            raise ConnectionError("provider unavailable")
+        return [None if query in self.drop else f"batched answer to {query}" for query in queries]
+
+
+def submit_all(provider, queries, **kwargs):
+    async def run():
+        batcher = McpCallBatcher(provider.send_one, provider.send_batch, **kwargs)
+        try:
+            return await asyncio.gather(*(batcher.submit(query) for query in queries), return_exceptions=True)
+        finally:
+            await batcher.close()
+
+    return asyncio.run(run())
+
+
+def test_concurrent_queries_share_one_call_and_get_their_own_answers():
+    provider = Provider()
+    answers = submit_all(provider, ["a", "b", "c"], window_seconds=0.01)
+    assert answers == ["batched answer to a", "batched answer to b", "batched answer to c"]
+    assert provider.batch_calls == [["a", "b", "c"]] and provider.single_calls == []
+
+
+def test_full_batch_is_sent_without_waiting_for_the_window():
+    provider = Provider()
+    answers = submit_all(provider, ["a", "b"], window_seconds=60.0, max_batch_size=2)
+    assert answers == ["batched answer to a", "batched answer to b"]
+    assert provider.batch_calls == [["a", "b"]]
+
+
+def test_lone_query_is_sent_as_a_plain_call():
+    provider = Provider()
+    assert submit_all(provider, ["a"], window_seconds=0.0) == ["single answer to a"]
+    assert provider.batch_calls == []
+
+
+def test_unparsed_answer_is_retried_on_its_own():
+    provider = Provider(drop={"b"})
+    answers = submit_all(provider, ["a", "b"], window_seconds=0.01)
+    assert answers == ["batched answer to a", "single answer to b"]
+    assert provider.single_calls == ["b"]
+
+
+def test_failed_batch_fails_every_query_without_single_retries():
+    provider = Provider(fail=True)
+    answers = submit_all(provider, ["a", "b"], window_seconds=0.01)
+    assert all(isinstance(answer, ConnectionError) for answer in answers)
+    assert provider.single_calls == []
+
+
+def test_caller_gone_before_the_window_closes_is_not_sent():
+    provider = Provider()
+
+    async def run():
+        batcher = McpCallBatcher(provider.send_one, provider.send_batch, window_seconds=0.05)
+        gone = asyncio.ensure_future(batcher.submit("gone"))
+        kept = asyncio.ensure_future(batcher.submit("kept"))
+        await asyncio.sleep(0)
+        gone.cancel()
+        try:
+            return await kept
+        finally:
+            await batcher.close()
+
+    assert asyncio.run(run()) == "single answer to kept"
+    assert provider.batch_calls == [] and provider.single_calls == ["kept"]
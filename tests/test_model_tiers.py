@@ -0,0 +1,32 @@
+import asyncio
+import pytest
+from deadlines import LATENCIES, call_with_deadline
+from model_tiers import FALLBACK_TIER, PRIMARY_TIER, TIER_MIN_SAMPLES, TierPolicy, tier_call_key
+from state import Configuration
+
+CONFIGURATION = Configuration(fallback_model="gemini-2.5-flash-lite", tier_latency_threshold_seconds=0.05)
+
+
+async def hang():
+    await asyncio.sleep(10)
+
+
+def test_tier_that_keeps_timing_out_is_demoted():
+    LATENCIES.reset()
+    policy = TierPolicy()
+    assert policy.select(CONFIGURATION, None) == PRIMARY_TIER
+
+    async def time_out_primary():
+        for _ in range(TIER_MIN_SAMPLES):
+            with pytest.raises(asyncio.TimeoutError):
+                await call_with_deadline(hang, tier_call_key(PRIMARY_TIER), timeout=0.06)
+
+    asyncio.run(time_out_primary())
+    assert policy.select(CONFIGURATION, None) == FALLBACK_TIER
+
+
+def test_fast_tier_stays_preferred():
+    LATENCIES.reset()
+    for _ in range(TIER_MIN_SAMPLES):
+        LATENCIES.record(tier_call_key(PRIMARY_TIER), 0.01)
+    assert TierPolicy().select(CONFIGURATION, None) == PRIMARY_TIER
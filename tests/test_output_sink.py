@@ -0,0 +1,41 @@
+import json
+import main
+from agents.resilience import CircuitBreaker
+from conftest import ScriptedAgent
+from output_sink import OutputSink, reserve_stdout, set_output_sink
+
+CLEAN_CRITIQUE = '{"critical": [], "major": [], "minor": []}'
+
+
+class RecordingSink(OutputSink):
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event, run_id=None, **fields):
+        self.events.append((event, fields))
+
+
+def test_circuit_opening_is_reported_to_the_sink(capsys):
+    sink = set_output_sink(RecordingSink())
+    try:
+        breaker = CircuitBreaker("gemini", failure_threshold=2, reset_seconds=30.0)
+        breaker.record_failure()
+        breaker.record_failure()
+    finally:
+        set_output_sink(OutputSink())
+    assert breaker.state == "open"
+    assert [fields["text"] for event, fields in sink.events if event == "notice"] == [
+        "⚡ gemini circuit opened after 2 consecutive failures"]
+    assert capsys.readouterr().out == ""
+
+
+def test_events_on_stdout_are_only_jsonl(install_agents, capsys):
+    install_agents(gemini=ScriptedAgent("An analysis."), claude=ScriptedAgent(CLEAN_CRITIQUE))
+    try:
+        main.main(["--events-file", "-", "--no-warmup", "--no-metrics"])
+    finally:
+        reserve_stdout(False)
+    captured = capsys.readouterr()
+    events = [json.loads(line) for line in captured.out.splitlines()]
+    assert {"ask", "analysis", "critique", "notice"} <= {event["event"] for event in events}
+    assert "WORKFLOW COMPLETED" in captured.err
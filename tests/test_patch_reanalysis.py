@@ -0,0 +1,42 @@
+import asyncio
+from conftest import ScriptedAgent
+from critique_parser import CritiqueParser
+from main import gemini_agent_node
+from state import Configuration, create_initial_state
+
+ANALYSIS = "Social networks connect people.\n\nThey help small businesses.\n\nModeration matters."
+
+
+def reanalysis_state(issues):
+    state = create_initial_state("Are social networks good?", Configuration(patch_reanalysis=True))
+    state["analysis_output"] = ANALYSIS
+    state["current_iterations"] = 2
+    state["critic_output"] = CritiqueParser.parse('{"critical": [], "major": %s, "minor": []}' % issues)
+    return state
+
+
+def test_marked_patch_edits_only_its_sections(install_agents):
+    install_agents(gemini=ScriptedAgent("[S2] They give small businesses cheap reach."))
+    state = asyncio.run(gemini_agent_node(reanalysis_state('["[S2] Vague claim"]')))
+    assert state["analysis_output"] == ("Social networks connect people.\n\nThey give small businesses cheap reach."
+                                        "\n\nModeration matters.")
+    assert state["patched_sections"] == [2]
+
+
+def test_unmarked_patch_of_one_section_is_spliced_in(install_agents):
+    install_agents(gemini=ScriptedAgent("They give small businesses cheap reach."))
+    state = asyncio.run(gemini_agent_node(reanalysis_state('["[S2] Vague claim"]')))
+    assert state["analysis_output"] == ("Social networks connect people.\n\nThey give small businesses cheap reach."
+                                        "\n\nModeration matters.")
+    assert state["patched_sections"] == [2]
+
+
+def test_unmarked_patch_of_several_sections_is_reanalyzed_in_full(install_agents):
+    full_analysis = "A full, regenerated analysis.\n\nWith its own sections."
+    agent = ScriptedAgent("Connections and cheap reach.", full_analysis)
+    install_agents(gemini=agent)
+    state = asyncio.run(gemini_agent_node(reanalysis_state('["[S1] Too broad", "[S2] Vague claim"]')))
+    assert len(agent.messages) == 2
+    assert agent.messages[1].startswith("Re-analyze this query")
+    assert state["analysis_output"] == full_analysis
+    assert state["patched_sections"] is None and state["patch_targets"] is None
@@ -0,0 +1,68 @@
+import asyncio
+import pytest
+from agents.claude_mcp_agent import McpCallError
+from agents.resilience import CircuitBreaker, ProviderGuard, RateLimiter, classify_error
+
+
+class ClientError(Exception):
+    """Provider SDK error carrying its HTTP code and status name, like google-genai's APIError."""
+
+    def __init__(self, message, code, status):
+        super().__init__(message)
+        self.code = code
+        self.status = status
+
+
+def wrapped(error):
+    """The error as LangChain raises it: wrapped, with the SDK error as its cause."""
+    try:
+        raise RuntimeError(f"Error calling model: {error}") from error
+    except RuntimeError as wrapper:
+        return wrapper
+
+
+def test_message_text_is_not_a_rate_limit():
+    error = McpCallError("Task tool failed: the analysis ignores the API's rate limit (429 RESOURCE_EXHAUSTED); "
+                         "retry after 30 seconds")
+    assert classify_error(error) == (True, False, None)
+
+
+def test_rate_limit_by_status_code_and_name():
+    error = ClientError("429 RESOURCE_EXHAUSTED. Please retry in 12s.", 429, "RESOURCE_EXHAUSTED")
+    assert classify_error(wrapped(error)) == (True, True, 12.0)
+    assert classify_error(ClientError("Quota exceeded", None, "RESOURCE_EXHAUSTED"))[1]
+    assert classify_error(ClientError("rate limit", 400, "INVALID_ARGUMENT")) == (False, False, None)
+
+
+def test_retryable_status_code():
+    assert classify_error(wrapped(ClientError("Service unavailable", 503, "UNAVAILABLE"))) == (True, False, None)
+
+
+def test_critique_mentioning_rate_limits_does_not_throttle_the_provider():
+    guard = ProviderGuard("claude", limiter=RateLimiter(requests_per_minute=600),
+                          breaker=CircuitBreaker("claude"), max_retries=1, base_delay=0.0)
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise McpCallError("Task tool failed: rate limit the analysis claims")
+        return "critique"
+
+    assert asyncio.run(guard.acall(call)) == "critique"
+    assert len(attempts) == 2
+    # A rate limit would have paused the shared bucket into deficit
+    assert guard.limiter.requests.tokens > 0
+
+
+def test_fatal_error_is_not_retried():
+    guard = ProviderGuard("claude", max_retries=3, base_delay=0.0)
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        raise McpCallError("MCP session not initialized", retryable=False)
+
+    with pytest.raises(McpCallError):
+        asyncio.run(guard.acall(call))
+    assert len(attempts) == 1
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+import agents.response_cache
+from agents.response_cache import ResponseCache
+from benchmarks.fake_agents import FakeAnalysisAgent
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Settable wall clock seen by the response cache."""
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(agents.response_cache, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+@pytest.mark.parametrize("on_disk", [False, True])
+def test_memory_tier_expires_entries(clock, tmp_path, on_disk):
+    cache = ResponseCache(path=str(tmp_path / "responses.sqlite3") if on_disk else None, ttl_seconds=60)
+    cache.put("key", AIMessage(content="cached"))
+    clock.now += 30
+    assert cache.get("key").content == "cached"
+    clock.now += 31
+    assert cache.get("key") is None
+    assert cache.stats()["memory_hits"] == 1 and cache.stats()["misses"] == 1
+    cache.close()
+
+
+def test_disk_hit_keeps_its_original_age(clock, tmp_path):
+    path = str(tmp_path / "responses.sqlite3")
+    writer = ResponseCache(path=path, ttl_seconds=60)
+    writer.put("key", AIMessage(content="cached"))
+    writer.close()
+    clock.now += 50
+    reader = ResponseCache(path=path, ttl_seconds=60)
+    assert reader.get("key").content == "cached"
+    clock.now += 11
+    # Promoted to the memory tier, the entry still expires 60s after it was first stored
+    assert reader.get("key") is None
+    assert reader.stats()["disk_hits"] == 1
+    reader.close()
+
+
+class ThreadRecordingCache(ResponseCache):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.threads = []
+
+    def get(self, key):
+        self.threads.append(threading.get_ident())
+        return super().get(key)
+
+    def put(self, key, message):
+        self.threads.append(threading.get_ident())
+        super().put(key, message)
+
+
+def test_async_path_keeps_cache_io_off_the_event_loop(tmp_path):
+    cache = ThreadRecordingCache(path=str(tmp_path / "responses.sqlite3"))
+    agent = FakeAnalysisAgent()
+    agent.set_response_cache(cache)
+
+    async def run():
+        loop_thread = threading.get_ident()
+        first = await agent.aprocess_message(HumanMessage(content="Analyze: networks"))
+        second = await agent.aprocess_message(HumanMessage(content="Analyze: networks"))
+        return loop_thread, first, second
+
+    loop_thread, first, second = asyncio.run(run())
+    assert first.content == second.content
+    assert cache.stats()["memory_hits"] == 1
+    # Lookup, store, then the second lookup
+    assert len(cache.threads) == 3 and loop_thread not in cache.threads
+    cache.close()
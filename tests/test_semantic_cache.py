@@ -0,0 +1,52 @@
+import pytest
+from semantic_cache import SemanticCache, key_terms, same_key_terms
+
+ASK = "What drove smartphone sales in Europe in 2023?"
+
+
+def finished(analysis, stop_reason="no_blocking_issues"):
+    return {"stop_reason": stop_reason, "analysis_output": analysis, "critic_output": {"critical": []},
+            "current_iterations": 2}
+
+
+def test_key_terms_are_names_and_numbers():
+    assert key_terms("What drove smartphone sales in Europe in 2023? The EU, Apple and 5G sold 1,000 units.") == \
+        {"europe", "2023", "apple", "eu", "5g", "1,000"}
+    # Capitalized sentence starts are not names
+    assert key_terms("Should remote work stay? Why not.") == set()
+    assert same_key_terms(ASK, "what drove smartphone sales in 2023 in europe")
+
+
+@pytest.mark.parametrize("other", ["What drove smartphone sales in Asia in 2023?",
+                                   "What drove smartphone sales in Europe in 2024?",
+                                   "What drove smartphone sales in Europe?"])
+def test_similar_ask_naming_other_terms_is_not_reused(other):
+    # The low threshold lets the vectors match, so only the key-term guard tells the asks apart
+    cache = SemanticCache(threshold=0.3)
+    cache.store(ASK, finished("Europe 2023 analysis"))
+    assert cache.lookup(other) is None
+    assert cache.stats()["rejections"] == 1
+
+
+def test_guard_falls_back_to_the_next_nearest_ask():
+    cache = SemanticCache(threshold=0.3)
+    cache.store("What drove smartphone sales in Europe in 2024?", finished("Europe 2024 analysis"))
+    cache.store("In 2023, which trends pushed smartphone sales in Europe?", finished("Europe 2023 analysis"))
+    # The 2024 ask is nearer but names another year
+    match = cache.lookup(ASK)
+    assert match["analysis_output"] == "Europe 2023 analysis"
+    assert cache.stats()["rejections"] == 1
+
+
+def test_only_finished_runs_are_stored_and_they_persist(tmp_path):
+    cache = SemanticCache(str(tmp_path))
+    assert not cache.store(ASK, finished("Cut short", stop_reason="deadline"))
+    assert not cache.store(ASK, dict(finished("Served from the cache"), semantic_match={"ask": ASK}))
+    assert cache.store(ASK, finished("Europe 2023 analysis"))
+    cache.close()
+
+    reopened = SemanticCache(str(tmp_path))
+    match = reopened.lookup("what drove smartphone sales in europe in 2023")
+    assert match["analysis_output"] == "Europe 2023 analysis" and match["similarity"] >= 0.9
+    assert reopened.stats()["entries"] == 1
+    reopened.close()
@@ -0,0 +1,65 @@
+import asyncio
+import json
+from langgraph.checkpoint.memory import InMemorySaver
+from benchmarks.fake_agents import CANNED_ANALYSIS, CANNED_CRITIQUE
+from conftest import ScriptedAgent
+from main import build_graph
+from service import AnalysisService
+from state import Configuration
+
+
+async def post_ask(service, payload):
+    reader, writer = await asyncio.open_connection(*service.address)
+    body = json.dumps(payload).encode("utf-8")
+    writer.write(b"POST /asks HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body))
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+
+def serve(app, *payloads):
+    """POST `payloads` in turn to a service around `app`; their status codes and records."""
+    async def run():
+        service = AnalysisService(app, Configuration(), concurrency=1)
+        await service.start(port=0)
+        try:
+            return [await post_ask(service, payload) for payload in payloads]
+        finally:
+            await service.close()
+
+    return asyncio.run(run())
+
+
+def checkpointed_graph(install_agents):
+    analyst, critic = ScriptedAgent(CANNED_ANALYSIS), ScriptedAgent(CANNED_CRITIQUE)
+    install_agents(gemini=analyst, claude=critic)
+    return build_graph(InMemorySaver()), analyst
+
+
+def test_record_names_the_run_and_generated_runs_drop_their_checkpoints(install_agents):
+    app, analyst = checkpointed_graph(install_agents)
+    [(status, record)] = serve(app, {"id": "q1", "ask": "Are social networks good?"})
+    assert status == 200
+    assert record["id"] == "q1" and record["stop_reason"] == "no_blocking_issues"
+    assert record["run_id"]
+    assert list(app.checkpointer.list(None)) == []
+
+
+def test_client_run_id_keeps_checkpoints_and_reuses_the_finished_run(install_agents):
+    app, analyst = checkpointed_graph(install_agents)
+    ask = {"ask": "Are social networks good?", "run_id": "client-run"}
+    (first_status, first), (second_status, second) = serve(app, ask, ask)
+    assert first_status == second_status == 200
+    assert first["run_id"] == second["run_id"] == "client-run"
+    assert second["analysis_output"] == first["analysis_output"]
+    assert len(analyst.messages) == 1
+    assert list(app.checkpointer.list(None))
+
+
+def test_run_id_must_be_a_string(install_agents):
+    app, analyst = checkpointed_graph(install_agents)
+    [(status, record)] = serve(app, {"ask": "Are social networks good?", "run_id": 7})
+    assert status == 400
+    assert analyst.messages == []
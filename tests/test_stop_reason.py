@@ -0,0 +1,56 @@
+from critique_parser import CritiqueParser
+from main import _update_stop_reason, should_continue_analysis
+from state import Configuration, create_initial_state
+
+CLEAN = '{"critical": [], "major": [], "minor": ["Typo"]}'
+BLOCKING = '{"critical": ["Wrong figure"], "major": [], "minor": []}'
+
+
+def critiqued_state(critique, completed_iterations, configuration=Configuration(max_iterations=3),
+                    previous="A first analysis.", analysis="A completely different second analysis, rewritten."):
+    state = create_initial_state("Are social networks good?", configuration)
+    state["previous_analysis_output"] = previous
+    state["analysis_output"] = analysis
+    state["critic_output"] = CritiqueParser.parse(critique)
+    state["current_iterations"] = completed_iterations + 1
+    _update_stop_reason(state)
+    return state
+
+
+def test_blocking_critique_continues_until_max_iterations():
+    state = critiqued_state(BLOCKING, 1)
+    assert state["stop_reason"] is None
+    assert should_continue_analysis(state) == "gemini_analysis"
+    state = critiqued_state(BLOCKING, 3)
+    assert state["stop_reason"] == "max_iterations"
+    assert should_continue_analysis(state) == "END"
+
+
+def test_clean_last_iteration_is_no_blocking_issues():
+    state = critiqued_state(CLEAN, 3)
+    assert state["stop_reason"] == "no_blocking_issues"
+    # The keyword rule would have stopped here too
+    assert state["llm_calls_saved"] == 0
+
+
+def test_converged_last_iteration_is_converged():
+    state = critiqued_state(BLOCKING, 3, previous="The same analysis.", analysis="The same analysis.")
+    assert state["stop_reason"] == "converged"
+
+
+def test_calls_saved_by_an_early_clean_critique():
+    # The raw critique names "critical" and "major", so the keyword rule would have looped twice more
+    state = critiqued_state(CLEAN, 1)
+    assert state["stop_reason"] == "no_blocking_issues"
+    assert state["llm_calls_saved"] == 4
+
+
+def test_calls_saved_with_candidates():
+    state = critiqued_state(CLEAN, 2, configuration=Configuration(max_iterations=3, candidate_count=3))
+    assert state["llm_calls_saved"] == 4
+
+
+def test_no_calls_saved_when_the_keyword_rule_would_stop():
+    state = critiqued_state("Looks good, nothing to fix.", 1)
+    assert state["stop_reason"] == "no_blocking_issues"
+    assert state["llm_calls_saved"] == 0
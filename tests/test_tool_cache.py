@@ -0,0 +1,33 @@
+import time
+import pytest
+from tools import ALL_TOOLS, TOOL_CACHE
+
+
+@pytest.fixture
+def current_time_tool():
+    TOOL_CACHE.clear()
+    yield next(tool for tool in ALL_TOOLS if tool.name == "get_current_time")
+    TOOL_CACHE.clear()
+
+
+def misses():
+    return TOOL_CACHE.stats()["get_current_time"]["misses"]
+
+
+def test_current_time_is_reused_within_the_same_second(current_time_tool, monkeypatch):
+    monkeypatch.setattr(time, "time", lambda: 1000.2)
+    before = misses()
+    first = current_time_tool.invoke({"timezone_name": "UTC"})
+    assert current_time_tool.invoke({"timezone_name": "UTC"}) == first
+    assert misses() == before + 1
+
+
+def test_current_time_is_recomputed_when_the_second_changes(current_time_tool, monkeypatch):
+    wall_clock = [1000.95]
+    monkeypatch.setattr(time, "time", lambda: wall_clock[0])
+    before = misses()
+    current_time_tool.invoke({"timezone_name": "UTC"})
+    # Well within the TTL, but the clock has moved on to the next second
+    wall_clock[0] = 1001.0
+    current_time_tool.invoke({"timezone_name": "UTC"})
+    assert misses() == before + 2
@@ -0,0 +1,83 @@
+import asyncio
+import time
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.tools import StructuredTool
+from agents.ai_agent import AiAgent
+
+
+class ToolCallingModel:
+    """Chat model stand-in calling `lookup` for each topic of the next round, then answering."""
+
+    def __init__(self, rounds, calls=None, tools_bound=False):
+        self.rounds = rounds
+        self.calls = [] if calls is None else calls
+        self.tools_bound = tools_bound
+
+    def bind_tools(self, tools):
+        return ToolCallingModel(self.rounds, self.calls, tools_bound=True)
+
+    def invoke(self, messages):
+        self.calls.append((self.tools_bound, list(messages)))
+        done = sum(isinstance(message, AIMessage) for message in messages)
+        if not self.tools_bound or done >= len(self.rounds):
+            return AIMessage(content=f"Answer after {done} tool rounds")
+        return AIMessage(content="", tool_calls=[{"name": "lookup", "args": {"topic": topic}, "id": f"{done}-{topic}"}
+                                                 for topic in self.rounds[done]])
+
+    async def ainvoke(self, messages):
+        return self.invoke(messages)
+
+
+class ToolAgent(AiAgent):
+    def __init__(self, rounds, tool_seconds=0.0, **kwargs):
+        self.model = ToolCallingModel(rounds)
+
+        def lookup(topic: str) -> str:
+            time.sleep(tool_seconds)
+            if topic == "broken":
+                raise ValueError("no notes")
+            return f"notes on {topic}"
+
+        super().__init__([StructuredTool.from_function(lookup, description="Look up notes.")], **kwargs)
+
+    def _initialize_llm(self):
+        return self.model
+
+
+def tool_results(messages):
+    return [message.content for message in messages if isinstance(message, ToolMessage)]
+
+
+def test_calls_of_a_round_run_concurrently_in_order():
+    agent = ToolAgent([["a", "b", "c"]], tool_seconds=0.2)
+    aprocess = lambda message: asyncio.run(agent._aprocess_message_internal(message))
+    for process in (agent._process_message_internal, aprocess):
+        start_time = time.perf_counter()
+        response = process(HumanMessage(content="question"))
+        assert time.perf_counter() - start_time < 0.4
+        assert response.content == "Answer after 1 tool rounds"
+        assert tool_results(agent.model.calls[-1][1]) == ["notes on a", "notes on b", "notes on c"]
+
+
+def test_rounds_build_on_earlier_results_until_the_model_answers():
+    agent = ToolAgent([["a"], ["b", "broken"]])
+    response = asyncio.run(agent._aprocess_message_internal(HumanMessage(content="question")))
+    assert response.content == "Answer after 2 tool rounds"
+    results = tool_results(agent.model.calls[-1][1])
+    assert results[:2] == ["notes on a", "notes on b"]
+    assert "failed: no notes" in results[2]
+
+
+def test_round_cap_forces_an_answer_without_tools():
+    agent = ToolAgent([["a"], ["b"], ["c"]], max_tool_rounds=2)
+    response = agent._process_message_internal(HumanMessage(content="question"))
+    assert response.content == "Answer after 2 tool rounds"
+    assert [tools_bound for tools_bound, _ in agent.model.calls] == [True, True, True, False]
+    assert tool_results(agent.model.calls[-1][1]) == ["notes on a", "notes on b"]
+
+
+def test_slow_tool_times_out_without_failing_the_round():
+    agent = ToolAgent([["a"]], tool_seconds=0.3, tool_timeout_seconds=0.05)
+    response = asyncio.run(agent._aprocess_message_internal(HumanMessage(content="question")))
+    assert response.content == "Answer after 1 tool rounds"
+    assert "timed out" in tool_results(agent.model.calls[-1][1])[0]
@@ -2,9 +2,37 @@
 Tools package containing LangChain tools for AI bot capabilities.
 """
 
+import json
+import time
 from .date_time_tool import ALL_DATE_TIME_TOOLS
+from .tool_cache import (
+    CachePolicy,
+    ToolCache,
+    TOOL_CACHE,
+    apply_cache_policies,
+    set_tool_cache_bypass,
+    get_tool_cache_stats,
+)
+
+# Declared cache policy per tool name; tools without a policy are never cached
+TOOL_CACHE_POLICIES = {
+    # Results have one-second resolution, so they are reused within the same wall-clock second only;
+    # a TTL alone would serve the previous second's time for up to a second after it ends
+    "get_current_time": CachePolicy(ttl_seconds=1.0, max_entries=64,
+                                    key=lambda args: (json.dumps(args, sort_keys=True), int(time.time()))),
+}
 
 # Combine all tool categories into a single list
-ALL_TOOLS = ALL_DATE_TIME_TOOLS
+ALL_TOOLS = apply_cache_policies(ALL_DATE_TIME_TOOLS, TOOL_CACHE_POLICIES)
 
-__all__ = ['ALL_TOOLS', 'ALL_DATE_TIME_TOOLS']
\ No newline at end of file
+__all__ = [
+    'ALL_TOOLS',
+    'ALL_DATE_TIME_TOOLS',
+    'TOOL_CACHE_POLICIES',
+    'CachePolicy',
+    'ToolCache',
+    'TOOL_CACHE',
+    'apply_cache_policies',
+    'set_tool_cache_bypass',
+    'get_tool_cache_stats',
+]
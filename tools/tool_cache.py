@@ -0,0 +1,167 @@
+"""
+Process-wide memoization of tool results with a declared cache policy per tool.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from langchain_core.tools import BaseTool, StructuredTool
+from metrics import METRICS
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """Immutable cache policy for one tool."""
+    ttl_seconds: float = 60.0                                        # Age after which a result is recomputed
+    max_entries: int = 128                                           # Results kept before LRU eviction
+    key: Optional[Callable[[Dict[str, Any]], Hashable]] = None       # Builds the cache key from tool args
+
+
+class ToolCache:
+    """
+    Registry holding cached results for every cached tool in the process.
+    Shared by all agents, since they all use the same wrapped tool objects.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, "OrderedDict[Hashable, tuple]"] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        # Bypass skips lookups and stores, e.g. to debug a tool with fresh results
+        self.bypass = os.getenv("TOOL_CACHE_BYPASS", "").lower() in ("1", "true", "yes")
+
+    def wrap(self, tool: BaseTool, policy: CachePolicy) -> BaseTool:
+        """
+        Wrap a tool so its results are cached according to `policy`.
+
+        Args:
+            tool: LangChain tool created with @tool or StructuredTool
+            policy: Cache policy for the tool
+
+        Returns:
+            New tool with the same name, description and args schema
+        """
+        self._entries.setdefault(tool.name, OrderedDict())
+        self._stats.setdefault(tool.name, {"hits": 0, "misses": 0, "evictions": 0})
+
+        def cached_func(**kwargs):
+            key = self._build_key(policy, kwargs)
+            found, value = self._lookup(tool.name, policy, key)
+            if found:
+                return value
+            value = tool.func(**kwargs)
+            self._store(tool.name, policy, key, value)
+            return value
+
+        async def cached_coroutine(**kwargs):
+            key = self._build_key(policy, kwargs)
+            found, value = self._lookup(tool.name, policy, key)
+            if found:
+                return value
+            value = await tool.coroutine(**kwargs)
+            self._store(tool.name, policy, key, value)
+            return value
+
+        return StructuredTool.from_function(
+            func=cached_func if getattr(tool, "func", None) is not None else None,
+            coroutine=cached_coroutine if getattr(tool, "coroutine", None) is not None else None,
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            return_direct=tool.return_direct
+        )
+
+    @staticmethod
+    def _build_key(policy: CachePolicy, kwargs: Dict[str, Any]) -> Hashable:
+        """Derive the cache key from the tool arguments."""
+        if policy.key:
+            return policy.key(kwargs)
+        return json.dumps(kwargs, sort_keys=True, default=str)
+
+    def _lookup(self, tool_name: str, policy: CachePolicy, key: Hashable) -> Tuple[bool, Any]:
+        """Return (found, value) for a non-expired cached result."""
+        if self.bypass:
+            return False, None
+        with self._lock:
+            entries = self._entries[tool_name]
+            stats = self._stats[tool_name]
+            entry = entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if time.monotonic() - stored_at <= policy.ttl_seconds:
+                    entries.move_to_end(key)
+                    stats["hits"] += 1
+                    METRICS.increment("tool_cache_lookups_total", tool=tool_name, result="hit")
+                    return True, value
+                del entries[key]
+            stats["misses"] += 1
+            METRICS.increment("tool_cache_lookups_total", tool=tool_name, result="miss")
+            return False, None
+
+    def _store(self, tool_name: str, policy: CachePolicy, key: Hashable, value: Any):
+        """Store a result and evict least recently used entries above `max_entries`."""
+        if self.bypass:
+            return
+        with self._lock:
+            entries = self._entries[tool_name]
+            entries[key] = (time.monotonic(), value)
+            entries.move_to_end(key)
+            while len(entries) > policy.max_entries:
+                entries.popitem(last=False)
+                self._stats[tool_name]["evictions"] += 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get per-tool cache counters.
+
+        Returns:
+            Mapping of tool name to hits, misses, evictions, hit rate and current size
+        """
+        with self._lock:
+            result = {}
+            for tool_name, stats in self._stats.items():
+                lookups = stats["hits"] + stats["misses"]
+                result[tool_name] = dict(
+                    stats,
+                    hit_rate=stats["hits"] / lookups if lookups else 0.0,
+                    entries=len(self._entries[tool_name])
+                )
+            return result
+
+    def clear(self):
+        """Drop every cached result, keeping the counters."""
+        with self._lock:
+            for entries in self._entries.values():
+                entries.clear()
+
+
+# Cache shared by every agent in the process
+TOOL_CACHE = ToolCache()
+
+
+def apply_cache_policies(tools: List[BaseTool], policies: Dict[str, CachePolicy]) -> List[BaseTool]:
+    """
+    Wrap every tool that has a declared policy; tools without a policy are returned unchanged.
+
+    Args:
+        tools: Tools to wrap
+        policies: Cache policy per tool name
+
+    Returns:
+        List of tools in the same order
+    """
+    return [TOOL_CACHE.wrap(tool, policies[tool.name]) if tool.name in policies else tool for tool in tools]
+
+
+def set_tool_cache_bypass(enabled: bool):
+    """Enable or disable the process-wide tool cache bypass."""
+    TOOL_CACHE.bypass = enabled
+
+
+def get_tool_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Get per-tool cache counters from the process-wide tool cache."""
+    return TOOL_CACHE.stats()